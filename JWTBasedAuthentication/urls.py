@@ -6,6 +6,8 @@ from drf_yasg import openapi
 from drf_yasg.views import get_schema_view
 from rest_framework import permissions
 
+from authentication.v1.apis.jwks import jwks
+from common.apis import metrics
 from JWTBasedAuthentication import views
 
 swagger_description = """
@@ -48,7 +50,8 @@ swagger_description = """
         The anonymous token API is the only API that has no specific
         permissions needed (AllowAny). Before doing anything else,
         you should call this API and set the given anon token in the 
-        cookies by name anon_token.
+        cookies by name anon_token (the response already sets it) or send
+        it in the X-Anon-Token header.
 
     * `2. Sign Up:`
         The sign-up action requires an Anonymous access token. When a 
@@ -81,6 +84,8 @@ urlpatterns = [
     path('swagger/', schema_view.with_ui('swagger',
          cache_timeout=0), name='schema-swagger-ui'),
     path('user/', include('authentication.urls')),
+    path('.well-known/jwks.json', jwks, name='jwks'),
+    path('metrics', metrics, name='metrics'),
     path('', include('home.urls')),
     path('', views.welcome_page, name='welcome.page'),
     path('product/', include('core.product_urls')),
@@ -0,0 +1,72 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenBackendError
+from rest_framework_simplejwt.settings import api_settings
+
+from authentication.tokens import AccessToken
+from authentication.v1.utils.claims import has_authorization_claims
+from authentication.v1.utils.revocation import load_revocation_registry_lazy
+from authentication.v1.utils.token_cache import (UserSnapshot,
+                                                 load_token_cache_lazy)
+from authentication.v1.utils.verifier import load_token_verifier_lazy
+from common.metrics import stage_timer, timed
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that remembers already-verified access tokens.
+
+    The first request with a token verifies its signature and loads the user like
+    `JWTAuthentication` does. The decoded claims and a `UserSnapshot` are then kept in
+    an in-process LRU keyed by the token signature until the token expires, so repeat
+    requests with the same token need no crypto and no database query. Tokens that carry
+    authorization claims need no database query at all. Revoked tokens are rejected on
+    every request from the in-memory revocation mirror. Signatures are checked by
+    `TokenVerifier` rather than the generic PyJWT decode.
+    """
+
+    @timed("authentication")
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        cache = load_token_cache_lazy()
+        signature = raw_token.rsplit(b".", 1)[-1]
+        entry = cache.get(signature, raw_token)
+        if entry is not None:
+            self.check_revocation(entry.validated_token)
+            return entry.user, entry.validated_token
+
+        with stage_timer("authentication.jwt_decode"):
+            validated_token = self.get_validated_token(raw_token)
+        self.check_revocation(validated_token)
+        if has_authorization_claims(validated_token):
+            user = UserSnapshot.from_claims(validated_token[api_settings.USER_ID_CLAIM],
+                                            validated_token)
+        else:
+            with stage_timer("authentication.user_fetch"):
+                user = UserSnapshot.from_user(self.get_user(validated_token))
+        cache.set(signature, raw_token, validated_token,
+                  user, validated_token["exp"])
+        return user, validated_token
+
+    def check_revocation(self, validated_token):
+        if load_revocation_registry_lazy().is_revoked(validated_token["jti"]):
+            raise InvalidToken(_("Token is revoked"))
+
+    def get_validated_token(self, raw_token):
+        try:
+            payload = load_token_verifier_lazy().verify(raw_token, AccessToken.token_type)
+        except TokenBackendError as e:
+            raise InvalidToken({
+                "detail": _("Given token not valid for any token type"),
+                "messages": [{"token_class": AccessToken.__name__,
+                              "token_type": AccessToken.token_type,
+                              "message": e.args[0]}],
+            })
+        return AccessToken.from_verified_payload(raw_token, payload)
@@ -0,0 +1,91 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from authentication.models import User
+from common import variables
+from redis_service.client import get_redis_client
+
+# Upper bounds in seconds of the TTL histogram; keys without an expiry are counted apart.
+TTL_BUCKETS = (60, 10 * 60, 60 * 60, 24 * 60 * 60, 7 * 24 * 60 * 60)
+NO_EXPIRY = "none"
+OVERFLOW = "+Inf"
+
+
+def user_id_of(key, prefix):
+    # <prefix>:{u:<pk>} since hash-tagged keys, <prefix>:<pk> before
+    user_id = key[len(prefix) + 1:]
+    if user_id.startswith("{u:") and user_id.endswith("}"):
+        user_id = user_id[3:-1]
+    return int(user_id) if user_id.isdigit() else None
+
+
+def ttl_bucket(ttl):
+    if ttl < 0:
+        return NO_EXPIRY
+    for bound in TTL_BUCKETS:
+        if ttl <= bound:
+            return str(bound)
+    return OVERFLOW
+
+
+class Command(BaseCommand):
+    help = ("Report the key counts, memory usage, TTL distribution and orphaned keys of the "
+            "per-user Redis keyspaces as JSON.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--prefix", action="append", dest="prefixes", default=None,
+                            help="Keyspace to analyze; repeatable. Defaults to the per-user keyspaces.")
+        parser.add_argument("--batch-size", type=int, default=500,
+                            help="Keys per SCAN page and per pipeline.")
+        parser.add_argument("--indent", type=int, default=None)
+
+    def handle(self, *args, **options):
+        prefixes = options["prefixes"] or [
+            variables.VERIFICATION_CODE, variables.PERSONAL_INFO, "blocked",
+            settings.OTP_ISSUANCE["COUNTER_KEY_PREFIX"],
+        ]
+        redis_client = get_redis_client()
+        report = {prefix: self.analyze(redis_client, prefix, options["batch_size"]) for prefix in prefixes}
+        self.stdout.write(json.dumps(report, indent=options["indent"]))
+
+    def analyze(self, redis_client, prefix, batch_size):
+        stats = {
+            "keys": 0,
+            "bytes": 0,
+            "ttl_seconds": dict.fromkeys([str(bound) for bound in TTL_BUCKETS] + [OVERFLOW, NO_EXPIRY], 0),
+            "orphaned_keys": 0,
+        }
+        batch = []
+        # SCAN walks the keyspace in pages, so Redis never blocks the way KEYS would.
+        for key in redis_client.scan_iter(match=f"{prefix}:*", count=batch_size):
+            batch.append(key)
+            if len(batch) >= batch_size:
+                self.analyze_batch(redis_client, prefix, batch, stats)
+                batch = []
+        if batch:
+            self.analyze_batch(redis_client, prefix, batch, stats)
+        return stats
+
+    def analyze_batch(self, redis_client, prefix, keys, stats):
+        pipe = redis_client.pipeline(transaction=False)
+        for key in keys:
+            pipe.memory_usage(key)
+            pipe.ttl(key)
+        replies = pipe.execute()
+
+        user_ids = {}
+        for key, size, ttl in zip(keys, replies[::2], replies[1::2]):
+            # A key that expired between SCAN and the pipeline has no size and a TTL of -2.
+            if size is None or ttl == -2:
+                continue
+            stats["keys"] += 1
+            stats["bytes"] += size
+            stats["ttl_seconds"][ttl_bucket(ttl)] += 1
+            user_id = user_id_of(key, prefix)
+            if user_id is not None:
+                user_ids[user_id] = user_ids.get(user_id, 0) + 1
+
+        existing = set(User.objects.filter(pk__in=user_ids).values_list("pk", flat=True))
+        stats["orphaned_keys"] += sum(count for user_id, count in user_ids.items() if user_id not in existing)
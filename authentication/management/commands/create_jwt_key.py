@@ -0,0 +1,44 @@
+import os
+from datetime import datetime
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from authentication.v1.utils.keyring import EDDSA, RS256
+
+
+class Command(BaseCommand):
+    help = "Create a new private key in JWT_KEYS_DIR for key ring rotation."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--algorithm", choices=[RS256, EDDSA],
+                            default=settings.JWT_KEY_RING["ALGORITHM"])
+        parser.add_argument("--kid", default=None,
+                            help="Key id, defaults to the current UTC timestamp.")
+
+    def handle(self, *args, **options):
+        keys_dir = settings.JWT_KEY_RING["KEYS_DIR"]
+        if not keys_dir:
+            raise CommandError("JWT_KEYS_DIR is not set.")
+        kid = options["kid"] or datetime.utcnow().strftime("%Y%m%d%H%M%S")
+        path = os.path.join(keys_dir, f"{kid}.pem")
+        if os.path.exists(path):
+            raise CommandError(f"Key {path} already exists.")
+
+        if options["algorithm"] == RS256:
+            private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        else:
+            private_key = ed25519.Ed25519PrivateKey.generate()
+        pem = private_key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+        os.makedirs(keys_dir, exist_ok=True)
+        with open(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), "wb") as key_file:
+            key_file.write(pem)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {path}. Set JWT_ACTIVE_KID={kid} and restart the workers to sign with it."))
@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+import redis
+from common import variables
+from redis_service.client import get_redis_client
+from redis_service.keys import user_key
+
+USER_KEY_PREFIXES = [variables.VERIFICATION_CODE, variables.PERSONAL_INFO, "blocked"]
+
+
+class Command(BaseCommand):
+    help = ("Rename per-user Redis keys from <prefix>:<pk> to the hash-tagged <prefix>:{u:<pk>} "
+            "used in Redis Cluster, keeping their values and TTLs. Hash-tagged keys written "
+            "since the deploy win over legacy ones.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        # Raw bytes: DUMP payloads are not valid UTF-8.
+        redis_client = get_redis_client(decode_responses=False)
+        prefixes = USER_KEY_PREFIXES + [settings.OTP_ISSUANCE["COUNTER_KEY_PREFIX"]]
+        migrated = skipped = 0
+        for prefix in prefixes:
+            for key in redis_client.scan_iter(match=f"{prefix}:*", count=options["batch_size"]):
+                user_id = key.decode()[len(prefix) + 1:]
+                if "{" in user_id:
+                    continue
+                if not options["dry_run"] and not self.migrate(redis_client, key, user_key(prefix, user_id)):
+                    skipped += 1
+                    continue
+                migrated += 1
+        verb = "Would migrate" if options["dry_run"] else "Migrated"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {migrated} keys, skipped {skipped}."))
+
+    def migrate(self, redis_client, key, new_key):
+        # RENAME needs both keys in one slot, so the value is copied with DUMP/RESTORE instead.
+        ttl = redis_client.pttl(key)
+        payload = redis_client.dump(key)
+        if payload is None or ttl == -2:
+            return False
+        try:
+            redis_client.restore(new_key, max(ttl, 0), payload)
+        except redis.ResponseError as e:
+            # The running code already wrote the new key (a fresh OTP, counter, ...); the
+            # legacy value is stale.
+            if "BUSYKEY" not in str(e):
+                raise
+            redis_client.delete(key)
+            return False
+        redis_client.delete(key)
+        return True
@@ -7,6 +7,9 @@ from django.utils.translation import gettext_lazy as _
 from modeltranslation.decorators import register
 from modeltranslation.translator import TranslationOptions
 
+from authentication.v1.utils.revocation import revoke_user_tokens
+from authentication.v1.utils.token_cache import invalidate_cached_user
+from redis_service.keys import user_key
 from redis_service.utils import RedisStore
 
 from .choices import *
@@ -62,10 +65,12 @@ class User(AbstractBaseUser, PermissionsMixin):
         """
         access_token_lifetime = int(
             str(settings.SIMPLE_JWT['ACCESS_TOKEN_LIFETIME']).split(' ')[0].strip())
-        RedisStore().set(f"blocked:{self.pk}", {
+        RedisStore().set(user_key("blocked", self.pk), {
             "phone_number": self.phone_number}, access_token_lifetime * 24 * 60 * 60)
         self.is_bocked = True
         self.save()
+        invalidate_cached_user(self.pk)
+        revoke_user_tokens(self.pk)
 
     # def unblock(self):
     #     """
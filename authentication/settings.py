@@ -1,6 +1,6 @@
 from datetime import timedelta
 
-from decouple import config
+from decouple import Csv, config
 
 from common.settings import *
 
@@ -9,14 +9,14 @@ SIMPLE_JWT = {  # TODO fix the time of access token
     "ACCESS_TOKEN_LIFETIME": timedelta(days=7),
     "SLIDING_TOKEN_REFRESH_LIFETIME": timedelta(days=14),
     "SLIDING_TOKEN_LIFETIME": timedelta(days=1),
-    "ROTATE_REFRESH_TOKENS": False,
+    "ROTATE_REFRESH_TOKENS": True,
     "ALGORITHM": "HS256",
     "SIGNING_KEY": config("SECRET_KEY", cast=str),
     "VERIFYING_KEY": None,
     "AUTH_HEADER_TYPES": ("Bearer",),
     "USER_ID_FIELD": "pk",
     "USER_ID_CLAIM": "pk",
-    "AUTH_TOKEN_CLASSES": ("rest_framework_simplejwt.tokens.AccessToken",),
+    "AUTH_TOKEN_CLASSES": ("authentication.tokens.AccessToken",),
     "TOKEN_TYPE_CLAIM": "token_type",
 }
 
@@ -27,3 +27,131 @@ SIMPLE_JWT.update(
         }
     }
 )
+
+# JWT signing keys (see authentication.v1.utils.keyring).
+# HS256 signs with SECRET_KEY. RS256/EdDSA load "<kid>.pem" private keys and "<kid>.pub.pem"
+# verify-only keys from JWT_KEYS_DIR, sign with JWT_ACTIVE_KID and publish /.well-known/jwks.json.
+# To rotate, add a new key file, point JWT_ACTIVE_KID to it and keep the old file until
+# the tokens it signed have expired.
+JWT_KEY_RING = {
+    "ALGORITHM": config("JWT_ALGORITHM", default="HS256", cast=str),
+    "ACTIVE_KID": config("JWT_ACTIVE_KID", default="hs256", cast=str),
+    "KEYS_DIR": config("JWT_KEYS_DIR", default="", cast=str),
+    "LEGACY_KID": "hs256",
+    "ACCEPT_LEGACY_HS256": config("JWT_ACCEPT_LEGACY_HS256", default=True, cast=bool),
+    "JWKS_CACHE_SECONDS": config("JWKS_CACHE_SECONDS", default=300, cast=int),
+}
+
+# Anonymous tokens. In "stateless" mode the signed token is the credential: clients send it in
+# the X-Anon-Token header or the anon_token cookie and no session row is written or read.
+# "session" keeps the old behaviour of storing the token in request.session.
+ANONYMOUS_TOKEN = {
+    "MODE": config("ANONYMOUS_TOKEN_MODE", default="stateless", cast=str),
+    "HEADER": "HTTP_X_ANON_TOKEN",
+    "COOKIE_NAME": "anon_token",
+}
+
+# Token revocation (logout). Revoked jti values live in Redis until their token expires and
+# every worker mirrors them in memory (see authentication.v1.utils.revocation).
+TOKEN_REVOCATION = {
+    "KEY_PREFIX": "revoked",
+    "USER_KEY_PREFIX": "revoked_user",
+    "CHANNEL": "revoked_tokens",
+    "BLOOM_CAPACITY": config("REVOCATION_BLOOM_CAPACITY", default=1000000, cast=int),
+    "BLOOM_ERROR_RATE": config("REVOCATION_BLOOM_ERROR_RATE", default=0.001, cast=float),
+    "PURGE_INTERVAL": 60,
+}
+
+# Refresh token rotation. Each refresh token is single-use; its family (every token rotated from
+# one login) is tracked by one Redis key and revoked as a whole when an old token is reused.
+REFRESH_TOKEN_ROTATION = {
+    "KEY_PREFIX": "refresh_family",
+}
+
+# Token introspection for nginx auth_request (/user/v1/api/introspect/). nginx may cache an
+# allowed token for CACHE_SECONDS (never past its exp), so revocations and blocks reach the
+# edge within that delay. Denied tokens are cached for DENY_CACHE_SECONDS.
+INTROSPECTION = {
+    "CACHE_SECONDS": config("INTROSPECTION_CACHE_SECONDS", default=30, cast=int),
+    "DENY_CACHE_SECONDS": config("INTROSPECTION_DENY_CACHE_SECONDS", default=300, cast=int),
+}
+
+# Claims-based authorization. Login tokens carry the user's state, staff, superuser and active
+# flags and block epoch (bep), and IsAuthorizedByClaims authorizes from them and the revocation
+# mirror without Redis or SQL. Tokens without these claims keep the Redis blocked:{u:<pk>} check.
+# Blocking takes effect at once through the block cutoff. Other changes (state, staff or
+# superuser) are re-read from the database on token refresh, so an access token may carry
+# stale values for at most ACCESS_TOKEN_LIFETIME.
+AUTHORIZATION_CLAIMS = {
+    "ENABLED": config("AUTHORIZATION_CLAIMS_ENABLED", default=True, cast=bool),
+}
+
+# OTP issuance (POST /user/v1/api/verification_code/get/). A new code can be requested once the
+# previous one has left Redis after COOLDOWN_SECONDS, and at most MAX_PER_WINDOW times per
+# WINDOW_SECONDS. Codes are stored as HMACs keyed with SECRET_KEY.
+OTP_ISSUANCE = {
+    "COOLDOWN_SECONDS": config("OTP_COOLDOWN_SECONDS", default=120, cast=int),
+    "MAX_PER_WINDOW": config("OTP_MAX_PER_WINDOW", default=10, cast=int),
+    "WINDOW_SECONDS": config("OTP_WINDOW_SECONDS", default=24 * 60 * 60, cast=int),
+    "COUNTER_KEY_PREFIX": "otp_issued",
+}
+
+# OTP delivery (authentication.v1.tasks.deliver_otp). Codes are sent from the QUEUE Celery
+# queue, retried up to MAX_RETRIES times with exponential backoff capped at
+# RETRY_BACKOFF_MAX seconds, and dropped once the code is EXPIRES_SECONDS old. A
+# (user, code) pair is delivered at most once.
+OTP_DELIVERY = {
+    "QUEUE": config("OTP_DELIVERY_QUEUE", default="otp"),
+    "MAX_RETRIES": config("OTP_DELIVERY_MAX_RETRIES", default=5, cast=int),
+    "RETRY_BACKOFF_MAX": config("OTP_DELIVERY_RETRY_BACKOFF_MAX", default=60, cast=int),
+    "EXPIRES_SECONDS": 5 * 60,
+    "KEY_PREFIX": "otp_delivery",
+}
+
+# Kavenegar SMS client (third_party_repository.kavenegar). One keep-alive pool of
+# MAX_CONNECTIONS per process; connection errors, 429 and 5xx answers are retried RETRIES
+# times with jittered backoff. Bulk messages are sent from SENDER with BULK_MESSAGE, in
+# calls of at most BULK_SIZE messages.
+KAVENEGAR = {
+    "API_KEY": config("KAVENEGAR_API_KEY", default=""),
+    "TEMPLATE": config("KAVENEGAR_TEMPLATE", default="verify"),
+    "SENDER": config("KAVENEGAR_SENDER", default=None),
+    "BULK_MESSAGE": config("KAVENEGAR_BULK_MESSAGE", default="Your verification code: {otp}"),
+    "BULK_SIZE": 200,
+    "CONNECT_TIMEOUT": config("KAVENEGAR_CONNECT_TIMEOUT", default=2.0, cast=float),
+    "READ_TIMEOUT": config("KAVENEGAR_READ_TIMEOUT", default=5.0, cast=float),
+    "RETRIES": config("KAVENEGAR_RETRIES", default=2, cast=int),
+    "BACKOFF_FACTOR": 0.2,
+    "BACKOFF_JITTER": 0.2,
+    "MAX_CONNECTIONS": config("KAVENEGAR_MAX_CONNECTIONS", default=10, cast=int),
+}
+
+# OTP providers (authentication.v1.utils.otp_gateway), by channel: kavenegar and fake_sms
+# for SMS, email and fake_email for email. Each send goes to the provider with the lowest
+# p99 latency over the last WINDOW_SECONDS whose error rate is at most MAX_ERROR_RATE, and
+# fails over to the next one. The fake providers never leave the process, for offline
+# load tests; they wait FAKE_LATENCY_SECONDS and fail with FAKE_ERROR_RATE.
+OTP_GATEWAY = {
+    "SMS_PROVIDERS": config("OTP_SMS_PROVIDERS", default="kavenegar", cast=Csv()),
+    "EMAIL_PROVIDERS": config("OTP_EMAIL_PROVIDERS", default="email", cast=Csv()),
+    "WINDOW_SECONDS": config("OTP_GATEWAY_WINDOW_SECONDS", default=300, cast=int),
+    "MIN_SAMPLES": config("OTP_GATEWAY_MIN_SAMPLES", default=20, cast=int),
+    "MAX_ERROR_RATE": config("OTP_GATEWAY_MAX_ERROR_RATE", default=0.2, cast=float),
+    "EMAIL_SENDER": config("OTP_EMAIL_SENDER", default=None),
+    "EMAIL_SUBJECT": "Verification code",
+    "EMAIL_MESSAGE": "{otp}",
+    "FAKE_LATENCY_SECONDS": config("OTP_FAKE_LATENCY_SECONDS", default=0.05, cast=float),
+    "FAKE_ERROR_RATE": config("OTP_FAKE_ERROR_RATE", default=0.0, cast=float),
+}
+
+# In-process cache of verified access tokens used by CachedJWTAuthentication.
+# MAX_ENTRY_AGE (seconds) bounds how long another worker may serve a stale user snapshot.
+TOKEN_CACHE = {
+    "MAX_SIZE": config("TOKEN_CACHE_MAX_SIZE", default=10000, cast=int),
+    "MAX_ENTRY_AGE": config("TOKEN_CACHE_MAX_ENTRY_AGE", default=300, cast=int),
+}
+
+# Batch token minting for internal tooling (POST /user/v1/api/tokens/batch/, staff only).
+TOKEN_MINTING = {
+    "MAX_BATCH_SIZE": config("TOKEN_MINTING_MAX_BATCH_SIZE", default=10000, cast=int),
+}
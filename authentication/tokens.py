@@ -0,0 +1,35 @@
+from rest_framework_simplejwt import tokens
+from rest_framework_simplejwt.utils import aware_utcnow
+
+from authentication.v1.utils.keyring import load_key_ring_lazy
+
+
+class KeyRingTokenMixin:
+    """
+    Sign and verify simplejwt tokens with the process key ring instead of the
+    single-key backend built from `SIMPLE_JWT`.
+    """
+
+    def get_token_backend(self):
+        return load_key_ring_lazy()
+
+    @classmethod
+    def from_verified_payload(cls, token, payload):
+        """
+        Wrap claims already checked by `TokenVerifier` without decoding the token again.
+        """
+        instance = cls.__new__(cls)
+        instance.token = token
+        instance.current_time = aware_utcnow()
+        instance.payload = payload
+        return instance
+
+
+class AccessToken(KeyRingTokenMixin, tokens.AccessToken):
+    pass
+
+
+class RefreshToken(KeyRingTokenMixin, tokens.RefreshToken):
+    access_token_class = AccessToken
+    # The refresh token family id (see authentication.v1.utils.rotation) stays off access tokens.
+    no_copy_claims = tokens.RefreshToken.no_copy_claims + ("fam",)
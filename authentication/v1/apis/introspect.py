@@ -0,0 +1,89 @@
+import time
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework_simplejwt.exceptions import TokenBackendError
+
+import redis
+from authentication.tokens import AccessToken
+from authentication.v1.utils.claims import (BLOCK_EPOCH_CLAIM,
+                                            has_authorization_claims)
+from authentication.v1.utils.revocation import load_revocation_registry_lazy
+from authentication.v1.utils.verifier import load_token_verifier_lazy
+from redis_service.client import get_redis_client
+from redis_service.keys import user_key
+
+AUTHORIZATION_PREFIX = "Bearer "
+
+
+def cache_for(response, max_age):
+    # nginx does not cache "private" responses, but X-Accel-Expires overrides Cache-Control
+    # for its own cache while other caches still see a private response.
+    response["Cache-Control"] = f"private, max-age={max_age}"
+    response["X-Accel-Expires"] = str(max_age)
+    return response
+
+
+def deny(max_age):
+    response = HttpResponse(status=401)
+    response["WWW-Authenticate"] = 'Bearer error="invalid_token"'
+    return cache_for(response, max_age)
+
+
+@csrf_exempt
+def introspect(request):
+    """
+    Decide whether the access token of a request is valid, for nginx `auth_request`.
+
+    The view skips DRF entirely: it verifies the signature and expiry with `TokenVerifier`,
+    checks the in-memory revocation mirror, including the block cutoff of the user like
+    `IsAuthorizedByClaims`, and makes one Redis `EXISTS blocked:{u:<pk>}` call. Any Redis
+    error, including one while the mirror is still loading, answers an uncached 503.
+    Decisions carry `Cache-Control: max-age` and `X-Accel-Expires` so nginx can micro-cache
+    them per token; an allowed token is never cached past its `exp`.
+
+    Parameters
+    ----------
+    request : HttpRequest
+        The nginx subrequest, with the original `Authorization` header.
+
+    Returns
+    -------
+    HttpResponse
+        204 with an `X-User-Id` header when the token is valid, 401 when it is missing,
+        invalid, expired, revoked or belongs to a blocked user, and 503 when Redis is down.
+    """
+    config = settings.INTROSPECTION
+    authorization = request.META.get("HTTP_AUTHORIZATION", "")
+    if not authorization.startswith(AUTHORIZATION_PREFIX):
+        return deny(0)
+
+    try:
+        claims = load_token_verifier_lazy().verify(
+            authorization[len(AUTHORIZATION_PREFIX):], AccessToken.token_type)
+    except TokenBackendError:
+        return deny(config["DENY_CACHE_SECONDS"])
+    user_id = claims.get(settings.SIMPLE_JWT["USER_ID_CLAIM"])
+    if user_id is None:
+        return deny(config["DENY_CACHE_SECONDS"])
+
+    # A mirror that is still loading falls back to Redis; a Redis error must not turn into
+    # a cached denial of a valid token.
+    registry = load_revocation_registry_lazy()
+    try:
+        if registry.is_revoked(claims["jti"], raise_on_error=True):
+            return deny(config["DENY_CACHE_SECONDS"])
+        if has_authorization_claims(claims) and registry.is_user_revoked(
+                user_id, claims[BLOCK_EPOCH_CLAIM], raise_on_error=True):
+            return deny(config["DENY_CACHE_SECONDS"])
+        if get_redis_client().exists(user_key("blocked", user_id)):
+            return deny(config["DENY_CACHE_SECONDS"])
+    except redis.RedisError:
+        response = HttpResponse(status=503)
+        response["Cache-Control"] = "no-store"
+        return response
+
+    response = HttpResponse(status=204)
+    response["X-User-Id"] = str(user_id)
+    return cache_for(response, max(min(config["CACHE_SECONDS"], int(claims["exp"] - time.time())), 0))
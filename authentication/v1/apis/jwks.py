@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+
+from authentication.v1.utils.keyring import load_key_ring_lazy
+
+
+@require_GET
+def jwks(request):
+    """
+    Publish the public keys of the key ring as a JSON Web Key Set.
+
+    The body is serialized once per key ring, and the response is cacheable so nginx and
+    sibling services can fetch it rarely and verify tokens locally by their `kid` header.
+
+    Parameters
+    ----------
+    request : HttpRequest
+        The Django HttpRequest object.
+
+    Returns
+    -------
+    HttpResponse
+        The `{"keys": [...]}` document with a public `Cache-Control` header.
+    """
+    response = HttpResponse(load_key_ring_lazy().jwks_json,
+                            content_type="application/json")
+    response["Cache-Control"] = f"public, max-age={settings.JWT_KEY_RING['JWKS_CACHE_SECONDS']}"
+    return response
@@ -1,19 +1,29 @@
+import logging
+
+from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
+from kombu.exceptions import OperationalError
 from rest_framework import status, views, viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
+from rest_framework_simplejwt.exceptions import TokenError
 from rest_framework_simplejwt.views import TokenRefreshView
 
 import redis
 from authentication.choices import *
 from authentication.models import User
 from authentication.permissions import AnonymousTokenPermission
+from authentication.tokens import RefreshToken
 from authentication.v1.serializers import (GetVerificationCodeSerializer,
+                                           KeyRingTokenRefreshSerializer,
                                            LoginSerializer)
-from authentication.v1.utils.otp import create_verification_code
-from authentication.v1.utils.otp import load_otp_adapter_lazy as OTPAdapter
-from authentication.v1.utils.token import generate_token
+from authentication.v1.tasks import deliver_otp
+from authentication.v1.utils.otp import (create_verification_code,
+                                         verification_code_matches)
+from authentication.v1.utils.revocation import revoke_tokens
+from authentication.v1.utils.rotation import load_refresh_token_families_lazy
+from authentication.v1.utils.token import STATELESS_MODE, generate_token
 from authentication.v1.utils.utils import normilize_phone_number
 from authentication.validators import (PhoneNumberValidatorAdapter,
                                        country_code_validator)
@@ -24,6 +34,8 @@ from common.variables import *
 from common.variables import BUSINESS_STATUS
 from common.utils import countries_hints_dict
 
+logger = logging.getLogger(__name__)
+
 
 def login_otp_validator(user, validated_verification_code, original_otp_data, serializer):
     """
@@ -44,7 +56,7 @@ def login_otp_validator(user, validated_verification_code, original_otp_data, se
     else:
         return False
 
-    if str(original_otp).strip() != str(validated_verification_code).strip():
+    if not verification_code_matches(user.pk, validated_verification_code, original_otp):
         return False
 
     now = BaseTime().now()
@@ -82,24 +94,32 @@ def get_token_for_user(user, serializer, request):
 
 
 def send_otp(
-        phone_number, verification_code):
+        phone_number, verification_code, user_id):
     """
-    Generate and send a verification code (OTP) to the user.
+    Queue the delivery of a verification code (OTP) to the user.
+
+    The SMS is sent by the `deliver_otp` Celery task, so the request returns without waiting
+    for the SMS provider. When the broker cannot be reached the task runs in-process instead.
 
     Parameters
     ----------
     phone_number : str
         The phone number to which the OTP is to be sent.
-    user : User
-        The user instance for whom the OTP is to be generated.
-    serializer : Serializer
-        The serializer instance used to interact with OTP data.
+    verification_code : str
+        The OTP to send.
+    user_id : int
+        The primary key of the user, part of the idempotency key of the delivery.
 
     Returns
     -------
     None
     """
-    OTPAdapter().send_otp(phone_number=phone_number, otp=verification_code)
+    args = (user_id, phone_number, verification_code)
+    try:
+        deliver_otp.apply_async(args, expires=settings.OTP_DELIVERY["EXPIRES_SECONDS"], retry=False)
+    except OperationalError:
+        logger.exception("Could not queue the OTP delivery, sending it in-process")
+        deliver_otp.apply(args)
 
 
 class VerificationCodeViewSet(
@@ -108,6 +128,7 @@ class VerificationCodeViewSet(
     permission_classes = [AnonymousTokenPermission]
     queryset = User.objects.all()
     serializer_class = GetVerificationCodeSerializer
+    throttle_scope = "otp"
 
     @action(detail=False, methods=[variables.POST])
     def get(self, request):
@@ -175,8 +196,10 @@ class VerificationCodeViewSet(
                     http_status_code=status.HTTP_200_OK,
                     business_status_code=BUSINESS_STATUS.USER_IS_BLOCKED,
                 )
+            verification_code, exp = create_verification_code(request.user)
             try:
-                if not serializer.have_access_to_request_otp(user):
+                # Stores the OTP unless one is pending or the quota is used up, in one round trip
+                if not serializer.add_otp_to_redis(user, verification_code, exp):
                     return Response(status=status.HTTP_429_TOO_MANY_REQUESTS)
             except redis.ConnectionError:
                 # TODO add this to a log server
@@ -187,19 +210,8 @@ class VerificationCodeViewSet(
                     business_status_code=BUSINESS_STATUS.REDIS_IS_DOWN,
                     http_status_code=status.HTTP_200_OK
                 )
-            verification_code, exp = create_verification_code(request.user)
             send_otp(phone_number=normalized_phone_number,
-                     verification_code=verification_code)
-            try:
-                serializer.add_otp_to_redis(user, verification_code, exp)
-            except redis.ConnectionError:
-                return BaseResponse(
-                    data=None,
-                    message=variables.TRY_AGAIN_LATER,
-                    is_exception=True,
-                    business_status_code=BUSINESS_STATUS.REDIS_IS_DOWN,
-                    http_status_code=status.HTTP_200_OK
-                )
+                     verification_code=verification_code, user_id=user.pk)
 
             return BaseResponse(
                 message=VERIFICATION_CODE_SENDED,
@@ -213,7 +225,7 @@ class VerificationCodeViewSet(
             user = serializer.create_user(phone_number=normalized_phone_number)
             verification_code, exp = create_verification_code(request.user)
             send_otp(phone_number=normalized_phone_number,
-                     verification_code=verification_code)
+                     verification_code=verification_code, user_id=user.pk)
             return BaseResponse(
                 message=USER_REGISTERD,
                 data=None,
@@ -251,13 +263,22 @@ class AnonymousUserViewSet(viewsets.ViewSet):
             )
         try:
             access = generate_token(request)[variables.ANON_TOKEN]
-            return BaseResponse(
+            response = BaseResponse(
                 message=ANON_TOKEN_CREATED,
                 data=access,
                 is_exception=False,
                 http_status_code=status.HTTP_200_OK,
                 business_status_code=BUSINESS_STATUS.SUCCESS,
             )
+            if settings.ANONYMOUS_TOKEN["MODE"] == STATELESS_MODE:
+                response.set_cookie(
+                    settings.ANONYMOUS_TOKEN["COOKIE_NAME"],
+                    access,
+                    max_age=int(settings.SIMPLE_JWT["ACCESS_TOKEN_LIFETIME"].total_seconds()),
+                    httponly=True,
+                    samesite="Lax",
+                )
+            return response
         except Exception as e:
             return Response(
                 data=str(e),
@@ -280,6 +301,7 @@ class LoginViewSet(
     queryset = User.objects.all()
     permission_classes = [AnonymousTokenPermission]
     serializer_class = LoginSerializer
+    throttle_scope = "login"
 
     @action(detail=False, methods=[variables.POST])
     def login(self, request):
@@ -289,6 +311,11 @@ class LoginViewSet(
         This endpoint is used to log in a user by verifying the provided phone number and verification code against stored data.
         If the verification is successful, authentication tokens are generated and returned.
 
+        Besides the throttle, a login costs one query fetching the user by its unique phone
+        number, one script call consuming the OTP if it matches and, only on the first login
+        of a pending user, one `UPDATE` of its state; `UnitTestLoginView.test_login_budget`
+        enforces this.
+
         Parameters
         ----------
         request : Request
@@ -357,7 +384,7 @@ class LoginViewSet(
                 business_status_code=BUSINESS_STATUS.USER_IS_BLOCKED,
             )
         try:
-            original_otp_data = serializer.get_original_otp(user)
+            original_otp_data = serializer.get_original_otp(user, validated_data[variables.VERIFICATION_CODE])
         except redis.ConnectionError:
             # TODO add this to a log server
             return BaseResponse(
@@ -374,17 +401,8 @@ class LoginViewSet(
                 http_status_code=status.HTTP_200_OK,
                 business_status_code=BUSINESS_STATUS.INVALID_LOGIN_CREDENTIONAL,)
 
+        # get_original_otp already consumed the OTP
         tokens = get_token_for_user(user, serializer, request)
-        try:
-            serializer.remove_otp_from_redis(user)
-        except redis.ConnectionError:
-            return BaseResponse(
-                data=None,
-                message=variables.TRY_AGAIN_LATER,
-                is_exception=True,
-                business_status_code=BUSINESS_STATUS.REDIS_IS_DOWN,
-                http_status_code=status.HTTP_200_OK
-            )
         return BaseResponse(
             message=USER_LOGGED_IN,
             data={
@@ -400,6 +418,10 @@ class LoginViewSet(
         """
         Log out the current user.
 
+        The access token of the request is revoked until it expires. If the body carries the
+        `refresh_token` of the same user, it is revoked too, together with every token rotated
+        from the same login, so it cannot mint new access tokens.
+
         Parameters:
         ----------
         * `request`: ``HttpRequest``
@@ -410,9 +432,32 @@ class LoginViewSet(
         ``Response``
             The response indicating the success or failure of the logout process.
         """
-        if isinstance(request.user, AnonymousUser):
+        if isinstance(request.user, AnonymousUser) or request.auth is None:
             return Response(status=status.HTTP_400_BAD_REQUEST, data=None)
 
+        tokens = [request.auth]
+        raw_refresh_token = request.data.get(variables.REFRESH_TOKEN)
+        if raw_refresh_token:
+            try:
+                refresh_token = RefreshToken(raw_refresh_token)
+            except TokenError:
+                return Response(status=status.HTTP_400_BAD_REQUEST, exception=True, data=INVALID_INPUT_DATA)
+            if str(refresh_token.get(settings.SIMPLE_JWT["USER_ID_CLAIM"])) != str(request.user.pk):
+                return Response(status=status.HTTP_400_BAD_REQUEST, exception=True, data=INVALID_INPUT_DATA)
+            tokens.append(refresh_token)
+        try:
+            revoke_tokens(*tokens)
+            if len(tokens) > 1:
+                load_refresh_token_families_lazy().revoke(tokens[1])
+        except redis.ConnectionError:
+            return BaseResponse(
+                data=None,
+                message=variables.TRY_AGAIN_LATER,
+                is_exception=True,
+                business_status_code=BUSINESS_STATUS.REDIS_IS_DOWN,
+                http_status_code=status.HTTP_200_OK
+            )
+
         return BaseResponse(
             message=USER_LOGGED_OUT,
             data=None,
@@ -432,3 +477,26 @@ class TokenRefreshWithPermission(TokenRefreshView):
         List of permissions required for token refresh.
     """
     permission_classes = [AnonymousTokenPermission]
+
+    def get_serializer_class(self):
+        """
+        Get the serializer class that verifies and signs tokens with the key ring.
+
+        Returns:
+        ----------
+        ``type``
+            Serializer class for the token refresh.
+        """
+        return KeyRingTokenRefreshSerializer
+
+    def post(self, request, *args, **kwargs):
+        try:
+            return super().post(request, *args, **kwargs)
+        except redis.ConnectionError:
+            return BaseResponse(
+                data=None,
+                message=variables.TRY_AGAIN_LATER,
+                is_exception=True,
+                business_status_code=BUSINESS_STATUS.REDIS_IS_DOWN,
+                http_status_code=status.HTTP_200_OK
+            )
@@ -0,0 +1,75 @@
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAdminUser
+
+from authentication.v1.serializers import BatchTokenSerializer
+from authentication.v1.utils.minting import mint_tokens
+from common import variables
+from common.utils import BaseResponse
+from common.variables import *
+from common.variables import BUSINESS_STATUS
+
+
+class TokenMintingViewSet(viewsets.GenericViewSet):
+    """
+    Staff-only API endpoint that mints tokens for internal tooling and load tests.
+
+    Tokens of staff users and superusers can only be minted by superusers, so a staff
+    account cannot escalate to a superuser.
+
+    Attributes
+    ----------
+    * `serializer_class`: ``BatchTokenSerializer``
+        Validates the list of user ids.
+    """
+    permission_classes = [IsAdminUser]
+    serializer_class = BatchTokenSerializer
+
+    @action(detail=False, methods=[variables.POST])
+    def batch(self, request):
+        """
+        Mint an access/refresh pair for every active user in `user_ids`.
+
+        Parameters
+        ----------
+        request : Request
+            The HTTP request object with a `user_ids` list in the data field.
+
+        Returns
+        -------
+        Response
+            `tokens` with `{"user_id", "access", "refresh"}` per minted user and
+            `not_found` with the ids that are unknown or inactive; 403 FORBIDDEN when a staff
+            user who is not a superuser asks for tokens of staff users or superusers.
+        """
+        serializer = self.get_serializer(data=request.data)
+        if not serializer.is_valid():
+            return BaseResponse(
+                message=INVALID_INPUT_DATA,
+                data={variables.DETAILS: serializer.errors},
+                is_exception=True,
+                http_status_code=status.HTTP_400_BAD_REQUEST,
+                business_status_code=BUSINESS_STATUS.INVALID_INPUT_DATA,
+            )
+
+        user_ids = serializer.get_active_user_ids()
+        if not request.user.is_superuser and serializer.has_privileged_users(user_ids):
+            return BaseResponse(
+                message=PRIVILEGED_TOKENS_FORBIDDEN,
+                data=None,
+                is_exception=True,
+                http_status_code=status.HTTP_403_FORBIDDEN,
+                business_status_code=BUSINESS_STATUS.USER_DONT_HAVE_ACCESS,
+            )
+        minted = set(user_ids)
+        return BaseResponse(
+            message=TOKENS_MINTED,
+            data={
+                "tokens": mint_tokens(user_ids),
+                "not_found": [user_id for user_id in dict.fromkeys(serializer.validated_data["user_ids"])
+                              if user_id not in minted],
+            },
+            is_exception=False,
+            http_status_code=status.HTTP_201_CREATED,
+            business_status_code=BUSINESS_STATUS.SUCCESS,
+        )
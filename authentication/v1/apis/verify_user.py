@@ -30,6 +30,7 @@ class VerifyUserViewSet(viewsets.GenericViewSet):
     """
     queryset = Profile.objects.all()
     serializer_class = UserVerificationSerializer
+    throttle_scope = "verification"
 
     @action(methods=['post'], detail=False)
     def verify_user(self, request):
@@ -185,6 +186,7 @@ class UpdateUserVerifiedDataViewSet(viewsets.GenericViewSet):
     """
     queryset = Profile.objects.all()
     serializer_class = PersonalInfoConfirmationSerializer
+    throttle_scope = "verification"
 
     @action(detail=False, methods=[GET])
     def show_preview(self, request):
@@ -3,6 +3,7 @@ from rest_framework import status
 from django.contrib.auth import get_user_model
 from unittest.mock import patch
 from common import variables
+from authentication.v1.utils.otp import hash_verification_code
 from common.utils import BaseTime
 
 
@@ -71,10 +72,11 @@ class IntegrationLoginTestCase(APITestCase):
                 self.assertEqual(response.status_code, status.HTTP_201_CREATED)
                 self.assertEqual(variables.USER_REGISTERD, response.data['message'])
 
-        # Mock the Redis get call to return the correct OTP and expiration time
+        # Mock the OTP consume script to return the correct OTP and expiration time
     
-        with patch("redis_service.utils.RedisStore.get", return_value={
-            variables.VERIFICATION_CODE: "123456",
+        with patch("authentication.v1.utils.otp.OTPIssuer.consume", return_value={
+            variables.VERIFICATION_CODE: hash_verification_code(
+                get_user_model().objects.get(phone_number="00989123456789").pk, "123456"),
             variables.EXPIRTION_TIME: BaseTime().now() + 300
         }) as mock_redis_get:
 
@@ -138,9 +140,10 @@ class IntegrationLoginTestCase(APITestCase):
                 self.assertEqual(response.status_code, status.HTTP_200_OK)
                 self.assertEqual(variables.VERIFICATION_CODE_SENDED, response.data['message'])
 
-        # Step 4: Mock the Redis get call to return the correct OTP and expiration time
-        with patch("redis_service.utils.RedisStore.get", return_value={
-            variables.VERIFICATION_CODE: "123456",
+        # Step 4: Mock the Redis GETDEL call to return the correct OTP and expiration time
+        with patch("authentication.v1.utils.otp.OTPIssuer.consume", return_value={
+            variables.VERIFICATION_CODE: hash_verification_code(
+                get_user_model().objects.get(phone_number="00989123456789").pk, "123456"),
             variables.EXPIRTION_TIME: BaseTime().now() + 300
         }) as mock_redis_get:
 
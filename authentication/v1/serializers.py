@@ -1,14 +1,28 @@
+from django.conf import settings
+from django.db.models import Q
 from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
 
 import redis
 from authentication.choices import *
 from authentication.models import Profile, User
+from authentication.tokens import RefreshToken
+from authentication.v1.utils.claims import (BLOCK_EPOCH_CLAIM,
+                                            authorization_claims,
+                                            has_authorization_claims)
+from authentication.v1.utils.otp import OTP_ISSUED, load_otp_issuer_lazy
+from authentication.v1.utils.revocation import load_revocation_registry_lazy
+from authentication.v1.utils.rotation import load_refresh_token_families_lazy
+from authentication.v1.utils.token_cache import invalidate_cached_user
 from common import variables
 from common.serializers import (ModelSerializerWithVerboseNames,
                                 SerializerWithVerboseNames)
 from common.variables import *
-from redis_service.utils import RedisStore, check_redis_health
+from redis_service.keys import user_key
+from redis_service.utils import AsyncRedisStore, RedisStore, check_redis_health
 
 
 class UserSerializer(ModelSerializerWithVerboseNames):
@@ -104,9 +118,12 @@ class LoginSerializer(SerializerWithVerboseNames):
             )
         return super().validate(attrs)
 
-    def user_exists(self, phone_number) -> bool:
+    def user_exists(self, phone_number) -> None | User:
         """
-        Check if a user exists with the given phone number.
+        Fetch the user with the given phone number.
+
+        The phone number is unique, so this is one lookup by its index without the
+        `ORDER BY` that `first()` adds.
 
         Parameters
         ----------
@@ -115,10 +132,13 @@ class LoginSerializer(SerializerWithVerboseNames):
 
         Returns
         -------
-        bool
-            True if the user exists, False otherwise.
+        User or None
+            The user object if found, otherwise None.
         """
-        return User.objects.filter(phone_number=phone_number).first()
+        try:
+            return User.objects.get(phone_number=phone_number)
+        except User.DoesNotExist:
+            return None
 
     def set_state(self, user, state):
         """
@@ -137,35 +157,37 @@ class LoginSerializer(SerializerWithVerboseNames):
             The updated user object.
         """
         user.state = state
-        user.save()
+        user.save(update_fields=["state"])
+        invalidate_cached_user(user.pk)
         return user
 
-    def get_original_otp(self, user):
+    def get_original_otp(self, user, verification_code):
         """
-        Retrieve the original OTP from Redis for the given user.
+        Consume the original OTP of the given user from Redis if it matches the submitted code.
+
+        The code is compared and the OTP removed in one script call, see `OTPIssuer.consume`:
+        a successful login needs no further Redis call, and a wrong code leaves the OTP in
+        place for its owner.
 
         Parameters
         ----------
         user : User
             The user object.
+        verification_code : str
+            The verification code submitted by the user.
 
         Returns
         -------
-        str
-            The original OTP stored in Redis.
+        dict or None
+            The OTP data stored in Redis, or None if there is none or it does not match.
         """
-        return RedisStore().get(key=f'{variables.VERIFICATION_CODE}:{user.pk}')
+        return load_otp_issuer_lazy().consume(user, verification_code)
 
-    def remove_otp_from_redis(self, user):
+    async def aget_original_otp(self, user, verification_code):
         """
-        Remove the OTP from Redis for the given user.
-
-        Parameters
-        ----------
-        user : User
-            The user object.
+        Async variant of `get_original_otp`.
         """
-        RedisStore().remove(key=f'{variables.VERIFICATION_CODE}:{user.pk}')
+        return await load_otp_issuer_lazy().aconsume(user, verification_code)
 
 
 class GetVerificationCodeSerializer(SerializerWithVerboseNames):
@@ -241,9 +263,12 @@ class GetVerificationCodeSerializer(SerializerWithVerboseNames):
         """
         user.state = value
 
-    def add_otp_to_redis(self, user, verification_code, expirtion_time, redis_lifetime=2) -> None:
+    def add_otp_to_redis(self, user, verification_code, expirtion_time) -> bool:
         """
-        Add an OTP to Redis for the given user.
+        Add the hashed OTP to Redis for the given user unless issuing is refused.
+
+        The cooldown check, the store and the per-user count are one atomic script call,
+        see `OTPIssuer`.
 
         Parameters
         ----------
@@ -253,31 +278,20 @@ class GetVerificationCodeSerializer(SerializerWithVerboseNames):
             The verification code to store.
         expirtion_time : int
             The expiration time of the verification code.
-        redis_lifetime : int, optional
-            The lifetime of the Redis entry in minutes (default is 2 minutes).
-        """
-        key = f'{variables.VERIFICATION_CODE}:{user.pk}'
-        RedisStore().set(key, {variables.VERIFICATION_CODE: verification_code,
-                               variables.EXPIRTION_TIME: expirtion_time, variables.PHONE_NUMBER: user.phone_number}, redis_lifetime)
-
-    def have_access_to_request_otp(self, user) -> None:
-        """
-        Check if the user has access to request an OTP.
-
-        This method checks if an OTP request is already in Redis for the given user.
-
-        Parameters
-        ----------
-        user : User
-            The user object.
 
         Returns
         -------
         bool
-            False if an OTP request already exists, True otherwise.
+            False if an OTP request is still pending or the user reached the OTP quota,
+            True otherwise.
         """
-        key = f'{variables.VERIFICATION_CODE}:{user.pk}'
-        return False if RedisStore().get(key=key) else True
+        return load_otp_issuer_lazy().issue(user, verification_code, expirtion_time) == OTP_ISSUED
+
+    async def aadd_otp_to_redis(self, user, verification_code, expirtion_time) -> bool:
+        """
+        Async variant of `add_otp_to_redis`.
+        """
+        return await load_otp_issuer_lazy().aissue(user, verification_code, expirtion_time) == OTP_ISSUED
 
     def validate(self, attrs):
         """
@@ -357,16 +371,29 @@ class UserVerificationSerializer(SerializerWithVerboseNames):
             The national code of the user.
         """
         RedisStore().set(
-            f"{variables.PERSONAL_INFO}:{user.pk}",
-            {
-                variables.PERSONAL_INFO: personal_info,
-                variables.PHONE_NUMBER: user.phone_number,
-                variables.COUNT: count,
-                variables.IDENTITY_NUMBER: national_code
-            },
+            user_key(variables.PERSONAL_INFO, user.pk),
+            self.preview_entry(personal_info, user, count, national_code),
+            24 * 60 * 60
+        )
+
+    async def aadd_preview_to_redis(self, personal_info, user, count, national_code):
+        """
+        Async variant of `add_preview_to_redis`.
+        """
+        await AsyncRedisStore().set(
+            user_key(variables.PERSONAL_INFO, user.pk),
+            self.preview_entry(personal_info, user, count, national_code),
             24 * 60 * 60
         )
 
+    def preview_entry(self, personal_info, user, count, national_code):
+        return {
+            variables.PERSONAL_INFO: personal_info,
+            variables.PHONE_NUMBER: user.phone_number,
+            variables.COUNT: count,
+            variables.IDENTITY_NUMBER: national_code
+        }
+
     def get_personal_info(self, user):
         """
         Get personal information from Redis.
@@ -383,7 +410,13 @@ class UserVerificationSerializer(SerializerWithVerboseNames):
         dict or None
             The personal information retrieved from Redis, or None if not found.
         """
-        return RedisStore().get(f"{variables.PERSONAL_INFO}:{user.pk}")
+        return RedisStore().get(user_key(variables.PERSONAL_INFO, user.pk))
+
+    async def aget_personal_info(self, user):
+        """
+        Async variant of `get_personal_info`.
+        """
+        return await AsyncRedisStore().get(user_key(variables.PERSONAL_INFO, user.pk))
 
 
 class PersonalInfoConfirmationSerializer(SerializerWithVerboseNames):
@@ -416,6 +449,7 @@ class PersonalInfoConfirmationSerializer(SerializerWithVerboseNames):
         profile.last_name = data[PERSONAL_INFO][LAST_NAME]
         profile.identity_number = data[IDENTITY_NUMBER]
         profile.save()
+        invalidate_cached_user(user.pk)
 
     def get_user_preview_data(self, user):
         """
@@ -433,8 +467,107 @@ class PersonalInfoConfirmationSerializer(SerializerWithVerboseNames):
         dict or None
             The preview data retrieved from Redis, or None if not found.
         """
-        return RedisStore().get(f"{variables.PERSONAL_INFO}:{user.pk}")
+        return RedisStore().get(user_key(variables.PERSONAL_INFO, user.pk))
 
     def show_preview(self, user):
-        prev = RedisStore().get(f"{variables.PERSONAL_INFO}:{user.pk}")
+        prev = RedisStore().get(user_key(variables.PERSONAL_INFO, user.pk))
         return prev[variables.PERSONAL_INFO] if prev else None
+
+    async def aget_user_preview_data(self, user):
+        """
+        Async variant of `get_user_preview_data`.
+        """
+        return await AsyncRedisStore().get(user_key(variables.PERSONAL_INFO, user.pk))
+
+    async def ashow_preview(self, user):
+        prev = await AsyncRedisStore().get(user_key(variables.PERSONAL_INFO, user.pk))
+        return prev[variables.PERSONAL_INFO] if prev else None
+
+
+class KeyRingTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refresh serializer that verifies refresh tokens and signs new access tokens with the key ring.
+
+    Refresh tokens revoked by a logout are rejected, and so are the tokens of blocked users:
+    by the block cutoff for tokens with authorization claims, by the Redis `blocked` key for
+    the others. With `ROTATE_REFRESH_TOKENS` every refresh token can be used once: it is
+    consumed in Redis and replaced by a new one, and reusing an old token revokes all tokens
+    rotated from the same login.
+
+    Authorization claims are re-read from the user row (one primary key query) before the new
+    tokens are signed, so state and privilege changes reach a session at its next refresh.
+    Tokens without authorization claims need no SQL.
+    """
+    token_class = RefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        registry = load_revocation_registry_lazy()
+        if registry.is_revoked(refresh["jti"]):
+            raise InvalidToken(_("Token is revoked"))
+        user_id = refresh[api_settings.USER_ID_CLAIM]
+        if has_authorization_claims(refresh):
+            blocked = registry.is_user_revoked(user_id, refresh[BLOCK_EPOCH_CLAIM])
+        else:
+            blocked = RedisStore().get(user_key("blocked", user_id)) is not None
+        if blocked:
+            raise InvalidToken(_("User is blocked"))
+        if has_authorization_claims(refresh):
+            self.refresh_authorization_claims(refresh, user_id)
+
+        data = {"access": str(refresh.access_token)}
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if not load_refresh_token_families_lazy().rotate(refresh):
+                raise InvalidToken(_("Token has already been used"))
+            data["refresh"] = str(refresh)
+        return data
+
+    def refresh_authorization_claims(self, refresh, user_id):
+        """
+        Replace the authorization claims of `refresh` with the current values of the user.
+
+        Raises
+        ------
+        InvalidToken
+            If the user no longer exists, is inactive or is blocked.
+        """
+        user = User.objects.filter(pk=user_id).only(
+            "pk", "state", "is_staff", "is_superuser", "is_active", "is_bocked").first()
+        if user is None or not user.is_active:
+            raise InvalidToken(_("User not found"))
+        if user.is_bocked:
+            raise InvalidToken(_("User is blocked"))
+        for claim, value in authorization_claims(user).items():
+            refresh[claim] = value
+
+
+class BatchTokenSerializer(serializers.Serializer):
+    """
+    Serializer for minting tokens for many users at once.
+
+    Attributes:
+    ----------
+    * `user_ids`: ``list``
+        Primary keys of the users to mint access/refresh pairs for, at most
+        `TOKEN_MINTING["MAX_BATCH_SIZE"]` per request.
+    """
+    user_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=settings.TOKEN_MINTING["MAX_BATCH_SIZE"],
+    )
+
+    def get_active_user_ids(self):
+        """
+        Return the requested ids that belong to active users, in request order.
+        """
+        user_ids = list(dict.fromkeys(self.validated_data["user_ids"]))
+        active = set(User.objects.filter(pk__in=user_ids, is_active=True)
+                     .values_list("pk", flat=True))
+        return [user_id for user_id in user_ids if user_id in active]
+
+    def has_privileged_users(self, user_ids):
+        """
+        Check whether any of the given users is a staff member or a superuser.
+        """
+        return User.objects.filter(Q(is_staff=True) | Q(is_superuser=True), pk__in=user_ids).exists()
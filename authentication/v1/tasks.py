@@ -0,0 +1,77 @@
+import logging
+import time
+
+from django.conf import settings
+
+import redis
+from authentication.v1.utils.otp import hash_verification_code, load_otp_adapter_lazy
+from common import metrics
+from JWTBasedAuthentication.celery import app
+from redis_service.client import get_redis_client
+from redis_service.keys import user_key
+from third_party_repository.kavenegar import KavenegarError
+
+logger = logging.getLogger(__name__)
+
+# Delivery latency is recorded under this endpoint, apart from the request latencies.
+DELIVERY_ENDPOINT = "celery.deliver_otp"
+DELIVERED_STAGE = "otp.delivery"
+FAILED_STAGE = "otp.delivery.failed"
+SENT = "sent"
+
+
+def delivery_key(user_id, verification_code):
+    # The idempotency key of one (user, code) pair; the code itself never reaches Redis.
+    digest = hash_verification_code(user_id, verification_code)[:16]
+    return f"{user_key(settings.OTP_DELIVERY['KEY_PREFIX'], user_id)}:{digest}"
+
+
+def observe_delivery(stage, seconds):
+    registry = metrics.load_metrics_registry_lazy()
+    if registry is not None:
+        registry.observe(stage, seconds, endpoint=DELIVERY_ENDPOINT)
+
+
+@app.task(bind=True, acks_late=True, ignore_result=True, max_retries=settings.OTP_DELIVERY["MAX_RETRIES"])
+def deliver_otp(self, user_id, phone_number, verification_code):
+    """
+    Send a verification code to the user by SMS.
+
+    Before sending, the task claims the idempotency key of the (user, code) pair with its
+    task id (`SET NX`); a duplicate task finds the key taken and does nothing, while the
+    retries of the claiming task recognize their own id. A sent code marks the key `SENT`,
+    so even a redelivery of the same task does not send it again. Failed attempts are
+    retried with exponential backoff.
+
+    Parameters
+    ----------
+    user_id : int
+        The primary key of the user.
+    phone_number : str
+        The normalized phone number.
+    verification_code : str
+        The plain verification code.
+    """
+    config = settings.OTP_DELIVERY
+    key = delivery_key(user_id, verification_code)
+    start = time.perf_counter()
+    try:
+        redis_client = get_redis_client()
+        if not redis_client.set(key, self.request.id, ex=config["EXPIRES_SECONDS"], nx=True) \
+                and redis_client.get(key) != self.request.id:
+            return
+        load_otp_adapter_lazy().send_otp(phone_number=phone_number, otp=verification_code)
+    except Exception as exc:
+        observe_delivery(FAILED_STAGE, time.perf_counter() - start)
+        if isinstance(exc, KavenegarError) and not exc.retryable:
+            # An invalid number or an empty account fails the same way on every attempt.
+            logger.error("OTP delivery to user %s rejected: %s", user_id, exc)
+            return
+        logger.warning("OTP delivery to user %s failed (attempt %d): %s",
+                       user_id, self.request.retries + 1, exc)
+        raise self.retry(exc=exc, countdown=min(2 ** self.request.retries, config["RETRY_BACKOFF_MAX"]))
+    observe_delivery(DELIVERED_STAGE, time.perf_counter() - start)
+    try:
+        redis_client.set(key, SENT, ex=config["EXPIRES_SECONDS"], xx=True)
+    except redis.RedisError:
+        logger.warning("Could not mark the OTP of user %s as sent", user_id)
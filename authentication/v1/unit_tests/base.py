@@ -38,6 +38,7 @@ class BaseUserUnitTestCase(APITestCase):
         anon_token = generate_token(self.client)["anon_token"]
         self.session["anon_token"] = anon_token
         self.session.save()
+        self.client.cookies[settings.ANONYMOUS_TOKEN["COOKIE_NAME"]] = anon_token
         return anon_token
 
     def get_access_token(self):
@@ -0,0 +1,86 @@
+import json
+from unittest.mock import patch
+
+from django.conf import settings
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from common import variables
+from common.utils import refresh_throttle
+
+
+class UnitTestStatelessAnonymousToken(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Set up the necessary data for all test methods in this class.
+
+        This method is called once for the test class and is typically used
+        to set up non-modifiable data or configuration that is shared among
+        all tests.
+        """
+        refresh_throttle()
+
+    def setUp(self):
+        """
+        Prepare a client without any session and fetch an anonymous token.
+        """
+        self.client = APIClient()
+        self.anonymous_token_url = "http://127.0.0.1:8000/user/v1/api/anonymous_user/generate_token/"
+        self.verification_code_url = "http://127.0.0.1:8000/user/v1/api/verification_code/get/"
+        self.payload = {
+            variables.PHONE_NUMBER: "9123456789",
+            variables.COUNTRY_CODE: "98",
+        }
+        response = self.client.get(self.anonymous_token_url)
+        self.anon_token = response.data['data']
+        self.client.cookies.clear()
+
+    def test_generate_token_sets_cookie_without_session(self):
+        """
+        Test that the anonymous token is returned as a cookie and not stored in a session.
+
+        Procedure:
+        1. Request a new anonymous token.
+        2. Ensure the response sets the anon_token cookie.
+        3. Check that no session cookie is created.
+        """
+        response = self.client.get(self.anonymous_token_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.cookies[settings.ANONYMOUS_TOKEN["COOKIE_NAME"]].value, response.data['data'])
+        self.assertNotIn(settings.SESSION_COOKIE_NAME, response.cookies)
+
+    @patch("authentication.v1.apis.login.send_otp")
+    def test_header_token_is_accepted(self, mock_send_otp):
+        """
+        Test that the anonymous token in the X-Anon-Token header grants access.
+
+        Procedure:
+        1. Send a verification code request with only the X-Anon-Token header.
+        2. Ensure the permission check passes and the user is registered.
+        """
+        response = self.client.post(
+            self.verification_code_url, data=json.dumps(self.payload), content_type='application/json',
+            headers={"X-Anon-Token": self.anon_token})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_missing_or_tampered_token_is_rejected(self):
+        """
+        Test that requests without a valid anonymous token are rejected.
+
+        Procedure:
+        1. Send a verification code request without any token.
+        2. Send the same request with a token whose signature was changed.
+        3. Ensure both responses are 401 or 403.
+        """
+        response = self.client.post(
+            self.verification_code_url, data=json.dumps(self.payload), content_type='application/json')
+        self.assertIn(response.status_code, [status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN])
+
+        tampered_token = self.anon_token[:-2] + ("AA" if not self.anon_token.endswith("AA") else "BB")
+        response = self.client.post(
+            self.verification_code_url, data=json.dumps(self.payload), content_type='application/json',
+            headers={"X-Anon-Token": tampered_token})
+        self.assertIn(response.status_code, [status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN])
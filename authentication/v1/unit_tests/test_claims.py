@@ -0,0 +1,123 @@
+import json
+import time
+from unittest import mock
+
+from rest_framework import status
+from rest_framework_simplejwt.settings import api_settings
+
+from authentication.v1.utils.claims import (BLOCK_EPOCH_CLAIM, STAFF_CLAIM,
+                                            STATE_CLAIM, authorization_claims)
+from authentication.v1.utils.revocation import load_revocation_registry_lazy
+from authentication.v1.utils.token import decode_token, generate_token
+from authentication.v1.utils.token_cache import UserSnapshot
+from common import variables
+from common.utils import refresh_throttle
+
+from .base import BaseUserUnitTestCase
+
+
+class UnitTestClaimsAuthorization(BaseUserUnitTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Set up the necessary data for all test methods in this class.
+
+        This method is called once for the test class and is typically used
+        to set up non-modifiable data or configuration that is shared among
+        all tests.
+        """
+        refresh_throttle()
+
+    def setUp(self):
+        super().setUp()
+        self.profiles_url = "http://127.0.0.1:8000/user/v1/api/profile/profiles_list/"
+
+    def test_login_token_carries_claims(self):
+        """
+        Test that access tokens carry the authorization claims of the user.
+        """
+        claims = decode_token(self.headers["Authorization"])
+        self.assertEqual(claims[STATE_CLAIM], variables.PHONE_VERIFIED)
+        self.assertFalse(claims[STAFF_CLAIM])
+        self.assertIn(BLOCK_EPOCH_CLAIM, claims)
+
+    def test_block_rejects_claims_token(self):
+        """
+        Test that blocking a user stops tokens that were authorized from claims.
+
+        Procedure:
+        1. Ensure the access token is accepted.
+        2. Block the user.
+        3. Check that the same token is rejected with 403 FORBIDDEN.
+        """
+        response = self.client.get(self.profiles_url, headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.user.block()
+        response = self.client.get(self.profiles_url, headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_block_outlives_refresh_lifetime(self):
+        """
+        Test that a block keeps rejecting the user's tokens after the refresh lifetime.
+
+        Procedure:
+        1. Issue a refresh token and block the user.
+        2. Move the clock past the refresh token lifetime and purge the revocation mirror.
+        3. Ensure the still unexpired access token is rejected with 403 FORBIDDEN.
+        4. Ensure the refresh token cannot be used with 401 UNAUTHORIZED.
+        """
+        refresh_token = str(generate_token(self.client, self.user)["refresh"])
+        self.user.block()
+        later = time.time() + api_settings.REFRESH_TOKEN_LIFETIME.total_seconds() + 3600
+        with mock.patch("authentication.v1.utils.revocation.time.time", return_value=later):
+            load_revocation_registry_lazy().revoked.purge()
+            response = self.client.get(self.profiles_url, headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        response = self.client.post("http://127.0.0.1:8000/user/v1/api/token/refresh/",
+                                    data=json.dumps({"refresh": refresh_token}),
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_refresh_rereads_claims(self):
+        """
+        Test that a privilege change reaches existing sessions at their next refresh.
+
+        Procedure:
+        1. Log in, then make the user staff in the database.
+        2. Refresh the login refresh token.
+        3. Ensure the new access and refresh tokens carry the new staff flag.
+        """
+        refresh_token = str(generate_token(self.client, self.user)["refresh"])
+        self.user.is_staff = True
+        self.user.save(update_fields=["is_staff"])
+
+        response = self.client.post("http://127.0.0.1:8000/user/v1/api/token/refresh/",
+                                    data=json.dumps({"refresh": refresh_token}),
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(decode_token(response.data["access"])[STAFF_CLAIM])
+        self.assertTrue(decode_token(response.data["refresh"])[STAFF_CLAIM])
+
+    def test_snapshot_loads_other_fields_lazily(self):
+        """
+        Test that a claims snapshot needs no query until a missing field is read.
+
+        Procedure:
+        1. Build a snapshot from the authorization claims of the user.
+        2. Ensure the authorization fields, including `is_superuser`, are read without queries.
+        3. Ensure other fields are loaded with one query.
+        """
+        claims = authorization_claims(self.user)
+        with self.assertNumQueries(0):
+            snapshot = UserSnapshot.from_claims(self.user.pk, claims)
+            self.assertTrue(snapshot.is_authenticated)
+            self.assertEqual(snapshot.state, self.user.state)
+            self.assertEqual(snapshot.is_superuser, self.user.is_superuser)
+            self.assertTrue(snapshot.is_active)
+            self.assertFalse(snapshot.is_bocked)
+        with self.assertNumQueries(1):
+            self.assertEqual(snapshot.phone_number, self.user.phone_number)
+            self.assertEqual(snapshot.created_at, self.user.created_at)
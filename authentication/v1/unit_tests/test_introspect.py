@@ -0,0 +1,84 @@
+import threading
+from unittest import mock
+
+import redis
+from rest_framework import status
+
+from authentication.v1.utils.revocation import load_revocation_registry_lazy
+from redis_service.keys import user_key
+from redis_service.utils import RedisStore
+
+from .base import BaseUserUnitTestCase
+
+
+class UnitTestIntrospect(BaseUserUnitTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.introspect_url = "http://127.0.0.1:8000/user/v1/api/introspect/"
+
+    def tearDown(self):
+        RedisStore().remove(user_key("blocked", self.user.pk))
+
+    def test_valid_token(self):
+        """
+        Test that a valid access token is allowed with a cacheable 204 NO CONTENT.
+        """
+        response = self.client.get(self.introspect_url, headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(response["X-User-Id"], str(self.user.pk))
+        self.assertIn("max-age", response["Cache-Control"])
+
+    def test_invalid_and_missing_token(self):
+        """
+        Test that a request without a token or with a tampered token gets 401 UNAUTHORIZED.
+        """
+        response = self.client.get(self.introspect_url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        response = self.client.get(self.introspect_url,
+                                   headers={"Authorization": self.headers["Authorization"][:-2]})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_blocked_user(self):
+        """
+        Test that the token of a blocked user is rejected.
+
+        Procedure:
+        1. Block the user.
+        2. Send the user's still unexpired access token.
+        3. Ensure the response is 401 UNAUTHORIZED.
+        """
+        self.user.block()
+        response = self.client.get(self.introspect_url, headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_redis_timeout(self):
+        """
+        Test that a Redis timeout answers 503 SERVICE UNAVAILABLE without caching.
+        """
+        redis_client = mock.Mock(**{"exists.side_effect": redis.TimeoutError()})
+        with mock.patch("authentication.v1.apis.introspect.get_redis_client", return_value=redis_client):
+            response = self.client.get(self.introspect_url, headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response["Cache-Control"], "no-store")
+
+    def test_redis_down_while_mirror_loads(self):
+        """
+        Test that a Redis error while the revocation mirror is loading is not a cached denial.
+
+        Procedure:
+        1. Let the revocation mirror of this process be still loading.
+        2. Let every Redis call fail.
+        3. Ensure a valid token gets 503 SERVICE UNAVAILABLE without caching.
+        """
+        registry = load_revocation_registry_lazy()
+        redis_client = mock.Mock(**{"exists.side_effect": redis.ConnectionError(),
+                                    "get.side_effect": redis.ConnectionError()})
+        with mock.patch.object(registry, "_maintain"), \
+                mock.patch.object(registry, "_loaded", threading.Event()), \
+                mock.patch("authentication.v1.utils.revocation.get_redis_client", return_value=redis_client), \
+                mock.patch("authentication.v1.apis.introspect.get_redis_client", return_value=redis_client):
+            response = self.client.get(self.introspect_url, headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response["Cache-Control"], "no-store")
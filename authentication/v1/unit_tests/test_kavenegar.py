@@ -0,0 +1,74 @@
+import json
+from unittest import mock
+
+import urllib3
+from django.test import TestCase
+
+from third_party_repository.kavenegar import KavenegarError, KavenegarSMSService
+
+
+def provider_response(status, entries=()):
+    response = mock.Mock(status=status)
+    response.json.return_value = {"return": {"status": status, "message": ""}, "entries": list(entries)}
+    return response
+
+
+class UnitTestKavenegarSMSService(TestCase):
+
+    def setUp(self):
+        self.service = KavenegarSMSService("api-key", sender="10004346", bulk_size=2)
+
+    def test_send_bulk_groups_messages(self):
+        """
+        Test that bulk sending makes one provider call per `bulk_size` messages.
+
+        Procedure:
+        1. Send three OTPs with a bulk size of two; let the second call be rejected.
+        2. Ensure two calls carried the receptors in order.
+        3. Ensure every message has a result with its status and message id.
+        """
+        messages = [("09120000001", "111111"), ("09120000002", "222222"), ("09120000003", "333333")]
+        responses = [provider_response(200, [{"messageid": 1}, {"messageid": 2}]), provider_response(418)]
+        with mock.patch.object(self.service.http, "request_encode_body", side_effect=responses) as request:
+            results = self.service.send_bulk(messages)
+
+        self.assertEqual(request.call_count, 2)
+        self.assertEqual(json.loads(request.call_args_list[0].kwargs["fields"]["receptor"]),
+                         ["09120000001", "09120000002"])
+        self.assertEqual([(r.receptor, r.status, r.message_id) for r in results],
+                         [("09120000001", 200, 1), ("09120000002", 200, 2), ("09120000003", 418, None)])
+
+    def test_send_sms_raises_structured_errors(self):
+        """
+        Test that a rejected message raises with its status and whether a retry can help.
+        """
+        with mock.patch.object(self.service.http, "request_encode_body", return_value=provider_response(411)):
+            with self.assertRaises(KavenegarError) as context:
+                self.service.send_sms("123456", "0912")
+        self.assertEqual(context.exception.status, 411)
+        self.assertFalse(context.exception.retryable)
+
+    def test_read_timeout_is_not_retryable(self):
+        """
+        Test that a read timeout is reported as not retryable, so the SMS is not sent twice.
+
+        Procedure:
+        1. Let the request fail with a read timeout wrapped in MaxRetryError, as urllib3 does.
+        2. Ensure the error has no status, is not retryable and does not quote the URL.
+        3. Ensure a connection failure stays retryable.
+        """
+        timeout = urllib3.exceptions.ReadTimeoutError(None, "/v1/api-key/sms/send.json", "timed out")
+        error = urllib3.exceptions.MaxRetryError(None, "/v1/api-key/sms/send.json", timeout)
+        with mock.patch.object(self.service.http, "request_encode_body", side_effect=error):
+            with self.assertRaises(KavenegarError) as context:
+                self.service.send_sms("123456", "0912")
+        self.assertIsNone(context.exception.status)
+        self.assertFalse(context.exception.retryable)
+        self.assertNotIn("api-key", str(context.exception))
+
+        error = urllib3.exceptions.MaxRetryError(None, "/v1/api-key/sms/send.json",
+                                                 urllib3.exceptions.NewConnectionError(None, "refused"))
+        with mock.patch.object(self.service.http, "request_encode_body", side_effect=error):
+            with self.assertRaises(KavenegarError) as context:
+                self.service.send_sms("123456", "0912")
+        self.assertTrue(context.exception.retryable)
@@ -0,0 +1,104 @@
+import jwt
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+from django.test import TestCase
+from rest_framework import status
+from rest_framework_simplejwt.exceptions import TokenBackendError
+
+from authentication.v1.utils.keyring import (EDDSA, HS256, RS256, KeyRing,
+                                             SigningKey)
+from authentication.v1.utils.token import decode_token
+
+from .base import BaseUserUnitTestCase
+
+
+class UnitTestKeyRing(TestCase):
+
+    def setUp(self):
+        """
+        Build a key ring with an active RSA key, a retired Ed25519 key and a legacy HS256 key.
+        """
+        rsa_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        ed_key = ed25519.Ed25519PrivateKey.generate()
+        self.retired = SigningKey("retired", EDDSA, ed_key, ed_key.public_key())
+        self.key_ring = KeyRing(
+            [
+                SigningKey("active", RS256, rsa_key, rsa_key.public_key()),
+                self.retired,
+                SigningKey("hs256", HS256, None, "secret"),
+            ],
+            active_kid="active",
+            legacy_kid="hs256",
+        )
+
+    def test_encode_sets_kid_and_decodes(self):
+        """
+        Test that new tokens are signed by the active key and carry its kid.
+
+        Procedure:
+        1. Encode a payload with the key ring.
+        2. Ensure the header names the active key and algorithm.
+        3. Check that decoding returns the original payload.
+        """
+        token = self.key_ring.encode({"pk": 1})
+        header = jwt.get_unverified_header(token)
+        self.assertEqual(header["kid"], "active")
+        self.assertEqual(header["alg"], RS256)
+        self.assertEqual(self.key_ring.decode(token), {"pk": 1})
+
+    def test_retired_and_legacy_keys_still_verify(self):
+        """
+        Test that tokens signed before a rotation stay valid.
+
+        Procedure:
+        1. Sign one token with the retired Ed25519 key and one legacy HS256 token without kid.
+        2. Ensure both tokens are accepted by the key ring.
+        """
+        retired_token = jwt.encode({"pk": 2}, self.retired.signing_key,
+                                   algorithm=EDDSA, headers={"kid": "retired"})
+        legacy_token = jwt.encode({"pk": 3}, "secret", algorithm=HS256)
+        self.assertEqual(self.key_ring.decode(retired_token)["pk"], 2)
+        self.assertEqual(self.key_ring.decode(legacy_token)["pk"], 3)
+
+    def test_unknown_kid_and_algorithm_confusion_are_rejected(self):
+        """
+        Test that a token must match both the kid and the algorithm of a ring key.
+
+        Procedure:
+        1. Sign a token with an unknown kid.
+        2. Sign an HS256 token that claims the kid of the RSA key.
+        3. Ensure both raise TokenBackendError.
+        """
+        unknown = jwt.encode({"pk": 1}, "secret", algorithm=HS256, headers={"kid": "missing"})
+        confused = jwt.encode({"pk": 1}, "secret", algorithm=HS256, headers={"kid": "active"})
+        with self.assertRaises(TokenBackendError):
+            self.key_ring.decode(unknown)
+        with self.assertRaises(TokenBackendError):
+            self.key_ring.decode(confused)
+
+    def test_jwks_publishes_only_public_keys(self):
+        """
+        Test that the JWKS lists the asymmetric keys and never the symmetric secret.
+        """
+        kids = [key["kid"] for key in self.key_ring.jwks()["keys"]]
+        self.assertEqual(sorted(kids), ["active", "retired"])
+
+
+class UnitTestJWKSView(BaseUserUnitTestCase):
+
+    def test_jwks_endpoint(self):
+        """
+        Test the JWKS endpoint and the kid header of issued tokens.
+
+        Procedure:
+        1. Send a GET request to /.well-known/jwks.json.
+        2. Ensure the response is 200 OK, cacheable and contains a key list.
+        3. Check that the access token issued in setUp has a kid header and decodes.
+        """
+        response = self.client.get("http://127.0.0.1:8000/.well-known/jwks.json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("max-age", response["Cache-Control"])
+        self.assertIn("keys", response.json())
+
+        access_token = self.headers["Authorization"].replace("Bearer ", "")
+        self.assertIn("kid", jwt.get_unverified_header(access_token))
+        self.assertEqual(decode_token(access_token)["pk"], self.user.pk)
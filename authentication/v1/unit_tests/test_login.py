@@ -8,12 +8,18 @@ from authentication.v1.apis import *
 from authentication.v1.serializers import *
 from common.utils import BaseTime, authenticate_user, refresh_throttle
 from common.variables import *
+from common.throttling import load_throttle_script_lazy
 from common.utils import countries_hints_dict
+from authentication.v1.utils.otp import (hash_verification_code,
+                                         load_otp_issuer_lazy)
+from redis_service.testing import RedisAssertionsMixin
+from redis_service.keys import user_key
+from redis_service.utils import RedisStore
 
 from .base import BaseUserUnitTestCase
 
 
-class UnitTestLoginView(BaseUserUnitTestCase):
+class UnitTestLoginView(RedisAssertionsMixin, BaseUserUnitTestCase):
 
     @classmethod
     def setUpTestData(cls):
@@ -50,6 +56,7 @@ class UnitTestLoginView(BaseUserUnitTestCase):
             variables.COUNTRY_CODE: self.country_code,
             variables.VERIFICATION_CODE: self.verification_code
         }
+        self.otp_hash = hash_verification_code(self.user.pk, self.verification_code)
 
     @patch("authentication.v1.serializers.LoginSerializer.get_original_otp")
     def test_login_success(self, mock_get_original_otp,):
@@ -67,7 +74,7 @@ class UnitTestLoginView(BaseUserUnitTestCase):
         5. Verify that the response message indicates the user has logged in successfully.
         """
         mock_get_original_otp.return_value = {
-            variables.VERIFICATION_CODE: self.verification_code,
+            variables.VERIFICATION_CODE: self.otp_hash,
             variables.EXPIRTION_TIME: BaseTime().timedelta(minutes=5),
         }
         response = self.client.post(self.url, data=json.dumps(
@@ -77,6 +84,65 @@ class UnitTestLoginView(BaseUserUnitTestCase):
         self.assertIn(variables.REFRESH_TOKEN, response.data['data'])
         self.assertEqual(response.data['message'], variables.USER_LOGGED_IN)
 
+    def test_login_budget(self):
+        """
+        Test the SQL and Redis budget of a login.
+
+        Procedure:
+        1. Store a valid OTP for the pending user in Redis and load the throttle and OTP
+           scripts.
+        2. Log in while counting queries and Redis commands.
+        3. Ensure the login costs one user fetch and one state update, and one throttle
+           check and one script call that consumes the OTP.
+        4. Log in again as the now verified user and ensure the state is not written again.
+        """
+        otp_key = user_key(variables.VERIFICATION_CODE, self.user.pk)
+        otp_entry = {
+            variables.VERIFICATION_CODE: self.otp_hash,
+            variables.EXPIRTION_TIME: BaseTime().timedelta(minutes=5),
+        }
+        load_throttle_script_lazy()
+        load_otp_issuer_lazy()
+        RedisStore().set(otp_key, otp_entry, 2)
+        with self.assertNumQueries(2), self.assertMaxRedisCommands(2) as commands:
+            response = self.client.post(self.url, data=json.dumps(
+                self.valid_payload), content_type='application/json')
+        self.assertEqual(response.data['message'], variables.USER_LOGGED_IN)
+        self.assertEqual(commands, ["EVALSHA", "EVALSHA"])
+        self.assertIsNone(RedisStore().get(otp_key))
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.state, variables.PHONE_VERIFIED)
+
+        RedisStore().set(otp_key, otp_entry, 2)
+        with self.assertNumQueries(1), self.assertMaxRedisCommands(2):
+            response = self.client.post(self.url, data=json.dumps(
+                self.valid_payload), content_type='application/json')
+        self.assertEqual(response.data['message'], variables.USER_LOGGED_IN)
+
+    def test_wrong_otp_keeps_stored_otp(self):
+        """
+        Test that a wrong code does not consume the OTP of the user.
+
+        Procedure:
+        1. Store a valid OTP for the user in Redis.
+        2. Log in with a wrong code and ensure it is rejected.
+        3. Ensure the OTP is still stored and logging in with the right code succeeds.
+        """
+        otp_key = user_key(variables.VERIFICATION_CODE, self.user.pk)
+        RedisStore().set(otp_key, {
+            variables.VERIFICATION_CODE: self.otp_hash,
+            variables.EXPIRTION_TIME: BaseTime().timedelta(minutes=5),
+        }, 2)
+        response = self.client.post(self.url, data=json.dumps(
+            {**self.valid_payload, variables.VERIFICATION_CODE: "654321"}), content_type='application/json')
+        self.assertEqual(response.data['message'], variables.INVALID_OTP)
+        self.assertIsNotNone(RedisStore().get(otp_key))
+
+        response = self.client.post(self.url, data=json.dumps(
+            self.valid_payload), content_type='application/json')
+        self.assertEqual(response.data['message'], variables.USER_LOGGED_IN)
+        self.assertIsNone(RedisStore().get(otp_key))
+
     def test_login_without_any_verification_code_in_redis(self):
         """
         Test the login process when no verification code is found in Redis.
@@ -121,7 +187,7 @@ class UnitTestLoginView(BaseUserUnitTestCase):
         """
         mock_get_original_otp.return_value = {
             # here is the valid verification code
-            variables.VERIFICATION_CODE: self.verification_code,
+            variables.VERIFICATION_CODE: self.otp_hash,
             variables.EXPIRTION_TIME: BaseTime().timedelta(minutes=5),
         }
         invalid_verification_code = "654321"
@@ -195,7 +261,7 @@ class UnitTestLoginView(BaseUserUnitTestCase):
         5. Confirm that the business status code reflects invalid login credentials.
         """
         mock_get_original_otp.return_value = {
-            variables.VERIFICATION_CODE: self.verification_code,
+            variables.VERIFICATION_CODE: self.otp_hash,
             variables.EXPIRTION_TIME: BaseTime.now() - BaseTime.timedelta(minutes=1),
         }
         response = self.client.post(self.url, data=json.dumps(
@@ -276,7 +342,7 @@ class UnitTestLoginView(BaseUserUnitTestCase):
         """
         mock_redis_get.side_effect = redis.ConnectionError
         mock_get_original_otp.return_value = {
-            variables.VERIFICATION_CODE: self.verification_code,
+            variables.VERIFICATION_CODE: self.otp_hash,
             variables.EXPIRTION_TIME: BaseTime().timedelta(minutes=5),
         }
         response = self.client.post(self.url, data=json.dumps(
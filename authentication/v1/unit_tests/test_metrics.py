@@ -0,0 +1,118 @@
+from unittest import mock
+
+from django.conf import settings
+from django.test import TestCase
+from rest_framework import status
+
+from common import metrics
+from common.metrics import NULL_TIMER, MetricsRegistry, stage_timer
+from common.utils import refresh_throttle
+from redis_service.testing import capture_redis_commands
+from redis_service.utils import RedisStore
+
+from .base import BaseUserUnitTestCase
+
+
+class UnitTestMetricsRegistry(TestCase):
+
+    def test_render_prometheus_histogram(self):
+        """
+        Test the Prometheus text output of a histogram.
+
+        Procedure:
+        1. Record two observations of one stage of one endpoint.
+        2. Ensure the buckets are cumulative and the sum and count lines are present.
+        """
+        registry = MetricsRegistry(buckets=(0.01, 0.1))
+        registry.observe("redis", 0.005, endpoint="user/v1/api/login/")
+        registry.observe("redis", 0.05, endpoint="user/v1/api/login/")
+        output = registry.render()
+        labels = 'endpoint="user/v1/api/login/",stage="redis"'
+        self.assertIn(f'auth_stage_duration_seconds_bucket{{{labels},le="0.01"}} 1', output)
+        self.assertIn(f'auth_stage_duration_seconds_bucket{{{labels},le="0.1"}} 2', output)
+        self.assertIn(f'auth_stage_duration_seconds_bucket{{{labels},le="+Inf"}} 2', output)
+        self.assertIn(f'auth_stage_duration_seconds_count{{{labels}}} 2', output)
+
+    def test_redis_commands_and_value_sizes(self):
+        """
+        Test that RedisStore calls are recorded per command, as value sizes and by the test helper.
+
+        Procedure:
+        1. Enable a fresh registry and write then consume a value.
+        2. Ensure each command has its own latency histogram and the value size is recorded
+           under its key prefix.
+        3. Ensure the captured commands list one entry per round trip.
+        """
+        registry = MetricsRegistry()
+        size_registry = MetricsRegistry("redis_value_size_bytes", (64, 1024), label="prefix")
+        with mock.patch.multiple(metrics, metrics_registry=registry, size_registry=size_registry,
+                                 _metrics_loaded=True):
+            with capture_redis_commands() as commands:
+                RedisStore().set("test_metrics:a", {"count": 1}, 1)
+                RedisStore().get_and_delete("test_metrics:a")
+        self.assertEqual(commands, ["SET", "GETDEL"])
+        output = registry.render()
+        self.assertIn('stage="redis.set"', output)
+        self.assertIn('stage="redis.getdel"', output)
+        self.assertIn('redis_value_size_bytes_bucket{endpoint="unresolved",prefix="test_metrics",le="64"} 1',
+                      size_registry.render())
+
+    def test_disabled_timer_is_noop(self):
+        """
+        Test that a disabled registry hands out the shared no-op timer.
+        """
+        with mock.patch.multiple(metrics, metrics_registry=None, _metrics_loaded=True):
+            self.assertIs(stage_timer("redis"), NULL_TIMER)
+
+
+class UnitTestMetricsEndpoint(BaseUserUnitTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Set up the necessary data for all test methods in this class.
+
+        This method is called once for the test class and is typically used
+        to set up non-modifiable data or configuration that is shared among
+        all tests.
+        """
+        refresh_throttle()
+
+    def test_stages_are_recorded_per_endpoint(self):
+        """
+        Test that an authenticated request records its stages and /metrics serves them.
+
+        Procedure:
+        1. Enable a fresh registry before the first request loads the middleware.
+        2. Send a GET request to the profiles endpoint.
+        3. Ensure /metrics lists the authentication, permission and request stages of the route.
+        """
+        registry = MetricsRegistry()
+        with mock.patch.multiple(metrics, metrics_registry=registry, _metrics_loaded=True):
+            response = self.client.get("http://127.0.0.1:8000/user/v1/api/profile/profiles_list/",
+                                       headers=self.headers)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+            response = self.client.get("http://127.0.0.1:8000/metrics")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            output = response.content.decode()
+            for stage in ["authentication", "permission.is_not_blocked", "request"]:
+                self.assertIn(f'stage="{stage}"', output)
+            self.assertIn("profiles_list", output)
+
+    def test_metrics_need_allowed_address_or_token(self):
+        """
+        Test that /metrics is refused to other addresses unless they send the metrics token.
+        """
+        with mock.patch.multiple(metrics, metrics_registry=MetricsRegistry(), _metrics_loaded=True), \
+                self.settings(METRICS={**settings.METRICS, "TOKEN": "scrape-token"}):
+            response = self.client.get("http://127.0.0.1:8000/metrics", REMOTE_ADDR="10.0.0.5")
+            self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+            response = self.client.get("http://127.0.0.1:8000/metrics", REMOTE_ADDR="10.0.0.5",
+                                       headers={"Authorization": "Bearer scrape-token"})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+            response = self.client.get("http://127.0.0.1:8000/metrics", REMOTE_ADDR="10.0.0.5",
+                                       headers={"Authorization": "Bearer scrape-tokén"})
+            self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,51 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from authentication.models import User
+from authentication.v1.tasks import deliver_otp, delivery_key
+from redis_service.utils import RedisStore
+from third_party_repository.kavenegar import KavenegarError
+
+
+class UnitTestOTPDelivery(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(phone_number="00989121110001")
+        self.args = (self.user.pk, self.user.phone_number, "123456")
+        self.adapter = mock.Mock()
+        patcher = mock.patch("authentication.v1.tasks.load_otp_adapter_lazy", return_value=self.adapter)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        RedisStore().remove(delivery_key(self.user.pk, "123456"))
+
+    def test_code_is_delivered_once(self):
+        """
+        Test that a duplicate task for the same user and code sends nothing.
+        """
+        deliver_otp.apply(self.args)
+        deliver_otp.apply(self.args)
+        self.adapter.send_otp.assert_called_once_with(phone_number=self.user.phone_number, otp="123456")
+
+    def test_failed_delivery_is_retried(self):
+        """
+        Test that a provider error is retried by the task that claimed the code.
+
+        Procedure:
+        1. Let the first send fail.
+        2. Run the task eagerly; its retry runs in place.
+        3. Ensure the code was sent on the second attempt.
+        """
+        self.adapter.send_otp.side_effect = [KavenegarError(502, "Bad Gateway"), None]
+        deliver_otp.apply(self.args)
+        self.assertEqual(self.adapter.send_otp.call_count, 2)
+
+    def test_rejected_delivery_is_not_retried(self):
+        """
+        Test that a permanent provider error, such as an invalid receptor, is not retried.
+        """
+        self.adapter.send_otp.side_effect = KavenegarError(411, "Invalid receptor")
+        deliver_otp.apply(self.args)
+        self.adapter.send_otp.assert_called_once()
@@ -0,0 +1,93 @@
+from unittest import mock
+
+from django.test import TestCase
+
+import urllib3
+
+from authentication.v1.utils.otp_gateway import (SMS, FakeProvider,
+                                                 KavenegarProvider, OTPGateway,
+                                                 ProviderStats)
+from third_party_repository.kavenegar import (KavenegarError,
+                                              KavenegarSMSService)
+
+
+class UnitTestOTPGateway(TestCase):
+
+    def setUp(self):
+        self.gateway = OTPGateway(window_seconds=60, min_samples=3, max_error_rate=0.2)
+        self.slow = FakeProvider("slow", SMS, latency_seconds=0.005)
+        self.fast = FakeProvider("fast", SMS, latency_seconds=0.0)
+        self.broken = FakeProvider("broken", SMS, error_rate=1.0)
+        for provider in [self.slow, self.fast, self.broken]:
+            self.gateway.register(provider)
+
+    def test_routes_to_fastest_healthy_provider(self):
+        """
+        Test that sends settle on the fastest provider and fail over from a broken one.
+
+        Procedure:
+        1. Send enough OTPs for every provider to leave the exploration phase.
+        2. Ensure every OTP was sent, none by the broken provider.
+        3. Ensure the fast provider is ranked first and the broken one last.
+        """
+        for index in range(30):
+            self.assertTrue(self.gateway.send(SMS, "09120000000", str(index)).ok)
+        self.assertEqual(len(self.fast.outbox) + len(self.slow.outbox), 30)
+        self.assertGreater(len(self.fast.outbox), len(self.slow.outbox))
+        self.assertEqual(self.gateway.ranked(SMS), [self.fast, self.slow, self.broken])
+        self.assertEqual(self.gateway.stats()["broken"]["error_rate"], 1.0)
+
+    def test_all_providers_failing(self):
+        gateway = OTPGateway()
+        gateway.register(FakeProvider("broken", SMS, error_rate=1.0))
+        with self.assertRaises(ConnectionError):
+            gateway.send(SMS, "09120000000", "123456")
+
+    def test_non_retryable_error_is_not_failed_over(self):
+        """
+        Test that an error a retry cannot fix is raised at once.
+
+        Procedure:
+        1. Let the first ranked provider reject the receptor with Kavenegar status 411.
+        2. Ensure the error is raised and no other provider sent the OTP.
+        3. Ensure the rejection is not counted against the provider.
+        """
+        gateway = OTPGateway()
+        invalid = FakeProvider("invalid", SMS)
+        gateway.register(invalid)
+        gateway.register(self.fast)
+        with mock.patch.object(invalid, "send", side_effect=KavenegarError(411, "invalid receptor")):
+            with self.assertRaises(KavenegarError):
+                gateway.send(SMS, "0912", "123456")
+        self.assertEqual(len(self.fast.outbox), 0)
+        self.assertEqual(gateway.stats()["invalid"]["samples"], 0)
+
+    def test_stats_keep_latest_samples(self):
+        stats = ProviderStats(window_seconds=60, max_samples=3)
+        for seconds in [0.4, 0.3, 0.2, 0.1]:
+            stats.record(seconds, True)
+        snapshot = stats.snapshot()
+        self.assertEqual(snapshot["samples"], 3)
+        self.assertEqual(snapshot["p50"], 0.2)
+
+    def test_bulk_read_timeout_is_not_failed_over(self):
+        """
+        Test that messages of a bulk request that timed out are not sent by another provider.
+
+        Procedure:
+        1. Let Kavenegar time out reading the response of a `sendarray` call.
+        2. Send two messages through the gateway with a fallback provider.
+        3. Ensure neither message reached the fallback and the timeout is not counted
+           against Kavenegar.
+        """
+        gateway = OTPGateway()
+        kavenegar = KavenegarProvider("kavenegar", KavenegarSMSService("api-key", sender="10004346"))
+        gateway.register(kavenegar)
+        gateway.register(self.fast)
+        timeout = urllib3.exceptions.MaxRetryError(
+            None, "/", urllib3.exceptions.ReadTimeoutError(None, "/", "timed out"))
+        with mock.patch.object(kavenegar.service.http, "request_encode_body", side_effect=timeout):
+            results = gateway.send_many(SMS, [("09120000001", "111111"), ("09120000002", "222222")])
+        self.assertEqual([(result.ok, result.retryable) for result in results], [(False, False)] * 2)
+        self.assertEqual(len(self.fast.outbox), 0)
+        self.assertEqual(gateway.stats()["kavenegar"]["error_rate"], 0.0)
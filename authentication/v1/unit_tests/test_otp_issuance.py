@@ -0,0 +1,60 @@
+from django.test import TestCase
+
+from authentication.models import User
+from authentication.v1.utils.otp import (OTP_ISSUED, OTP_PENDING,
+                                         OTP_QUOTA_EXCEEDED, OTPIssuer,
+                                         verification_code_matches)
+from common import variables
+from redis_service.client import get_redis_client
+from redis_service.testing import capture_redis_commands
+from redis_service.utils import RedisStore
+
+
+class UnitTestOTPIssuer(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(phone_number="00989121110000")
+        self.issuer = OTPIssuer(get_redis_client(decode_responses=False), cooldown=60,
+                                max_per_window=2, window=3600, counter_key_prefix="test_otp_issued")
+        self.otp_key, self.counter_key = self.issuer.keys(self.user)
+
+    def tearDown(self):
+        RedisStore().remove(self.otp_key)
+        RedisStore().remove(self.counter_key)
+
+    def test_issue_stores_hashed_code_in_one_round_trip(self):
+        """
+        Test that issuing stores only the hash of the code, with the cooldown as TTL.
+
+        Procedure:
+        1. Issue a code while recording Redis commands.
+        2. Ensure one script call was made and the stored entry does not contain the code.
+        3. Ensure the stored hash matches the code.
+        """
+        with capture_redis_commands() as commands:
+            self.assertEqual(self.issuer.issue(self.user, "123456", 0), OTP_ISSUED)
+        self.assertEqual(commands, ["EVALSHA"])
+
+        entry = RedisStore().get(self.otp_key)
+        self.assertNotEqual(entry[variables.VERIFICATION_CODE], "123456")
+        self.assertTrue(verification_code_matches(self.user.pk, "123456", entry[variables.VERIFICATION_CODE]))
+        self.assertFalse(verification_code_matches(self.user.pk, "654321", entry[variables.VERIFICATION_CODE]))
+        self.assertLessEqual(get_redis_client().ttl(self.otp_key), 60)
+
+    def test_cooldown_and_quota(self):
+        """
+        Test that a pending code blocks a new one and the window quota is enforced.
+
+        Procedure:
+        1. Issue a code and ensure a second request is refused as pending.
+        2. Consume the code, issue again, and consume it.
+        3. Ensure the third code of the window is refused.
+        """
+        self.assertEqual(self.issuer.issue(self.user, "111111", 0), OTP_ISSUED)
+        self.assertEqual(self.issuer.issue(self.user, "222222", 0), OTP_PENDING)
+
+        RedisStore().remove(self.otp_key)
+        self.assertEqual(self.issuer.issue(self.user, "333333", 0), OTP_ISSUED)
+        RedisStore().remove(self.otp_key)
+        self.assertEqual(self.issuer.issue(self.user, "444444", 0), OTP_QUOTA_EXCEEDED)
+        self.assertIsNone(RedisStore().get(self.otp_key))
@@ -0,0 +1,246 @@
+import asyncio
+from unittest import mock
+
+from django.conf import settings
+from django.test import TestCase
+from redis.crc import key_slot
+
+import redis
+from redis_service import client
+from redis_service.breaker import CLOSED, OPEN, CircuitBreaker, CircuitOpenError
+from redis_service.client import (build_redis_client, get_async_redis_client,
+                                  get_redis_client)
+from redis_service.codecs import ValueCodec
+from redis_service.keys import user_key
+from redis_service.utils import AsyncRedisStore, RedisStore
+
+
+class UnitTestRedisClient(TestCase):
+
+    def test_pool_is_bounded_and_timeout_aware(self):
+        """
+        Test that the client is built from the REDIS settings.
+        """
+        redis_client = build_redis_client(settings.REDIS)
+        pool = redis_client.connection_pool
+        self.assertEqual(pool.max_connections, settings.REDIS["MAX_CONNECTIONS"])
+        self.assertEqual(pool.connection_kwargs["socket_timeout"], settings.REDIS["SOCKET_TIMEOUT"])
+        self.assertEqual(pool.connection_kwargs["socket_connect_timeout"],
+                         settings.REDIS["SOCKET_CONNECT_TIMEOUT"])
+        self.assertEqual(pool.connection_kwargs["health_check_interval"],
+                         settings.REDIS["HEALTH_CHECK_INTERVAL"])
+
+    def test_client_is_shared_per_process(self):
+        """
+        Test that a process reuses one client and a forked process builds its own.
+
+        Procedure:
+        1. Ensure RedisStore instances share the client of the process.
+        2. Pretend the process was forked by changing the pid.
+        3. Ensure a new client is built for the child.
+        """
+        parent_client = get_redis_client(decode_responses=False)
+        self.assertIs(RedisStore().redis_client, parent_client)
+        self.assertIs(RedisStore().redis_client, parent_client)
+
+        with mock.patch.object(client.os, "getpid", return_value=-1):
+            child_client = get_redis_client(decode_responses=False)
+        self.assertIsNot(child_client, parent_client)
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            build_redis_client({**settings.REDIS, "MODE": "replica"})
+
+    def test_user_keys_share_a_cluster_slot(self):
+        """
+        Test that all keys of one user hash to the same Redis Cluster slot.
+        """
+        self.assertEqual(user_key("blocked", 42), "blocked:{u:42}")
+        slots = {key_slot(user_key(prefix, 42).encode())
+                 for prefix in ["verification_code", "otp_issued", "personal_info", "blocked"]}
+        self.assertEqual(len(slots), 1)
+
+
+class UnitTestCircuitBreaker(TestCase):
+
+    def setUp(self):
+        self.probe = mock.Mock(return_value=False)
+        self.breaker = CircuitBreaker(failure_threshold=2, reset_seconds=60, probe=self.probe)
+
+    def fail(self):
+        with self.assertRaises(redis.ConnectionError):
+            with self.breaker:
+                raise redis.ConnectionError
+
+    def test_opens_and_fails_fast(self):
+        """
+        Test that consecutive connection errors open the circuit.
+
+        Procedure:
+        1. Fail once, succeed, then fail twice.
+        2. Ensure only the consecutive failures opened the circuit.
+        3. Ensure the next call raises CircuitOpenError without running its body or the probe.
+        """
+        self.fail()
+        with self.breaker:
+            pass
+        self.fail()
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.fail()
+        self.assertEqual(self.breaker.state, OPEN)
+
+        body = mock.Mock()
+        with self.assertRaises(CircuitOpenError):
+            with self.breaker:
+                body()
+        body.assert_not_called()
+        self.probe.assert_not_called()
+
+    def test_half_open_probe(self):
+        """
+        Test that after the reset time a health check decides whether the circuit closes.
+
+        Procedure:
+        1. Open the circuit and let the reset time pass.
+        2. Ensure a failed probe keeps it open.
+        3. Let the reset time pass again; ensure a healthy probe closes it and the call runs.
+        """
+        self.fail()
+        self.fail()
+        self.breaker.opened_at -= 61
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_call()
+        self.assertEqual(self.breaker.state, OPEN)
+
+        self.breaker.opened_at -= 61
+        self.probe.return_value = True
+        with self.breaker:
+            pass
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.assertEqual(self.probe.call_count, 2)
+
+
+class UnitTestRedisStore(TestCase):
+
+    def setUp(self):
+        self.store = RedisStore()
+        self.keys = ["test_store:a", "test_store:b", "test_store:missing"]
+
+    def tearDown(self):
+        for key in self.keys:
+            self.store.remove(key)
+
+    def test_set_many_and_get_many(self):
+        """
+        Test that batched writes and reads keep the value encoding of `set` and `get`.
+        """
+        self.store.set_many({"test_store:a": {"count": 1}, "test_store:b": "plain"}, 1)
+        self.assertEqual(self.store.get_many(self.keys), [{"count": 1}, "plain", None])
+        self.assertLessEqual(self.store.redis_client.ttl("test_store:a"), 60)
+
+    def test_set_only_if_absent(self):
+        """
+        Test that `only_if_absent` does not overwrite a pending value.
+        """
+        self.assertTrue(self.store.set("test_store:a", "first", 1, only_if_absent=True))
+        self.assertFalse(self.store.set("test_store:a", "second", 1, only_if_absent=True))
+        self.assertEqual(self.store.get("test_store:a"), "first")
+
+    def test_get_and_delete(self):
+        """
+        Test that a value can be consumed only once.
+        """
+        self.store.set("test_store:a", {"otp": "123456"}, 1)
+        self.assertEqual(self.store.get_and_delete("test_store:a"), {"otp": "123456"})
+        self.assertIsNone(self.store.get_and_delete("test_store:a"))
+
+    def test_pipeline(self):
+        """
+        Test that a pipeline returns the decoded replies in order and sends nothing on error.
+
+        Procedure:
+        1. Queue a write, a read and a consume in one pipeline.
+        2. Ensure the results match the queued commands.
+        3. Raise inside a second pipeline and ensure its write was not sent.
+        """
+        with self.store.pipeline() as pipe:
+            pipe.set("test_store:a", {"count": 1}, 1)
+            pipe.get("test_store:a")
+            pipe.get_and_delete("test_store:a")
+        self.assertEqual(pipe.results, [True, {"count": 1}, {"count": 1}])
+
+        with self.assertRaises(ValueError):
+            with self.store.pipeline() as pipe:
+                pipe.set("test_store:b", "value", 1)
+                raise ValueError
+        self.assertIsNone(self.store.get("test_store:b"))
+
+
+class UnitTestAsyncRedisStore(TestCase):
+
+    def tearDown(self):
+        RedisStore().remove("test_store:a")
+
+    async def test_shares_values_with_redis_store(self):
+        """
+        Test that the async store reads and consumes values written by `RedisStore`.
+
+        Procedure:
+        1. Write a value with the sync store.
+        2. Read it with the async store, then consume it in an async pipeline.
+        3. Ensure the value is gone.
+        """
+        await asyncio.to_thread(RedisStore().set, "test_store:a", {"count": 1}, 1)
+        store = AsyncRedisStore()
+        self.assertEqual(await store.get("test_store:a"), {"count": 1})
+        async with store.pipeline() as pipe:
+            pipe.get_and_delete("test_store:a")
+        self.assertEqual(pipe.results, [{"count": 1}])
+        self.assertIsNone(await store.get("test_store:a"))
+
+    def test_client_per_event_loop(self):
+        """
+        Test that every event loop gets its own client and a loop reuses its client.
+        """
+        async def clients():
+            return get_async_redis_client(), get_async_redis_client()
+
+        first, again = asyncio.run(clients())
+        other, _ = asyncio.run(clients())
+        self.assertIs(first, again)
+        self.assertIsNot(first, other)
+
+
+class UnitTestValueCodec(TestCase):
+
+    def setUp(self):
+        self.value = {"verification_code": "123456", "expirtion_time": 1718000000, "count": 0}
+
+    def test_round_trip(self):
+        """
+        Test that both codecs return what they stored, behind their own header.
+        """
+        for name in ["orjson", "msgpack"]:
+            codec = ValueCodec(name)
+            payload = codec.encode(self.value)
+            self.assertEqual(payload[:1], codec.header)
+            self.assertEqual(codec.decode(payload), self.value)
+            self.assertEqual(codec.decode(codec.encode("plain")), "plain")
+
+    def test_reads_other_codec_and_legacy_values(self):
+        """
+        Test that values written before a codec change remain readable.
+
+        Procedure:
+        1. Ensure an orjson codec reads a msgpack value.
+        2. Ensure legacy JSON objects and plain strings are read as before.
+        """
+        self.assertEqual(ValueCodec("orjson").decode(ValueCodec("msgpack").encode(self.value)), self.value)
+        codec = ValueCodec("orjson")
+        self.assertEqual(codec.decode(b'{"count": 1}'), {"count": 1})
+        self.assertEqual(codec.decode(b"123456"), "123456")
+        self.assertIsNone(codec.decode(None))
+
+    def test_unknown_codec(self):
+        with self.assertRaises(ValueError):
+            ValueCodec("pickle")
@@ -0,0 +1,40 @@
+import json
+from io import StringIO
+
+from django.core.management import call_command
+
+from redis_service.keys import user_key
+from redis_service.utils import RedisStore
+
+from .base import BaseUserUnitTestCase
+
+
+class UnitTestAnalyzeRedisKeys(BaseUserUnitTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.prefix = "test_keyspace"
+        self.keys = [user_key(self.prefix, self.user.pk), user_key(self.prefix, self.user.pk + 1000)]
+
+    def tearDown(self):
+        for key in self.keys:
+            RedisStore().remove(key)
+
+    def test_report(self):
+        """
+        Test the JSON report of one keyspace.
+
+        Procedure:
+        1. Store a key of the test user and one of a user that does not exist.
+        2. Run the command for the prefix.
+        3. Ensure both keys are counted with their size and TTL and one is reported orphaned.
+        """
+        for key in self.keys:
+            RedisStore().set(key, {"count": 1}, 5)
+        output = StringIO()
+        call_command("analyze_redis_keys", prefixes=[self.prefix], stdout=output)
+        stats = json.loads(output.getvalue())[self.prefix]
+        self.assertEqual(stats["keys"], 2)
+        self.assertGreater(stats["bytes"], 0)
+        self.assertEqual(stats["ttl_seconds"]["600"], 2)
+        self.assertEqual(stats["orphaned_keys"], 1)
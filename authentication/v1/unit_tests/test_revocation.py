@@ -0,0 +1,135 @@
+import json
+import os
+import time
+import uuid
+from unittest import mock
+
+import redis
+from django.test import TestCase
+from rest_framework import status
+
+from authentication.v1.utils.revocation import RevocationRegistry, RevokedTokenSet
+from common import variables
+from common.utils import refresh_throttle
+from redis_service.client import get_redis_client
+
+from .base import BaseUserUnitTestCase
+
+
+class UnitTestRevokedTokenSet(TestCase):
+
+    def test_membership_and_purge(self):
+        """
+        Test the in-memory revocation mirror.
+
+        Procedure:
+        1. Add one token that expires in a day and one that expired two hours ago.
+        2. Ensure both are reported as revoked and an unknown id is not.
+        3. Purge the set and check that only the expired id was dropped.
+        """
+        revoked = RevokedTokenSet(capacity=10)
+        active, expired = uuid.uuid4().hex, uuid.uuid4().hex
+        revoked.add(active, time.time() + 24 * 3600)
+        revoked.add(expired, time.time() - 2 * 3600)
+        self.assertTrue(revoked.is_revoked(active))
+        self.assertTrue(revoked.is_revoked(expired))
+        self.assertFalse(revoked.is_revoked(uuid.uuid4().hex))
+
+        self.assertEqual(revoked.purge(), 1)
+        self.assertTrue(revoked.is_revoked(active))
+        self.assertFalse(revoked.is_revoked(expired))
+
+    def test_grows_past_capacity(self):
+        """
+        Test that the Bloom filter is rebuilt when more ids than its capacity are added.
+        """
+        revoked = RevokedTokenSet(capacity=2)
+        ids = [uuid.uuid4().hex for _ in range(5)]
+        for jti in ids:
+            revoked.add(jti, time.time() + 3600)
+        self.assertGreaterEqual(revoked.bloom.capacity, 5)
+        self.assertTrue(all(revoked.is_revoked(jti) for jti in ids))
+
+
+class UnitTestRevocationRegistry(TestCase):
+
+    def setUp(self):
+        self.registry = RevocationRegistry("test_revoked", "test_revoked_tokens", 10, 0.001, 60)
+        # Pretend the mirror of this process is still loading.
+        self.registry._pid = os.getpid()
+        self.jti = uuid.uuid4().hex
+
+    def tearDown(self):
+        get_redis_client().delete(f"test_revoked:{self.jti}")
+
+    def test_checks_redis_until_loaded(self):
+        """
+        Test that a revocation missing from a mirror that is still loading is found in Redis.
+
+        Procedure:
+        1. Store a revocation in Redis only.
+        2. Ensure the registry reports it while its mirror is not loaded.
+        3. Mark the mirror loaded and ensure it is answered from the (empty) mirror.
+        """
+        get_redis_client().set(f"test_revoked:{self.jti}", int(time.time()) + 60, ex=60)
+        self.assertTrue(self.registry.is_revoked(self.jti))
+        self.assertFalse(self.registry.is_revoked(uuid.uuid4().hex))
+
+        self.registry._loaded.set()
+        self.assertFalse(self.registry.is_revoked(self.jti))
+
+    def test_denies_until_loaded_when_redis_is_down(self):
+        """
+        Test that tokens are treated as revoked while neither the mirror nor Redis can answer.
+        """
+        redis_client = mock.Mock(**{"exists.side_effect": redis.ConnectionError()})
+        with mock.patch("authentication.v1.utils.revocation.get_redis_client", return_value=redis_client):
+            self.assertTrue(self.registry.is_revoked(self.jti))
+
+    def test_resolves_client_after_fork(self):
+        """
+        Test that the registry uses the client of the current process, not a client it was built with.
+        """
+        child_client = mock.Mock(**{"exists.return_value": 1})
+        with mock.patch("authentication.v1.utils.revocation.get_redis_client", return_value=child_client):
+            self.assertTrue(self.registry.is_revoked(self.jti))
+        child_client.exists.assert_called_once_with(f"test_revoked:{self.jti}")
+
+
+class UnitTestLogout(BaseUserUnitTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Set up the necessary data for all test methods in this class.
+
+        This method is called once for the test class and is typically used
+        to set up non-modifiable data or configuration that is shared among
+        all tests.
+        """
+        refresh_throttle()
+
+    def setUp(self):
+        super().setUp()
+        self.logout_url = "http://127.0.0.1:8000/user/v1/api/logout/"
+        self.profiles_url = "http://127.0.0.1:8000/user/v1/api/profile/profiles_list/"
+
+    def test_logout_revokes_access_token(self):
+        """
+        Test that an access token cannot be used after logout.
+
+        Procedure:
+        1. Ensure the access token works on an authenticated endpoint.
+        2. Log out with the same token.
+        3. Check that the next request with the token is rejected with 401 UNAUTHORIZED.
+        """
+        response = self.client.get(self.profiles_url, headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.post(self.logout_url, data=json.dumps({}),
+                                    content_type='application/json', headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['message'], variables.USER_LOGGED_OUT)
+
+        response = self.client.get(self.profiles_url, headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -0,0 +1,69 @@
+from unittest import mock
+
+import redis
+from django.test import TestCase
+from rest_framework.parsers import JSONParser
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from common.throttling import ScopedRedisRateThrottle
+from redis_service.testing import capture_redis_commands
+from redis_service.utils import RedisStore
+
+
+class UnitTestRedisRateThrottle(TestCase):
+
+    def setUp(self):
+        self.throttle = ScopedRedisRateThrottle()
+        self.throttle.RATES = {"test_otp": {"ip": "100/min", "phone_number": "2/min"}}
+        self.view = mock.Mock(throttle_scope="test_otp")
+
+    def tearDown(self):
+        for key in self.throttle.keys("test_otp", self.request("09121110001"))[0]:
+            RedisStore().remove(key)
+
+    def request(self, phone_number):
+        request = APIRequestFactory().post(
+            "/", {"phone_number": phone_number, "country_code": "+98"}, format="json")
+        return Request(request, parsers=[JSONParser()])
+
+    def test_phone_number_limit(self):
+        """
+        Test that the phone number limit holds however the number is written.
+
+        Procedure:
+        1. Spend the burst of two requests, with and without the leading zero.
+        2. Ensure the third request is rejected with a wait time, although the IP limit
+           is far from exhausted.
+        3. Ensure each check is one Redis round trip.
+        """
+        with capture_redis_commands() as commands:
+            self.assertTrue(self.throttle.allow_request(self.request("09121110001"), self.view))
+            self.assertTrue(self.throttle.allow_request(self.request("9121110001"), self.view))
+            self.assertFalse(self.throttle.allow_request(self.request("09121110001"), self.view))
+        self.assertEqual(commands, ["EVALSHA"] * 3)
+        self.assertGreater(self.throttle.wait(), 0)
+
+    def test_redis_outage_allows_requests(self):
+        """
+        Test that requests are let through while Redis is unavailable.
+        """
+        with mock.patch("common.throttling.load_throttle_script_lazy",
+                        side_effect=redis.ConnectionError("down")):
+            self.assertTrue(self.throttle.allow_request(self.request("09121110001"), self.view))
+
+    def test_forwarded_for_cannot_be_spoofed(self):
+        """
+        Test that the IP key is the address added by nginx, not one sent by the client.
+
+        Procedure:
+        1. Send two requests whose X-Forwarded-For header starts with different client-supplied
+           addresses and ends with the address appended by nginx.
+        2. Ensure both get the IP key of the nginx-appended address.
+        """
+        idents = []
+        for spoofed in ["1.2.3.4", "5.6.7.8, 9.9.9.9"]:
+            request = APIRequestFactory().post("/", {}, format="json",
+                                               HTTP_X_FORWARDED_FOR=f"{spoofed}, 10.0.0.7")
+            idents.append(self.throttle.dimension_value("ip", Request(request)))
+        self.assertEqual(idents, ["10.0.0.7", "10.0.0.7"])
@@ -0,0 +1,87 @@
+from rest_framework import status
+
+from authentication.v1.utils.token_cache import load_token_cache_lazy
+from common.utils import refresh_throttle
+
+from .base import BaseUserUnitTestCase
+
+
+class UnitTestVerifiedTokenCache(BaseUserUnitTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Set up the necessary data for all test methods in this class.
+
+        This method is called once for the test class and is typically used
+        to set up non-modifiable data or configuration that is shared among
+        all tests.
+        """
+        refresh_throttle()
+
+    def setUp(self):
+        """
+        Prepare the environment for each test case.
+
+        This method clears the process-wide token cache so every test starts
+        with empty counters.
+        """
+        super().setUp()
+        self.url = "http://127.0.0.1:8000/user/v1/api/profile/profiles_list/"
+        self.cache = load_token_cache_lazy()
+        self.cache.clear()
+        self.cache.hits = self.cache.misses = self.cache.evictions = 0
+
+    def test_repeated_request_is_served_from_cache(self):
+        """
+        Test that the second request with the same token needs no user query.
+
+        Procedure:
+        1. Send an authenticated request to fill the cache.
+        2. Send the same request again while counting the database queries.
+        3. Ensure both responses are 200 OK.
+        4. Check that the cache recorded one miss and one hit.
+        """
+        response = self.client.get(self.url, headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        with self.assertNumQueries(1):  # only the profiles list query
+            response = self.client.get(self.url, headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.cache.stats()["misses"], 1)
+        self.assertEqual(self.cache.stats()["hits"], 1)
+
+    def test_block_invalidates_cached_tokens(self):
+        """
+        Test that blocking a user drops the cached tokens of that user.
+
+        Procedure:
+        1. Send an authenticated request to fill the cache.
+        2. Block the user.
+        3. Ensure the cache no longer holds any entry.
+        4. Check that the next request is rejected with 403 FORBIDDEN.
+        """
+        self.client.get(self.url, headers=self.headers)
+        self.assertEqual(self.cache.stats()["size"], 1)
+        self.user.block()
+        self.assertEqual(self.cache.stats()["size"], 0)
+        response = self.client.get(self.url, headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_lru_eviction(self):
+        """
+        Test that the cache never grows past its configured size.
+
+        Procedure:
+        1. Shrink the cache to a single entry.
+        2. Store two different tokens.
+        3. Ensure only one entry is kept and one eviction is counted.
+        """
+        self.cache.max_size = 1
+        try:
+            self.cache.set(b"sig-1", b"a.b.sig-1", {}, self.user, 2 ** 40)
+            self.cache.set(b"sig-2", b"a.b.sig-2", {}, self.user, 2 ** 40)
+            self.assertEqual(self.cache.stats()["size"], 1)
+            self.assertEqual(self.cache.stats()["evictions"], 1)
+            self.assertIsNone(self.cache.get(b"sig-1", b"a.b.sig-1"))
+        finally:
+            self.cache.max_size = 10000
@@ -0,0 +1,112 @@
+import json
+
+from rest_framework import status
+
+from authentication.models import User
+from authentication.v1.utils.claims import (BLOCK_EPOCH_CLAIM, STAFF_CLAIM,
+                                            STATE_CLAIM)
+from authentication.v1.utils.minting import mint_tokens
+from authentication.v1.utils.token import decode_token, generate_token
+from common.utils import refresh_throttle
+
+from .base import BaseUserUnitTestCase
+
+
+class UnitTestTokenMinting(BaseUserUnitTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Set up the necessary data for all test methods in this class.
+
+        This method is called once for the test class and is typically used
+        to set up non-modifiable data or configuration that is shared among
+        all tests.
+        """
+        refresh_throttle()
+
+    def setUp(self):
+        super().setUp()
+        self.batch_url = "http://127.0.0.1:8000/user/v1/api/tokens/batch/"
+        self.profiles_url = "http://127.0.0.1:8000/user/v1/api/profile/profiles_list/"
+
+    def test_minted_tokens_match_login_tokens(self):
+        """
+        Test that minted tokens carry the claims of login tokens and authenticate.
+
+        Procedure:
+        1. Mint a pair for the test user.
+        2. Ensure both tokens decode with the key ring and have the expected type, user id
+           and authorization claims.
+        3. Check that the minted access token is accepted by an authenticated endpoint.
+        """
+        pair = mint_tokens([self.user.pk])[0]
+        access = decode_token(pair["access"])
+        refresh = decode_token(pair["refresh"])
+        self.assertEqual(access["token_type"], "access")
+        self.assertEqual(refresh["token_type"], "refresh")
+        self.assertEqual(access["pk"], self.user.pk)
+        self.assertNotEqual(access["jti"], refresh["jti"])
+        for token in (access, refresh):
+            self.assertEqual(token[STATE_CLAIM], self.user.state)
+            self.assertEqual(token[STAFF_CLAIM], self.user.is_staff)
+            self.assertEqual(token[BLOCK_EPOCH_CLAIM], access["iat"])
+
+        response = self.client.get(self.profiles_url, headers={"Authorization": pair["access"]})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_batch_endpoint_is_staff_only(self):
+        """
+        Test that a regular user cannot mint tokens.
+        """
+        response = self.client.post(self.batch_url, data=json.dumps({"user_ids": [self.user.pk]}),
+                                    content_type='application/json', headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_batch_endpoint(self):
+        """
+        Test minting tokens for several users through the API.
+
+        Procedure:
+        1. Create a second user and make the test user a superuser.
+        2. Send a POST request with both user ids and an unknown id.
+        3. Ensure the response is 201 CREATED with one pair per existing user and the unknown id in `not_found`.
+        """
+        other = User.objects.create(phone_number="00989121234568")
+        self.user.is_staff = True
+        self.user.is_superuser = True
+        self.user.save()
+        headers = {"Authorization": generate_token(self.client, self.user)["access"]}
+
+        response = self.client.post(
+            self.batch_url, data=json.dumps({"user_ids": [self.user.pk, other.pk, 999999]}),
+            content_type='application/json', headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        tokens = response.data["data"]["tokens"]
+        self.assertEqual([pair["user_id"] for pair in tokens], [self.user.pk, other.pk])
+        self.assertEqual(response.data["data"]["not_found"], [999999])
+
+    def test_staff_cannot_mint_for_privileged_users(self):
+        """
+        Test that a staff user who is not a superuser cannot mint tokens of a superuser.
+
+        Procedure:
+        1. Make the test user staff and create a superuser.
+        2. Ask for tokens of a regular user and the superuser.
+        3. Ensure the request is rejected with 403 FORBIDDEN and the regular user alone is minted.
+        """
+        regular = User.objects.create(phone_number="00989121234568")
+        admin = User.objects.create(phone_number="00989121234569", is_staff=True, is_superuser=True)
+        self.user.is_staff = True
+        self.user.save()
+        headers = {"Authorization": generate_token(self.client, self.user)["access"]}
+
+        response = self.client.post(
+            self.batch_url, data=json.dumps({"user_ids": [regular.pk, admin.pk]}),
+            content_type='application/json', headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        response = self.client.post(
+            self.batch_url, data=json.dumps({"user_ids": [regular.pk]}),
+            content_type='application/json', headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
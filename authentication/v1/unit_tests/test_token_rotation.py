@@ -0,0 +1,83 @@
+import json
+import time
+
+from rest_framework import status
+
+from authentication.tokens import RefreshToken
+from authentication.v1.utils.rotation import (FAMILY_EXPIRY_CLAIM,
+                                              load_refresh_token_families_lazy)
+from authentication.v1.utils.token import generate_token
+from common.utils import refresh_throttle
+
+from .base import BaseUserUnitTestCase
+
+
+class UnitTestTokenRotation(BaseUserUnitTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Set up the necessary data for all test methods in this class.
+
+        This method is called once for the test class and is typically used
+        to set up non-modifiable data or configuration that is shared among
+        all tests.
+        """
+        refresh_throttle()
+
+    def setUp(self):
+        super().setUp()
+        self.refresh_url = "http://127.0.0.1:8000/user/v1/api/token/refresh/"
+        self.refresh_token = str(generate_token(self.client, self.user)["refresh"])
+
+    def refresh(self, refresh_token):
+        return self.client.post(self.refresh_url, data=json.dumps({"refresh": refresh_token}),
+                                content_type='application/json')
+
+    def test_refresh_rotates_token(self):
+        """
+        Test that a refresh returns a new access token and a new refresh token.
+        """
+        response = self.refresh(self.refresh_token)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("access", response.data)
+        self.assertNotEqual(response.data["refresh"], self.refresh_token)
+
+        response = self.refresh(response.data["refresh"])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_reuse_revokes_family(self):
+        """
+        Test reuse detection.
+
+        Procedure:
+        1. Rotate the login refresh token once.
+        2. Send the login refresh token again and ensure it is rejected with 401 UNAUTHORIZED.
+        3. Check that the rotated token of the same family is rejected too.
+        """
+        rotated = self.refresh(self.refresh_token).data["refresh"]
+
+        response = self.refresh(self.refresh_token)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        response = self.refresh(rotated)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_rotation_keeps_family_expiry(self):
+        """
+        Test that rotated tokens never outlive the login token of their family.
+
+        Procedure:
+        1. Rotate the login refresh token and ensure the rotated token carries its `exp`.
+        2. Rotate a token whose family expires in a minute.
+        3. Ensure the replacement expires with the family instead of a full lifetime later.
+        """
+        login_token = RefreshToken(self.refresh_token)
+        rotated = RefreshToken(self.refresh(self.refresh_token).data["refresh"])
+        self.assertEqual(rotated[FAMILY_EXPIRY_CLAIM], login_token["exp"])
+        self.assertLessEqual(rotated["exp"], login_token["exp"])
+
+        expiring = RefreshToken.for_user(self.user)
+        expiring[FAMILY_EXPIRY_CLAIM] = int(time.time()) + 60
+        self.assertTrue(load_refresh_token_families_lazy().rotate(expiring))
+        self.assertEqual(expiring["exp"], expiring[FAMILY_EXPIRY_CLAIM])
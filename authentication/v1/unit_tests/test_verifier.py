@@ -0,0 +1,87 @@
+import base64
+import json
+import time
+
+import jwt
+from cryptography.hazmat.primitives.asymmetric import ed25519
+from django.test import TestCase
+from rest_framework_simplejwt.exceptions import TokenBackendError
+
+from authentication.v1.utils.keyring import EDDSA, HS256, KeyRing, SigningKey
+from authentication.v1.utils.verifier import TokenVerifier
+
+
+class UnitTestTokenVerifier(TestCase):
+
+    def setUp(self):
+        """
+        Build a verifier over an active Ed25519 key and a legacy HS256 key.
+        """
+        self.ed_key = ed25519.Ed25519PrivateKey.generate()
+        key_ring = KeyRing(
+            [
+                SigningKey("active", EDDSA, self.ed_key, self.ed_key.public_key()),
+                SigningKey("hs256", HS256, "secret", "secret"),
+            ],
+            active_kid="active",
+            legacy_kid="hs256",
+        )
+        self.verifier = TokenVerifier(key_ring)
+        self.claims = {"token_type": "access", "exp": int(time.time()) + 60,
+                       "iat": int(time.time()), "jti": "a" * 32, "pk": 1}
+
+    def test_verifies_every_ring_key(self):
+        """
+        Test that tokens of the active key and kid-less legacy tokens are accepted.
+        """
+        active = jwt.encode(self.claims, self.ed_key, algorithm=EDDSA, headers={"kid": "active"})
+        legacy = jwt.encode(self.claims, "secret", algorithm=HS256)
+        self.assertEqual(self.verifier.verify(active, "access"), self.claims)
+        self.assertEqual(self.verifier.verify(legacy.encode(), "access"), self.claims)
+
+    def test_rejects_invalid_tokens(self):
+        """
+        Test the claims and signature checks.
+
+        Procedure:
+        1. Build a tampered, an expired, a wrong-type, an id-less and an unknown-kid token.
+        2. Ensure each one raises TokenBackendError.
+        """
+        valid = jwt.encode(self.claims, "secret", algorithm=HS256)
+        header, payload, signature = valid.split(".")
+        tampered = f"{header}.{payload}.{signature[::-1]}"
+        expired = jwt.encode({**self.claims, "exp": int(time.time()) - 1}, "secret", algorithm=HS256)
+        refresh = jwt.encode({**self.claims, "token_type": "refresh"}, "secret", algorithm=HS256)
+        no_jti = jwt.encode({key: value for key, value in self.claims.items() if key != "jti"},
+                            "secret", algorithm=HS256)
+        unknown = jwt.encode(self.claims, "secret", algorithm=HS256, headers={"kid": "missing"})
+
+        for token in [tampered, expired, refresh, no_jti, unknown, "not.a.jwt", ""]:
+            with self.assertRaises(TokenBackendError, msg=token):
+                self.verifier.verify(token, "access")
+        self.assertEqual(self.verifier.verify(refresh)["token_type"], "refresh")
+
+    def test_rejects_malformed_segments(self):
+        """
+        Test that crafted headers and re-spelled signatures are rejected, not errors or aliases.
+
+        Procedure:
+        1. Build a token whose header has a list `kid`.
+        2. Re-spell the signature of a valid token with an invalid character, explicit
+           padding and different unused bits in its last character.
+        3. Ensure each one raises TokenBackendError.
+        """
+        valid = jwt.encode(self.claims, "secret", algorithm=HS256)
+        header, payload, signature = valid.split(".")
+        list_kid = base64.urlsafe_b64encode(
+            json.dumps({"alg": HS256, "kid": ["hs256"]}).encode()).rstrip(b"=").decode()
+        alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_"
+        other_bits = alphabet[alphabet.index(signature[-1]) ^ 1]
+
+        for token in [f"{list_kid}.{payload}.{signature}",
+                      f"{header}.{payload}.{signature[:10]}!{signature[10:]}",
+                      f"{header}.{payload}.{signature}=",
+                      f"{header}.{payload}.{signature[:-1]}{other_bits}"]:
+            with self.assertRaises(TokenBackendError, msg=token):
+                self.verifier.verify(token, "access")
+        self.assertEqual(self.verifier.verify(valid, "access"), self.claims)
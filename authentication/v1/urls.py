@@ -3,10 +3,12 @@ from rest_framework.routers import DefaultRouter
 
 from authentication.permissions import AnonymousTokenPermission
 from authentication.v1.apis.country import PhoneNumberCountryViewSet
+from authentication.v1.apis.introspect import introspect
 from authentication.v1.apis.login import (AnonymousUserViewSet, LoginViewSet,
                                           TokenRefreshWithPermission,
                                           VerificationCodeViewSet)
 from authentication.v1.apis.profile import (ProfileViewSet)
+from authentication.v1.apis.token import TokenMintingViewSet
 from authentication.v1.apis.user import UserViewSet
 from authentication.v1.apis.verify_user import VerifyUserViewSet, UpdateUserVerifiedDataViewSet
 
@@ -22,6 +24,7 @@ router.register(r'verification_code', VerificationCodeViewSet,
                 basename='verification_code')
 router.register(r'verify_user', UpdateUserVerifiedDataViewSet,
                 basename='confirm_user_data')
+router.register(r'tokens', TokenMintingViewSet, basename='tokens')
 
 urlpatterns = [
     path("api/", include(router.urls)),
@@ -33,4 +36,5 @@ urlpatterns = [
         name="token_refresh",
     ),
     path('api/countries/', PhoneNumberCountryViewSet.as_view(), name='country-list'),
+    path('api/introspect/', introspect, name='introspect'),
 ]
@@ -0,0 +1,51 @@
+import time
+
+from django.conf import settings
+
+STATE_CLAIM = "state"
+STAFF_CLAIM = "staff"
+SUPERUSER_CLAIM = "su"
+ACTIVE_CLAIM = "act"
+# Block epoch: when the claims above were read from the database. Rotation copies it
+# unchanged, so a per-user cutoff in the revocation mirror (set when the user is blocked)
+# rejects every token derived from older data.
+BLOCK_EPOCH_CLAIM = "bep"
+
+
+def authorization_claims(user, epoch=None):
+    """
+    The authorization claims of `user`, read at `epoch` (default now).
+    """
+    return {
+        STATE_CLAIM: user.state,
+        STAFF_CLAIM: bool(user.is_staff),
+        SUPERUSER_CLAIM: bool(user.is_superuser),
+        ACTIVE_CLAIM: bool(user.is_active),
+        BLOCK_EPOCH_CLAIM: int(time.time()) if epoch is None else epoch,
+    }
+
+
+def add_authorization_claims(token, user):
+    """
+    Sign the authorization fields of `user` into `token` when claims-based authorization is on.
+
+    Parameters
+    ----------
+    token : Token
+        A refresh token; its access tokens inherit the claims.
+    user : User
+        The user the token is issued for.
+
+    Returns
+    -------
+    Token
+        The same token.
+    """
+    if settings.AUTHORIZATION_CLAIMS["ENABLED"]:
+        for claim, value in authorization_claims(user).items():
+            token[claim] = value
+    return token
+
+
+def has_authorization_claims(token):
+    return token is not None and token.get(BLOCK_EPOCH_CLAIM) is not None
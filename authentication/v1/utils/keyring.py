@@ -0,0 +1,194 @@
+import base64
+import json
+import os
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PublicKey
+from cryptography.hazmat.primitives.asymmetric.rsa import RSAPublicKey
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenBackendError
+
+HS256 = "HS256"
+RS256 = "RS256"
+EDDSA = "EdDSA"
+PUBLIC_KEY_SUFFIX = ".pub.pem"
+PRIVATE_KEY_SUFFIX = ".pem"
+
+key_ring = None
+
+
+def base64url_encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def int_to_base64url(value: int) -> str:
+    return base64url_encode(value.to_bytes((value.bit_length() + 7) // 8, "big"))
+
+
+class SigningKey:
+    """
+    A parsed JWT key identified by its `kid`.
+
+    Attributes
+    ----------
+    kid : str
+        The key id written to the `kid` header of every token signed with this key.
+    algorithm : str
+        One of `HS256`, `RS256` or `EdDSA`.
+    signing_key : object or None
+        The secret or private key object, None for verify-only (retired or foreign) keys.
+    verifying_key : object
+        The secret or public key object used to check signatures.
+    """
+
+    def __init__(self, kid, algorithm, signing_key, verifying_key) -> None:
+        self.kid = kid
+        self.algorithm = algorithm
+        self.signing_key = signing_key
+        self.verifying_key = verifying_key
+
+    @property
+    def can_sign(self):
+        return self.signing_key is not None
+
+    @property
+    def is_public(self):
+        return self.algorithm != HS256
+
+    def public_jwk(self):
+        """
+        Return the public JWK of the key, or None for symmetric keys that must never be published.
+        """
+        if self.algorithm == RS256:
+            numbers = self.verifying_key.public_numbers()
+            return {"kty": "RSA", "use": "sig", "alg": RS256, "kid": self.kid,
+                    "n": int_to_base64url(numbers.n), "e": int_to_base64url(numbers.e)}
+        if self.algorithm == EDDSA:
+            raw = self.verifying_key.public_bytes(
+                serialization.Encoding.Raw, serialization.PublicFormat.Raw)
+            return {"kty": "OKP", "use": "sig", "alg": EDDSA, "kid": self.kid,
+                    "crv": "Ed25519", "x": base64url_encode(raw)}
+        return None
+
+    @classmethod
+    def from_secret(cls, kid, secret):
+        return cls(kid, HS256, secret, secret)
+
+    @classmethod
+    def from_pem_file(cls, path):
+        file_name = os.path.basename(path)
+        with open(path, "rb") as pem_file:
+            pem = pem_file.read()
+        if file_name.endswith(PUBLIC_KEY_SUFFIX):
+            kid = file_name[:-len(PUBLIC_KEY_SUFFIX)]
+            private_key = None
+            public_key = serialization.load_pem_public_key(pem)
+        else:
+            kid = file_name[:-len(PRIVATE_KEY_SUFFIX)]
+            private_key = serialization.load_pem_private_key(pem, password=None)
+            public_key = private_key.public_key()
+
+        if isinstance(public_key, RSAPublicKey):
+            algorithm = RS256
+        elif isinstance(public_key, Ed25519PublicKey):
+            algorithm = EDDSA
+        else:
+            raise ValueError(f"Unsupported key type in {path}")
+        return cls(kid, algorithm, private_key, public_key)
+
+
+class KeyRing:
+    """
+    All keys this process signs and verifies JWTs with.
+
+    Exactly one key is active and signs new tokens. The other keys only verify tokens
+    they signed before a rotation. `encode` and `decode` follow simplejwt's `TokenBackend`
+    interface so the ring can back the token classes in `authentication.tokens`.
+
+    Methods:
+    - encode(self, payload: dict) -> str:
+        Sign the payload with the active key and a `kid` header.
+    - decode(self, token: str, verify: bool = True) -> dict:
+        Verify the token with the key named by its `kid` header and return its claims.
+    - jwks(self) -> dict:
+        The JSON Web Key Set of every public key in the ring.
+    """
+
+    def __init__(self, keys, active_kid, legacy_kid=None) -> None:
+        self.keys = {key.kid: key for key in keys}
+        if active_kid not in self.keys or not self.keys[active_kid].can_sign:
+            raise ValueError(f"No private key found for active kid '{active_kid}'")
+        self.active = self.keys[active_kid]
+        self.legacy = self.keys.get(legacy_kid)
+        self._jwks = {"keys": [key.public_jwk() for key in self.keys.values() if key.is_public]}
+        self.jwks_json = json.dumps(self._jwks, separators=(",", ":")).encode()
+
+    def get_verifying_key(self, header):
+        kid = header.get("kid")
+        if kid is not None and not isinstance(kid, str):
+            raise TokenBackendError(_("Token is invalid or expired"))
+        key = self.keys.get(kid) if kid else self.legacy
+        if key is None or key.algorithm != header.get("alg"):
+            return None
+        return key
+
+    def encode(self, payload):
+        return jwt.encode(payload, self.active.signing_key,
+                          algorithm=self.active.algorithm, headers={"kid": self.active.kid})
+
+    def decode(self, token, verify=True):
+        try:
+            header = jwt.get_unverified_header(token)
+        except jwt.InvalidTokenError:
+            raise TokenBackendError(_("Token is invalid or expired"))
+
+        key = self.get_verifying_key(header)
+        if key is None:
+            raise TokenBackendError(_("Invalid algorithm specified"))
+        try:
+            return jwt.decode(
+                token,
+                key.verifying_key,
+                algorithms=[key.algorithm],
+                options={"verify_aud": False, "verify_signature": verify},
+            )
+        except jwt.InvalidTokenError:
+            raise TokenBackendError(_("Token is invalid or expired"))
+
+    def jwks(self):
+        return self._jwks
+
+
+def build_key_ring(config):
+    """
+    Build a `KeyRing` from the `JWT_KEY_RING` settings.
+
+    With `HS256` the ring holds a single symmetric key derived from the signing secret.
+    With `RS256`/`EdDSA` it loads every `<kid>.pem` (private) and `<kid>.pub.pem`
+    (verify-only) file of `KEYS_DIR`. The symmetric key is kept as a verify-only legacy
+    key when `ACCEPT_LEGACY_HS256` is set, so tokens issued before the switch keep working.
+    """
+    secret_key = SigningKey.from_secret(
+        config["LEGACY_KID"], settings.SIMPLE_JWT["SIGNING_KEY"])
+    if config["ALGORITHM"] == HS256:
+        return KeyRing([secret_key], active_kid=secret_key.kid, legacy_kid=secret_key.kid)
+
+    keys = []
+    for file_name in sorted(os.listdir(config["KEYS_DIR"])):
+        if file_name.endswith(PRIVATE_KEY_SUFFIX):
+            keys.append(SigningKey.from_pem_file(
+                os.path.join(config["KEYS_DIR"], file_name)))
+    legacy_kid = None
+    if config["ACCEPT_LEGACY_HS256"]:
+        keys.append(SigningKey(secret_key.kid, HS256, None, secret_key.verifying_key))
+        legacy_kid = secret_key.kid
+    return KeyRing(keys, active_kid=config["ACTIVE_KID"], legacy_kid=legacy_kid)
+
+
+def load_key_ring_lazy():
+    global key_ring
+    if key_ring is None:
+        key_ring = build_key_ring(settings.JWT_KEY_RING)
+    return key_ring
@@ -1,15 +1,27 @@
+import hashlib
+import hmac
 import random
+import weakref
 
-from decouple import config
+from django.conf import settings
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 
 from authentication.models import User
-from common.utils import BaseTime, SendEmail
-from redis_service.utils import RedisStore
-from third_party_repository.kavenegar import KavenegarSMSService
+from authentication.v1.utils.otp_gateway import EMAIL, SMS, build_otp_gateway
+from common import variables
+from common.utils import BaseTime
+from redis_service.client import get_async_redis_client, get_redis_client
+from redis_service.keys import user_key
+from redis_service.scripts import CONSUME_OTP, ISSUE_OTP
+from redis_service.utils import RedisStore, encode_sized, load_value_codec_lazy
+
+OTP_ISSUED = 1
+OTP_PENDING = 0
+OTP_QUOTA_EXCEEDED = -1
 
 otp_adapter = None
+otp_issuer = None
 
 
 def create_verification_code(user):
@@ -37,17 +49,130 @@ def create_verification_code(user):
     return verification_code, expiration_timestamp
 
 
+def hash_verification_code(user_id, verification_code):
+    """
+    HMAC of a verification code, as stored in Redis.
+
+    The user id is part of the message, so equal codes of different users do not share a hash.
+    """
+    message = f"{user_id}:{str(verification_code).strip()}".encode()
+    return hmac.new(settings.SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()
+
+
+def verification_code_matches(user_id, verification_code, stored_hash):
+    return hmac.compare_digest(hash_verification_code(user_id, verification_code), str(stored_hash))
+
+
+class OTPIssuer:
+    """
+    Atomic OTP issuance and consumption, each in one Redis round trip.
+
+    The `ISSUE_OTP` script refuses a new code while the previous one is pending (the
+    cooldown) or when the user has used up the OTPs of the current window; otherwise it
+    stores the hashed code with the cooldown as TTL and counts it. Concurrent requests for
+    the same user cannot both get a code, so at most one SMS is sent. The `CONSUME_OTP`
+    script removes the code only when the submitted code matches it, so a wrong guess
+    neither burns the code nor locks its owner out.
+
+    Methods:
+    - issue(self, user: User, verification_code: str, expiration_time) -> int:
+        `OTP_ISSUED`, `OTP_PENDING` or `OTP_QUOTA_EXCEEDED`.
+    - aissue(self, user: User, verification_code: str, expiration_time) -> int:
+        Async variant of `issue`.
+    - consume(self, user: User, verification_code: str) -> dict | None:
+        The stored OTP entry, removed, if it matches `verification_code`, else None.
+    - aconsume(self, user: User, verification_code: str) -> dict | None:
+        Async variant of `consume`.
+    """
+
+    def __init__(self, redis_client, cooldown, max_per_window, window, counter_key_prefix) -> None:
+        self.codec = load_value_codec_lazy()
+        self.cooldown = cooldown
+        self.max_per_window = max_per_window
+        self.window = window
+        self.counter_key_prefix = counter_key_prefix
+        # The script is loaded once per process; afterwards every call is a bare EVALSHA, and
+        # register_script reloads it only if Redis lost its script cache.
+        self._issue = redis_client.register_script(ISSUE_OTP)
+        self._consume = redis_client.register_script(CONSUME_OTP)
+        redis_client.script_load(ISSUE_OTP)
+        redis_client.script_load(CONSUME_OTP)
+        self._async_scripts = weakref.WeakKeyDictionary()
+
+    def keys(self, user):
+        return [user_key(variables.VERIFICATION_CODE, user.pk), user_key(self.counter_key_prefix, user.pk)]
+
+    def args(self, key, user, verification_code, expiration_time):
+        entry = {
+            variables.VERIFICATION_CODE: hash_verification_code(user.pk, verification_code),
+            variables.EXPIRTION_TIME: expiration_time,
+            variables.PHONE_NUMBER: user.phone_number,
+        }
+        return [encode_sized(self.codec, key, entry), self.cooldown, self.max_per_window, self.window]
+
+    def issue(self, user, verification_code, expiration_time):
+        keys = self.keys(user)
+        return int(self._issue(keys=keys, args=self.args(keys[0], user, verification_code, expiration_time)))
+
+    async def aissue(self, user, verification_code, expiration_time):
+        keys = self.keys(user)
+        script = self._async_script(ISSUE_OTP)
+        return int(await script(keys=keys, args=self.args(keys[0], user, verification_code, expiration_time)))
+
+    def consume(self, user, verification_code):
+        return self.codec.decode(self._consume(
+            keys=[user_key(variables.VERIFICATION_CODE, user.pk)],
+            args=[hash_verification_code(user.pk, verification_code)]))
+
+    async def aconsume(self, user, verification_code):
+        return self.codec.decode(await self._async_script(CONSUME_OTP)(
+            keys=[user_key(variables.VERIFICATION_CODE, user.pk)],
+            args=[hash_verification_code(user.pk, verification_code)]))
+
+    def _async_script(self, source):
+        client = get_async_redis_client(decode_responses=False)
+        scripts = self._async_scripts.get(client)
+        if scripts is None:
+            scripts = self._async_scripts[client] = {}
+        if source not in scripts:
+            scripts[source] = client.register_script(source)
+        return scripts[source]
+
+
 class OTPAdapter:
+    """
+    Sends OTPs through the providers of `OTP_GATEWAY`, see `OTPGateway`.
+
+    Methods:
+    - send_otp(self, otp: str, phone_number: str = None, email: str = None) -> SMSResult:
+        Send one OTP by email when `email` is given, else by SMS.
+    - send_otps(self, messages: list) -> list:
+        Send several SMS OTPs with as few provider calls as possible.
+    """
+
     def __init__(self, ) -> None:
-        self.email_service = SendEmail(sender='', source_api='sign_up')
-        KAVENEGAR_API_KEY = config("KAVENEGAR_API_KEY", cast=str)
-        self.sms_service = KavenegarSMSService(api_key=KAVENEGAR_API_KEY)
+        self.gateway = build_otp_gateway()
 
     def send_otp(self, otp, phone_number=None, email=None):
         if email:
-            self.email_service.send_email(email, otp)
-        else:
-            self.sms_service.send_sms(receptor=phone_number, otp=otp)
+            return self.gateway.send(EMAIL, email, otp)
+        return self.gateway.send(SMS, phone_number, otp)
+
+    def send_otps(self, messages):
+        """
+        Send several SMS OTPs with as few provider calls as possible.
+
+        Parameters
+        ----------
+        messages : list
+            (phone_number, otp) pairs.
+
+        Returns
+        -------
+        list
+            One `SMSResult` per pair, in order.
+        """
+        return self.gateway.send_many(SMS, messages)
 
 
 def load_otp_adapter_lazy():
@@ -55,3 +180,17 @@ def load_otp_adapter_lazy():
     if otp_adapter is None:
         otp_adapter = OTPAdapter()
     return otp_adapter
+
+
+def load_otp_issuer_lazy():
+    global otp_issuer
+    if otp_issuer is None:
+        issuance = settings.OTP_ISSUANCE
+        otp_issuer = OTPIssuer(
+            get_redis_client(decode_responses=False),
+            cooldown=issuance["COOLDOWN_SECONDS"],
+            max_per_window=issuance["MAX_PER_WINDOW"],
+            window=issuance["WINDOW_SECONDS"],
+            counter_key_prefix=issuance["COUNTER_KEY_PREFIX"],
+        )
+    return otp_issuer
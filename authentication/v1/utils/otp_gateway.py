@@ -0,0 +1,256 @@
+import collections
+import logging
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.mail import send_mail
+
+from common.metrics import stage_timer
+from third_party_repository.kavenegar import SENT, KavenegarSMSService, SMSResult
+
+logger = logging.getLogger(__name__)
+
+SMS = "sms"
+EMAIL = "email"
+
+
+class ProviderStats:
+    """
+    Rolling latency and error statistics of one provider over the last `window_seconds`.
+
+    Samples age out of the window, so a provider that failed a while ago is explored again
+    instead of being avoided forever. At most `max_samples` of the latest samples are kept.
+
+    Methods:
+    - record(self, seconds: float, ok: bool) -> None:
+        Add one send attempt.
+    - snapshot(self) -> dict:
+        Sample count, error rate and p50/p99 latency of the successful sends.
+    """
+
+    def __init__(self, window_seconds, max_samples=10000) -> None:
+        self.window_seconds = window_seconds
+        self.samples = collections.deque(maxlen=max_samples)
+        self._lock = threading.Lock()
+
+    def record(self, seconds, ok):
+        with self._lock:
+            self.samples.append((time.monotonic(), seconds, ok))
+
+    def snapshot(self):
+        cutoff = time.monotonic() - self.window_seconds
+        with self._lock:
+            while self.samples and self.samples[0][0] < cutoff:
+                self.samples.popleft()
+            samples = list(self.samples)
+        latencies = sorted(seconds for _, seconds, ok in samples if ok)
+        return {
+            "samples": len(samples),
+            "error_rate": (len(samples) - len(latencies)) / len(samples) if samples else 0.0,
+            "p50": percentile(latencies, 0.5),
+            "p99": percentile(latencies, 0.99),
+        }
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    return sorted_values[min(int(len(sorted_values) * fraction), len(sorted_values) - 1)]
+
+
+class KavenegarProvider:
+    channel = SMS
+
+    def __init__(self, name, service) -> None:
+        self.name = name
+        self.service = service
+
+    def send(self, receptor, otp):
+        return self.service.send_sms(otp=otp, receptor=receptor)
+
+    def send_bulk(self, messages):
+        return self.service.send_bulk(messages)
+
+
+class DjangoEmailProvider:
+    """
+    Sends OTP emails through the configured Django email backend.
+    """
+    channel = EMAIL
+
+    def __init__(self, name, sender, subject, message) -> None:
+        self.name = name
+        self.sender = sender
+        self.subject = subject
+        self.message = message
+
+    def send(self, receptor, otp):
+        send_mail(self.subject, self.message.format(otp=otp), self.sender, [receptor])
+        return SMSResult(receptor, SENT)
+
+
+class FakeProvider:
+    """
+    Local provider for tests and offline load tests: it waits `latency_seconds` (with 20%
+    jitter), fails with probability `error_rate` and keeps the last sent messages in `outbox`.
+    """
+
+    def __init__(self, name, channel, latency_seconds=0.0, error_rate=0.0, outbox_size=1000) -> None:
+        self.name = name
+        self.channel = channel
+        self.latency_seconds = latency_seconds
+        self.error_rate = error_rate
+        self.outbox = collections.deque(maxlen=outbox_size)
+
+    def send(self, receptor, otp):
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds * random.uniform(0.8, 1.2))
+        if random.random() < self.error_rate:
+            raise ConnectionError(f"{self.name} failed")
+        self.outbox.append((receptor, otp))
+        return SMSResult(receptor, SENT)
+
+
+class OTPGateway:
+    """
+    Registry of OTP providers that routes every send to the fastest healthy provider of its
+    channel and fails over to the next one on errors.
+
+    A provider is healthy while its error rate over the stats window is at most
+    `max_error_rate`, or while it has fewer than `min_samples` samples; providers with too
+    few samples are tried first so every provider keeps being measured. Healthy providers
+    are ranked by their p99 latency; unhealthy ones are only tried after all healthy ones.
+
+    Methods:
+    - register(self, provider) -> None:
+        Add a provider; it serves the channel in its `channel` attribute.
+    - ranked(self, channel: str) -> list:
+        The providers of a channel in routing order.
+    - send(self, channel: str, receptor: str, otp: str) -> SMSResult:
+        Send with the first provider that succeeds; raises the last error if all fail.
+        Errors with a false `retryable` attribute (e.g. an invalid receptor, or a timeout
+        after the provider may have sent the message) are raised at once, without failing
+        over or counting against the provider.
+    - send_many(self, channel: str, messages: list) -> list:
+        Send (receptor, otp) pairs, in bulk where a provider supports it, failing over the
+        messages that were not sent and may be sent again.
+    - stats(self) -> dict:
+        The rolling statistics of every provider.
+    """
+
+    def __init__(self, window_seconds=300, min_samples=20, max_error_rate=0.2) -> None:
+        self.window_seconds = window_seconds
+        self.min_samples = min_samples
+        self.max_error_rate = max_error_rate
+        self.providers = {}
+        self._stats = {}
+
+    def register(self, provider):
+        self.providers.setdefault(provider.channel, []).append(provider)
+        self._stats[provider.name] = ProviderStats(self.window_seconds)
+
+    def ranked(self, channel):
+        def rank(provider):
+            stats = self._stats[provider.name].snapshot()
+            if stats["samples"] < self.min_samples:
+                return (0, stats["samples"])
+            if stats["error_rate"] > self.max_error_rate:
+                return (2, stats["error_rate"])
+            return (1, stats["p99"] if stats["p99"] is not None else 0.0)
+        return sorted(self.providers.get(channel, []), key=rank)
+
+    def send(self, channel, receptor, otp):
+        error = LookupError(f"No OTP provider for {channel}")
+        for provider in self.ranked(channel):
+            start = time.perf_counter()
+            try:
+                with stage_timer(f"otp.provider.{provider.name}"):
+                    result = provider.send(receptor, otp)
+            except Exception as e:
+                if not getattr(e, "retryable", True):
+                    raise
+                self._stats[provider.name].record(time.perf_counter() - start, False)
+                logger.warning("OTP provider %s failed, failing over: %s", provider.name, e)
+                error = e
+                continue
+            self._stats[provider.name].record(time.perf_counter() - start, True)
+            return result
+        raise error
+
+    def send_many(self, channel, messages):
+        results = {}
+        pending = list(messages)
+        for provider in self.ranked(channel):
+            if not pending:
+                break
+            send_bulk = getattr(provider, "send_bulk", None)
+            start = time.perf_counter()
+            if send_bulk is not None:
+                try:
+                    with stage_timer(f"otp.provider.{provider.name}"):
+                        provider_results = send_bulk(pending)
+                except Exception as e:
+                    logger.warning("OTP provider %s failed, failing over: %s", provider.name, e)
+                    provider_results = [SMSResult(receptor, None, retryable=getattr(e, "retryable", True))
+                                        for receptor, _ in pending]
+            else:
+                provider_results = []
+                for receptor, otp in pending:
+                    try:
+                        provider_results.append(provider.send(receptor, otp))
+                    except Exception as e:
+                        provider_results.append(
+                            SMSResult(receptor, None, retryable=getattr(e, "retryable", True)))
+            # Only failures a retry can fix fail over and count against the provider; the others
+            # (invalid receptors, timeouts after the provider may have sent) are final.
+            still_pending = []
+            for message, result in zip(pending, provider_results):
+                results[message] = result
+                if not result.ok and result.retryable:
+                    still_pending.append(message)
+            self._stats[provider.name].record(time.perf_counter() - start, not still_pending)
+            pending = still_pending
+        return [results.get(message, SMSResult(message[0], None)) for message in messages]
+
+    def stats(self):
+        return {name: stats.snapshot() for name, stats in self._stats.items()}
+
+
+def create_provider(name):
+    """
+    Build a provider by its name in `OTP_GATEWAY`: `kavenegar`, `email`, `fake_sms` or
+    `fake_email`.
+    """
+    gateway = settings.OTP_GATEWAY
+    if name == "kavenegar":
+        kavenegar = settings.KAVENEGAR
+        return KavenegarProvider(name, KavenegarSMSService(
+            api_key=kavenegar["API_KEY"],
+            template=kavenegar["TEMPLATE"],
+            sender=kavenegar["SENDER"],
+            bulk_message=kavenegar["BULK_MESSAGE"],
+            bulk_size=kavenegar["BULK_SIZE"],
+            connect_timeout=kavenegar["CONNECT_TIMEOUT"],
+            read_timeout=kavenegar["READ_TIMEOUT"],
+            retries=kavenegar["RETRIES"],
+            backoff_factor=kavenegar["BACKOFF_FACTOR"],
+            backoff_jitter=kavenegar["BACKOFF_JITTER"],
+            max_connections=kavenegar["MAX_CONNECTIONS"],
+        ))
+    if name == "email":
+        return DjangoEmailProvider(name, gateway["EMAIL_SENDER"], gateway["EMAIL_SUBJECT"],
+                                   gateway["EMAIL_MESSAGE"])
+    if name in ("fake_sms", "fake_email"):
+        return FakeProvider(name, SMS if name == "fake_sms" else EMAIL,
+                            gateway["FAKE_LATENCY_SECONDS"], gateway["FAKE_ERROR_RATE"])
+    raise ValueError(f"Unknown OTP provider {name!r}")
+
+
+def build_otp_gateway():
+    config = settings.OTP_GATEWAY
+    gateway = OTPGateway(config["WINDOW_SECONDS"], config["MIN_SAMPLES"], config["MAX_ERROR_RATE"])
+    for name in list(config["SMS_PROVIDERS"]) + list(config["EMAIL_PROVIDERS"]):
+        gateway.register(create_provider(name))
+    return gateway
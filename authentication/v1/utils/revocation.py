@@ -0,0 +1,391 @@
+import hashlib
+import logging
+import math
+import os
+import threading
+import time
+
+from django.conf import settings
+from rest_framework_simplejwt.settings import api_settings
+
+import redis
+from redis_service.client import get_redis_client, is_cluster
+
+logger = logging.getLogger(__name__)
+
+revocation_registry = None
+
+
+def jti_to_int(jti):
+    """
+    Map a `jti` claim to a 128-bit integer.
+
+    simplejwt issues `uuid4().hex` ids, which are parsed directly. Any other value is hashed.
+    """
+    jti = str(jti)
+    if len(jti) == 32:
+        try:
+            return int(jti, 16)
+        except ValueError:
+            pass
+    return int.from_bytes(hashlib.blake2b(jti.encode(), digest_size=16).digest(), "big")
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over 128-bit integers.
+
+    The bit positions are derived from the two 64-bit halves of the value (double hashing),
+    which is enough for random ids such as uuid4 `jti` claims and costs no hash function.
+    """
+
+    def __init__(self, capacity, error_rate=0.001) -> None:
+        self.capacity = max(int(capacity), 1)
+        self.error_rate = error_rate
+        self.size = max(int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)), 8)
+        self.hash_count = max(int(round(self.size / self.capacity * math.log(2))), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def add(self, value):
+        bits, size = self.bits, self.size
+        position, step = value & 0xFFFFFFFFFFFFFFFF, (value >> 64) | 1
+        for _ in range(self.hash_count):
+            position = (position + step) % size
+            bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value):
+        # Stops at the first unset bit, so a miss usually costs one or two probes.
+        bits, size = self.bits, self.size
+        position, step = value & 0xFFFFFFFFFFFFFFFF, (value >> 64) | 1
+        for _ in range(self.hash_count):
+            position = (position + step) % size
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+
+class RevokedTokenSet:
+    """
+    In-memory mirror of revoked token ids.
+
+    A Bloom filter answers the common "not revoked" case, and an exact set of integers
+    confirms the rare positives so false positives never reject a valid token. Ids are
+    grouped by the hour in which their token expires, so expired ids are dropped a
+    whole bucket at a time.
+    """
+    BUCKET_SECONDS = 3600
+
+    def __init__(self, capacity=1000000, error_rate=0.001) -> None:
+        self.error_rate = error_rate
+        self.bloom = BloomFilter(capacity, error_rate)
+        self.exact = set()
+        self.buckets = {}
+        # user id -> (cutoff, expires at): tokens whose block epoch is before the cutoff are revoked.
+        self.user_cutoffs = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.exact)
+
+    def add(self, jti, exp):
+        value = jti_to_int(jti)
+        with self._lock:
+            if value in self.exact:
+                return
+            self.exact.add(value)
+            self.buckets.setdefault(int(exp) // self.BUCKET_SECONDS, []).append(value)
+            if len(self.exact) > self.bloom.capacity:
+                self._rebuild(self.bloom.capacity * 2)
+            else:
+                self.bloom.add(value)
+
+    def is_revoked(self, jti):
+        value = jti_to_int(jti)
+        return value in self.bloom and value in self.exact
+
+    def add_user(self, user_id, cutoff, expires_at):
+        with self._lock:
+            current = self.user_cutoffs.get(str(user_id))
+            if current is None or current[0] < cutoff:
+                self.user_cutoffs[str(user_id)] = (cutoff, expires_at)
+
+    def is_user_revoked(self, user_id, epoch):
+        cutoff = self.user_cutoffs.get(str(user_id))
+        return cutoff is not None and epoch < cutoff[0]
+
+    def purge(self, now=None):
+        """
+        Drop the ids of tokens that expired before the current hour and rebuild the filter.
+        """
+        now = now or time.time()
+        current_bucket = int(now) // self.BUCKET_SECONDS
+        with self._lock:
+            for user_id in [user_id for user_id, (_, expires_at) in self.user_cutoffs.items()
+                            if expires_at <= now]:
+                del self.user_cutoffs[user_id]
+            expired = [bucket for bucket in self.buckets if bucket < current_bucket]
+            if not expired:
+                return 0
+            removed = 0
+            for bucket in expired:
+                values = self.buckets.pop(bucket)
+                self.exact.difference_update(values)
+                removed += len(values)
+            self._rebuild(self.bloom.capacity)
+            return removed
+
+    def _rebuild(self, capacity):
+        bloom = BloomFilter(max(capacity, len(self.exact)), self.error_rate)
+        for value in self.exact:
+            bloom.add(value)
+        self.bloom = bloom
+
+
+class RevocationRegistry:
+    """
+    Token revocation keyed by the `jti` claim.
+
+    Redis holds one `revoked:<jti>` key per revoked token with a TTL equal to the remaining
+    lifetime of the token, and every revocation is published on a channel. Each worker keeps
+    a `RevokedTokenSet` mirror, filled from Redis when the worker starts and updated by a
+    pub/sub listener thread, so `is_revoked` never makes a Redis round trip. Until the mirror
+    of a (forked) worker is loaded, and while its listener is down, checks are answered by
+    Redis instead; if Redis cannot answer either, the token is treated as revoked, or the
+    `RedisError` is raised when the caller passes `raise_on_error`. Expired
+    ids are purged by the loader thread, off the request path.
+
+    Blocking a user stores a cutoff time in a `revoked_user:<pk>` key instead: every token
+    whose `bep` (block epoch) claim is older than the cutoff is revoked. The cutoff is kept
+    for `user_ttl`, which must cover the longest token lifetime.
+
+    The Redis client is resolved on every call, so a forked worker uses its own pool.
+
+    Methods:
+    - revoke(self, *tokens: tuple[str, int]) -> None:
+        Revoke `(jti, exp)` pairs until they expire.
+    - revoke_user(self, user_id: int) -> None:
+        Revoke every token of a user issued with authorization claims read before now.
+    - is_revoked(self, jti: str, raise_on_error: bool = False) -> bool:
+        Check a token id against the local mirror.
+    - is_user_revoked(self, user_id: int, epoch: int, raise_on_error: bool = False) -> bool:
+        Check the block epoch of a token against the local mirror.
+    """
+    RETRY_SECONDS = 5
+    USER_MESSAGE_PREFIX = "user:"
+
+    def __init__(self, key_prefix, channel, capacity, error_rate, purge_interval,
+                 user_key_prefix="revoked_user", user_ttl=86400) -> None:
+        self.key_prefix = key_prefix
+        self.user_key_prefix = user_key_prefix
+        self.user_ttl = user_ttl
+        self.channel = channel
+        self.purge_interval = purge_interval
+        self.revoked = RevokedTokenSet(capacity, error_rate)
+        self._pid = None
+        self._mirror_pid = None
+        self._thread = None
+        self._generation = 0
+        self._loaded = threading.Event()
+        self._next_start = 0
+        self._lock = threading.Lock()
+
+    @property
+    def redis_client(self):
+        return get_redis_client()
+
+    def revoke(self, *tokens):
+        """
+        Revoke `(jti, exp)` pairs in a single pipelined round trip.
+        """
+        now = time.time()
+        tokens = [(jti, int(exp)) for jti, exp in tokens if exp > now]
+        if not tokens:
+            return
+        pipeline = self.redis_client.pipeline(transaction=False)
+        for jti, exp in tokens:
+            pipeline.set(f"{self.key_prefix}:{jti}", exp, ex=int(exp - now))
+            pipeline.publish(self.channel, f"{jti}:{exp}")
+        pipeline.execute()
+        for jti, exp in tokens:
+            self.revoked.add(jti, exp)
+
+    def revoke_user(self, user_id):
+        """
+        Revoke the tokens of a user whose block epoch is before the next second.
+        """
+        cutoff = int(time.time()) + 1
+        pipeline = self.redis_client.pipeline(transaction=False)
+        pipeline.set(f"{self.user_key_prefix}:{user_id}", cutoff, ex=self.user_ttl)
+        pipeline.publish(self.channel, f"{self.USER_MESSAGE_PREFIX}{user_id}:{cutoff}")
+        pipeline.execute()
+        self.revoked.add_user(user_id, cutoff, cutoff + self.user_ttl)
+
+    def is_revoked(self, jti, raise_on_error=False):
+        self._maintain()
+        if self._loaded.is_set():
+            return self.revoked.is_revoked(jti)
+        return self._check_redis(lambda: self.redis_client.exists(f"{self.key_prefix}:{jti}") > 0,
+                                 raise_on_error)
+
+    def is_user_revoked(self, user_id, epoch, raise_on_error=False):
+        self._maintain()
+        if self._loaded.is_set():
+            return self.revoked.is_user_revoked(user_id, epoch)
+
+        def check():
+            cutoff = self.redis_client.get(f"{self.user_key_prefix}:{user_id}")
+            return cutoff is not None and epoch < int(cutoff)
+        return self._check_redis(check, raise_on_error)
+
+    def _check_redis(self, check, raise_on_error):
+        try:
+            return check()
+        except redis.RedisError as e:
+            if raise_on_error:
+                raise
+            logger.warning("Token revocations are not loaded and Redis is unavailable: %s", e)
+            return True
+
+    def _maintain(self):
+        if self._pid != os.getpid() and time.time() >= self._next_start:
+            self.start()
+
+    def start(self):
+        """
+        Start mirroring revocations in this process.
+
+        It is called lazily on the first check in every (forked) worker. Subscribing happens
+        before the initial load so no revocation published in between is missed; the mirror
+        is used once the load is done.
+        """
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._loaded.clear()
+            self._generation += 1
+            if self._mirror_pid != os.getpid():
+                # A forked worker must not share the listener state of its parent.
+                self._mirror_pid = os.getpid()
+                self.revoked = RevokedTokenSet(self.revoked.bloom.capacity, self.revoked.error_rate)
+            self._pid = os.getpid()
+            try:
+                pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(**{self.channel: self._on_message})
+                self._thread = pubsub.run_in_thread(
+                    sleep_time=1, daemon=True, exception_handler=self._on_listener_error)
+            except redis.RedisError:
+                logger.exception("Could not subscribe to token revocations")
+                self._pid = None
+                self._next_start = time.time() + self.RETRY_SECONDS
+                return
+            threading.Thread(target=self._run, args=(self._generation,), daemon=True).start()
+
+    def _run(self, generation):
+        # Load the mirror, then purge it every `purge_interval` until the mirror is restarted.
+        if not self.load():
+            with self._lock:
+                if generation == self._generation and self._pid == os.getpid():
+                    self._thread.stop()
+                    self._next_start = time.time() + self.RETRY_SECONDS
+                    self._pid = None
+            return
+        self._loaded.set()
+        while True:
+            time.sleep(self.purge_interval)
+            if generation != self._generation:
+                return
+            self.revoked.purge()
+
+    def load(self, batch_size=1000):
+        """
+        Copy every revocation stored in Redis into the local mirror.
+
+        Returns
+        -------
+        bool
+            False if Redis failed before every revocation was copied.
+        """
+        try:
+            for prefix, add in [(self.key_prefix, self.revoked.add),
+                                (self.user_key_prefix, self._add_user)]:
+                keys = []
+                for key in self.redis_client.scan_iter(match=f"{prefix}:*", count=batch_size):
+                    keys.append(key)
+                    if len(keys) >= batch_size:
+                        self._load_batch(prefix, keys, add)
+                        keys = []
+                if keys:
+                    self._load_batch(prefix, keys, add)
+        except redis.RedisError:
+            logger.exception("Could not load token revocations")
+            return False
+        return True
+
+    def _load_batch(self, prefix, keys, add):
+        prefix_length = len(prefix) + 1
+        redis_client = self.redis_client
+        mget = redis_client.mget_nonatomic if is_cluster(redis_client) else redis_client.mget
+        for key, value in zip(keys, mget(keys)):
+            if value is not None:
+                add(key[prefix_length:], int(value))
+
+    def _add_user(self, user_id, cutoff):
+        self.revoked.add_user(user_id, cutoff, cutoff + self.user_ttl)
+
+    def _on_message(self, message):
+        data = message["data"]
+        key, _, value = data.rpartition(":")
+        if data.startswith(self.USER_MESSAGE_PREFIX):
+            self._add_user(key[len(self.USER_MESSAGE_PREFIX):], int(value))
+        else:
+            self.revoked.add(key, int(value))
+
+    def _on_listener_error(self, exception, pubsub, thread):
+        # Restart (and reload) on the next check; revocations published meanwhile are in Redis.
+        logger.warning("Token revocation listener stopped: %s", exception)
+        self._loaded.clear()
+        thread.stop()
+        pubsub.close()
+        self._next_start = time.time() + self.RETRY_SECONDS
+        self._pid = None
+
+
+def load_revocation_registry_lazy():
+    global revocation_registry
+    if revocation_registry is None:
+        config = settings.TOKEN_REVOCATION
+        revocation_registry = RevocationRegistry(
+            key_prefix=config["KEY_PREFIX"],
+            channel=config["CHANNEL"],
+            capacity=config["BLOOM_CAPACITY"],
+            error_rate=config["BLOOM_ERROR_RATE"],
+            purge_interval=config["PURGE_INTERVAL"],
+            user_key_prefix=config["USER_KEY_PREFIX"],
+            user_ttl=int(max(api_settings.ACCESS_TOKEN_LIFETIME,
+                             api_settings.REFRESH_TOKEN_LIFETIME).total_seconds()),
+        )
+    return revocation_registry
+
+
+def revoke_tokens(*tokens):
+    """
+    Revoke simplejwt tokens until they expire.
+
+    Parameters
+    ----------
+    *tokens : Token
+        Validated access or refresh tokens.
+    """
+    load_revocation_registry_lazy().revoke(*[(token["jti"], token["exp"]) for token in tokens])
+
+
+def revoke_user_tokens(user_id):
+    """
+    Revoke every token of a user that carries authorization claims read before now.
+
+    Parameters
+    ----------
+    user_id : int
+        Primary key of the user, e.g. right after the user is blocked.
+    """
+    load_revocation_registry_lazy().revoke_user(user_id)
@@ -0,0 +1,84 @@
+from django.conf import settings
+from rest_framework_simplejwt.settings import api_settings
+
+from redis_service.client import get_redis_client
+from redis_service.scripts import ROTATE_REFRESH_TOKEN
+
+FAMILY_CLAIM = "fam"
+FAMILY_EXPIRY_CLAIM = "fexp"
+REVOKED_FAMILY = "revoked"
+
+refresh_token_families = None
+
+
+class RefreshTokenFamilies:
+    """
+    Refresh token rotation with reuse detection, stored in Redis.
+
+    Every refresh token belongs to a family: the chain of tokens rotated from one login.
+    The family id is the `jti` of the first token of the chain and is carried by the
+    rotated tokens in the `fam` claim, so login itself writes nothing. Redis keeps one
+    `refresh_family:<id>` key holding the `jti` of the only token of the family that may
+    still be used. Presenting any older token means it leaked, and the family is revoked.
+
+    The `exp` of the login token is carried by the rotated tokens in the `fexp` claim, and
+    no rotated token outlives it, so rotating cannot keep a login alive forever.
+
+    The Redis client is resolved on every call, so a forked worker uses its own pool.
+
+    Methods:
+    - rotate(self, refresh: RefreshToken) -> bool:
+        Consume the token and give it a new `jti`, `exp` and `iat` in one script call.
+    - revoke(self, refresh: RefreshToken) -> None:
+        Revoke the whole family of the token, e.g. on logout.
+    """
+
+    def __init__(self, key_prefix, lifetime) -> None:
+        self.key_prefix = key_prefix
+        self.ttl = int(lifetime.total_seconds())
+        # The script object only caches the SHA; it is run on the current client.
+        self._rotate = get_redis_client().register_script(ROTATE_REFRESH_TOKEN)
+
+    @property
+    def redis_client(self):
+        return get_redis_client()
+
+    def family_key(self, refresh):
+        family = refresh.get(FAMILY_CLAIM) or refresh[api_settings.JTI_CLAIM]
+        return f"{self.key_prefix}:{family}"
+
+    def rotate(self, refresh):
+        """
+        Turn `refresh` into its replacement if it is the latest token of its family.
+
+        Returns
+        -------
+        bool
+            False when the token had already been used; its family is revoked and the
+            token must be rejected.
+        """
+        key = self.family_key(refresh)
+        used_jti = refresh[api_settings.JTI_CLAIM]
+        refresh[FAMILY_CLAIM] = key[len(self.key_prefix) + 1:]
+        family_exp = refresh.get(FAMILY_EXPIRY_CLAIM, refresh["exp"])
+        refresh[FAMILY_EXPIRY_CLAIM] = family_exp
+        refresh.set_jti()
+        refresh.set_exp()
+        refresh.set_iat()
+        refresh["exp"] = min(refresh["exp"], family_exp)
+        return bool(self._rotate(keys=[key],
+                                 args=[used_jti, refresh[api_settings.JTI_CLAIM], self.ttl],
+                                 client=self.redis_client))
+
+    def revoke(self, refresh):
+        self.redis_client.set(self.family_key(refresh), REVOKED_FAMILY, ex=self.ttl)
+
+
+def load_refresh_token_families_lazy():
+    global refresh_token_families
+    if refresh_token_families is None:
+        refresh_token_families = RefreshTokenFamilies(
+            key_prefix=settings.REFRESH_TOKEN_ROTATION["KEY_PREFIX"],
+            lifetime=api_settings.REFRESH_TOKEN_LIFETIME,
+        )
+    return refresh_token_families
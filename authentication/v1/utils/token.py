@@ -1,12 +1,12 @@
-import jwt
 from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
 from django.core.exceptions import ValidationError
-from jose import jwt
-from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
 
 from authentication.choices import *
 from authentication.models import User
+from authentication.tokens import AccessToken, RefreshToken
+from authentication.v1.utils.claims import add_authorization_claims
+from authentication.v1.utils.verifier import load_token_verifier_lazy
 from common.variables import MUST_BE_ANON
 
 
@@ -24,23 +24,52 @@ def decode_token(token):
     `dict`
         A dictionary containing the decoded information from the provided JWT token.
 
+    Raises:
+    ----------
+    `TokenBackendError`
+        If the signature, the `kid` or the expiry of the token is invalid.
+
     Notes:
     ----------
-    - The function extracts information using the provided JWT token, the signing key, and specified algorithms.
-    - `verify_aud` claim is set to `False` to disable audience verification.
+    - The token is verified with the key ring key named by its `kid` header (tokens without `kid` use the legacy HS256 key).
+    - Only the signature, `exp` and `jti` are checked, see `TokenVerifier`; both access and refresh tokens are accepted.
     """
-    token = str(token).replace('Bearer ', '')
-    decoded_token = jwt.decode(
-        token,
-        settings.SIMPLE_JWT["SIGNING_KEY"],
-        algorithms=[settings.SIMPLE_JWT["ALGORITHM"]],
-        options={
-            "verify_aud": False,
-        },
-    )
+    token = str(token)
+    if token.startswith('Bearer '):
+        token = token[len('Bearer '):]
+    decoded_token = load_token_verifier_lazy().verify(token)
     return decoded_token
 
 
+SESSION_MODE = "session"
+STATELESS_MODE = "stateless"
+
+
+def get_anonymous_token(request):
+    """
+    Read the anonymous token sent with the request.
+
+    Parameters:
+    ----------
+    * `request`: `HttpRequest`
+        The Django `HttpRequest` object.
+
+    Returns:
+    ----------
+    `str` or `None`
+        The raw anonymous token, or None if the request does not carry one.
+
+    Notes:
+    ----------
+    - In `stateless` mode the token is read from the `X-Anon-Token` header, then from the `anon_token` cookie.
+    - In `session` mode the token is read back from `request.session`, which costs a session table query.
+    """
+    if settings.ANONYMOUS_TOKEN["MODE"] == SESSION_MODE:
+        return request.session.get("anon_token")
+    return (request.META.get(settings.ANONYMOUS_TOKEN["HEADER"])
+            or request.COOKIES.get(settings.ANONYMOUS_TOKEN["COOKIE_NAME"]))
+
+
 def generate_token(request, user=None):
     """
     Generate authentication token based on user type.
@@ -65,8 +94,9 @@ def generate_token(request, user=None):
 
     Notes:
     ----------
-    - For None `user`, an `AccessToken` is generated for an `AnonymousUser`.
+    - For None `user`, an `AccessToken` is generated for an `AnonymousUser`. It is only stored in the session when `ANONYMOUS_TOKEN["MODE"]` is `session`.
     - For other `user` values, a `RefreshToken` and an access token (formatted as Bearer token) are generated for the request user.
+    - With `AUTHORIZATION_CLAIMS["ENABLED"]` both tokens carry the user's `state`, `staff` flag and block epoch (`bep`).
     -----
     """
 
@@ -74,14 +104,15 @@ def generate_token(request, user=None):
         if not isinstance(request.user, AnonymousUser):
             raise ValueError({"error": MUST_BE_ANON}, status=400)
 
-        anon_token = AccessToken.for_user(request.user)
-        request.session["anon_token"] = str(anon_token)
-        return {"anon_token": str(anon_token)}
+        anon_token = str(AccessToken.for_user(request.user))
+        if settings.ANONYMOUS_TOKEN["MODE"] == SESSION_MODE:
+            request.session["anon_token"] = anon_token
+        return {"anon_token": anon_token}
     else:
         if not isinstance(user, User):
             # TODO prevet blocker user from accessing server (https://www.nginx.com/blog/validating-oauth-2-0-access-tokens-nginx/)
             raise ValidationError(
                 'The given user should be instanse of User model.', 400)
-        refresh = RefreshToken.for_user(user)
+        refresh = add_authorization_claims(RefreshToken.for_user(user), user)
         access_token = str(refresh.access_token)
         return {"access": f"Bearer {access_token}", "refresh": refresh}
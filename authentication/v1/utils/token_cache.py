@@ -0,0 +1,198 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+from authentication.v1.utils.claims import (ACTIVE_CLAIM, BLOCK_EPOCH_CLAIM,
+                                            STAFF_CLAIM, STATE_CLAIM,
+                                            SUPERUSER_CLAIM)
+from authentication.v1.utils.revocation import load_revocation_registry_lazy
+
+token_cache = None
+
+
+class UserSnapshot:
+    """
+    Lightweight, read-only copy of the `User` fields needed by permissions and views.
+
+    It is stored next to the decoded claims in the verified-token cache so a cache
+    hit can populate `request.user` without touching the database. A snapshot built
+    from token claims holds only the authorization fields; reading any other attribute
+    (`phone_number`, `created_at`, ...) loads the `User` row once, on first access.
+    `is_bocked` is derived from the block cutoff of the user; claims missing from older
+    tokens are loaded from the row like any other field.
+    """
+    is_anonymous = False
+    is_authenticated = True
+
+    FIELDS = ("pk", "phone_number", "state", "is_bocked",
+              "is_active", "is_staff", "is_superuser")
+
+    def __init__(self, pk, phone_number=None, state=None, is_bocked=False,
+                 is_active=True, is_staff=False, is_superuser=False) -> None:
+        self.pk = pk
+        self.id = pk
+        self.phone_number = phone_number
+        self.state = state
+        self.is_bocked = is_bocked
+        self.is_active = is_active
+        self.is_staff = is_staff
+        self.is_superuser = is_superuser
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(**{field: getattr(user, field) for field in cls.FIELDS})
+
+    CLAIM_FIELDS = ((STATE_CLAIM, "state"), (STAFF_CLAIM, "is_staff"),
+                    (SUPERUSER_CLAIM, "is_superuser"), (ACTIVE_CLAIM, "is_active"))
+
+    @classmethod
+    def from_claims(cls, user_id, claims):
+        snapshot = cls.__new__(cls)
+        snapshot.pk = snapshot.id = user_id
+        for claim, field in cls.CLAIM_FIELDS:
+            if claim in claims:
+                setattr(snapshot, field, claims[claim])
+        snapshot.is_bocked = load_revocation_registry_lazy().is_user_revoked(
+            user_id, claims[BLOCK_EPOCH_CLAIM])
+        return snapshot
+
+    def __getattr__(self, name):
+        # Only reached for attributes the snapshot does not hold.
+        if name.startswith("__") or name == "_user":
+            raise AttributeError(name)
+        user = self.__dict__.get("_user")
+        if user is None:
+            user = get_user_model().objects.get(pk=self.__dict__["pk"])
+            self.__dict__["_user"] = user
+        return getattr(user, name)
+
+    def __eq__(self, other):
+        return getattr(other, "pk", None) == self.pk and self.pk is not None
+
+    def __hash__(self):
+        return hash(self.pk)
+
+    def __str__(self) -> str:
+        return str(self.phone_number)
+
+
+class CachedToken:
+    __slots__ = ("raw_token", "validated_token", "user", "expires_at")
+
+    def __init__(self, raw_token, validated_token, user, expires_at) -> None:
+        self.raw_token = raw_token
+        self.validated_token = validated_token
+        self.user = user
+        self.expires_at = expires_at
+
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU of already-verified access tokens keyed by the token signature.
+
+    Methods:
+    - get(self, signature: bytes, raw_token: bytes) -> CachedToken | None:
+        Return the cached entry for a token, or None if it is missing or expired.
+    - set(self, signature: bytes, raw_token: bytes, validated_token, user, expires_at: float) -> None:
+        Store a verified token and the snapshot of its user.
+    - invalidate_user(self, user_id) -> int:
+        Drop every cached token that belongs to the given user.
+    """
+
+    def __init__(self, max_size=10000, max_entry_age=None) -> None:
+        self.max_size = max_size
+        self.max_entry_age = max_entry_age
+        self._entries = OrderedDict()
+        self._signatures_by_user = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, signature, raw_token):
+        with self._lock:
+            entry = self._entries.get(signature)
+            if entry is None or entry.raw_token != raw_token:
+                self.misses += 1
+                return None
+            if entry.expires_at <= time.time():
+                self._pop(signature)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(signature)
+            self.hits += 1
+            return entry
+
+    def set(self, signature, raw_token, validated_token, user, expires_at):
+        if self.max_entry_age:
+            expires_at = min(expires_at, time.time() + self.max_entry_age)
+        with self._lock:
+            if signature in self._entries:
+                self._pop(signature)
+            self._entries[signature] = CachedToken(
+                raw_token, validated_token, user, expires_at)
+            self._signatures_by_user.setdefault(user.pk, set()).add(signature)
+            while len(self._entries) > self.max_size:
+                oldest = next(iter(self._entries))
+                self._pop(oldest)
+                self.evictions += 1
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            signatures = self._signatures_by_user.pop(user_id, set())
+            for signature in signatures:
+                self._entries.pop(signature, None)
+            return len(signatures)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._signatures_by_user.clear()
+
+    def stats(self):
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _pop(self, signature):
+        entry = self._entries.pop(signature, None)
+        if entry is None:
+            return
+        signatures = self._signatures_by_user.get(entry.user.pk)
+        if signatures is not None:
+            signatures.discard(signature)
+            if not signatures:
+                del self._signatures_by_user[entry.user.pk]
+
+
+def load_token_cache_lazy():
+    global token_cache
+    if token_cache is None:
+        token_cache = VerifiedTokenCache(
+            max_size=settings.TOKEN_CACHE["MAX_SIZE"],
+            max_entry_age=settings.TOKEN_CACHE["MAX_ENTRY_AGE"],
+        )
+    return token_cache
+
+
+def invalidate_cached_user(user_id):
+    """
+    Drop every verified token of the given user from this process's cache.
+
+    Call it whenever a field held by `UserSnapshot` changes (block, state, profile updates),
+    so the next request of that user is verified and loaded from the database again.
+
+    Parameters
+    ----------
+    user_id : int
+        Primary key of the user whose cached tokens should be removed.
+    """
+    if token_cache is not None:
+        token_cache.invalidate_user(user_id)
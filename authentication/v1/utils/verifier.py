@@ -0,0 +1,175 @@
+import binascii
+import hashlib
+import hmac
+import time
+
+import orjson
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import padding
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenBackendError
+from rest_framework_simplejwt.settings import api_settings
+
+from authentication.v1.utils.keyring import EDDSA, HS256, RS256, load_key_ring_lazy
+
+URLSAFE_TO_STANDARD = bytes.maketrans(b"-_", b"+/")
+
+token_verifier = None
+
+
+def b64decode_segment(segment: bytes) -> bytes:
+    # One translate and a C decode; `base64.urlsafe_b64decode` makes two more copies.
+    standard = segment.translate(URLSAFE_TO_STANDARD)
+    data = binascii.a2b_base64(standard + b"=" * (-len(segment) % 4), strict_mode=True)
+    # Strict decoding still ignores the unused bits of the last character and accepts
+    # explicit padding; only the canonical encoding is accepted, so every token has one
+    # spelling and cannot be varied to miss the token caches.
+    if binascii.b2a_base64(data, newline=False).rstrip(b"=") != standard:
+        raise binascii.Error("Non-canonical base64 segment")
+    return data
+
+
+class TokenVerifier:
+    """
+    Verifier for the tokens this service issues.
+
+    It only supports our token profile: a `kid` (or legacy kid-less HS256) header, a
+    signature by one of the key ring keys, an `exp` claim, a `jti` claim and optionally
+    an expected `token_type`. Everything that does not depend on the token is prepared
+    once: each key gets a pre-keyed HMAC or its public key object, and the decoded
+    header segments seen so far are mapped straight to their key, so a token costs one
+    signature check and one JSON parse of the claims.
+
+    Methods:
+    - verify(self, token: str | bytes, token_type: str | None = None) -> dict:
+        Return the claims of a valid token or raise `TokenBackendError`.
+    """
+    MAX_CACHED_HEADERS = 64
+
+    def __init__(self, key_ring, token_type_claim="token_type", jti_claim="jti", leeway=0) -> None:
+        self.key_ring = key_ring
+        self.token_type_claim = token_type_claim
+        self.jti_claim = jti_claim
+        self.leeway = leeway
+        self._keys = {}
+        self._headers = {}
+        for key in key_ring.keys.values():
+            self._keys[key.kid] = self._prepare(key)
+
+    @staticmethod
+    def _prepare(key):
+        if key.algorithm == HS256:
+            secret = key.verifying_key
+            if isinstance(secret, str):
+                secret = secret.encode()
+            return key.algorithm, hmac.new(secret, digestmod=hashlib.sha256)
+        return key.algorithm, key.verifying_key
+
+    def _key_for_header(self, header_segment):
+        key = self._headers.get(header_segment)
+        if key is not None:
+            return key
+        try:
+            header = orjson.loads(b64decode_segment(header_segment))
+        except (binascii.Error, ValueError):
+            raise TokenBackendError(_("Token is invalid or expired"))
+        if not isinstance(header, dict):
+            raise TokenBackendError(_("Token is invalid or expired"))
+        signing_key = self.key_ring.get_verifying_key(header)
+        if signing_key is None:
+            raise TokenBackendError(_("Invalid algorithm specified"))
+        key = self._keys[signing_key.kid]
+        # Only headers of real keys are cached, and only a few of them, so crafted
+        # headers cannot grow the cache.
+        if len(self._headers) < self.MAX_CACHED_HEADERS:
+            self._headers[header_segment] = key
+        return key
+
+    def _check_signature(self, key, signing_input, signature):
+        algorithm, verifying_key = key
+        if algorithm == HS256:
+            mac = verifying_key.copy()
+            mac.update(signing_input)
+            return hmac.compare_digest(mac.digest(), signature)
+        try:
+            if algorithm == RS256:
+                verifying_key.verify(signature, signing_input, padding.PKCS1v15(), hashes.SHA256())
+            elif algorithm == EDDSA:
+                verifying_key.verify(signature, signing_input)
+            else:
+                return False
+        except InvalidSignature:
+            return False
+        return True
+
+    def verify(self, token, token_type=None):
+        """
+        Verify a token and return its claims.
+
+        Parameters
+        ----------
+        token : str or bytes
+            The encoded JWT, without the `Bearer` prefix.
+        token_type : str, optional
+            The expected `token_type` claim, e.g. `access`; not checked when omitted.
+
+        Returns
+        -------
+        dict
+            The claims of the token.
+
+        Raises
+        ------
+        TokenBackendError
+            If the token is malformed, signed by an unknown key, has a bad signature,
+            is expired, has no id or has the wrong type.
+        """
+        if isinstance(token, str):
+            try:
+                token = token.encode("ascii")
+            except UnicodeEncodeError:
+                raise TokenBackendError(_("Token is invalid or expired"))
+        signing_input, _dot, signature_segment = token.rpartition(b".")
+        header_segment, _dot, payload_segment = signing_input.partition(b".")
+        if not header_segment or not payload_segment or b"." in payload_segment:
+            raise TokenBackendError(_("Token is invalid or expired"))
+
+        key = self._key_for_header(header_segment)
+        try:
+            signature = b64decode_segment(signature_segment)
+        except binascii.Error:
+            raise TokenBackendError(_("Token is invalid or expired"))
+        if not self._check_signature(key, signing_input, signature):
+            raise TokenBackendError(_("Token is invalid or expired"))
+
+        try:
+            claims = orjson.loads(b64decode_segment(payload_segment))
+            exp = claims["exp"]
+            expired = exp <= time.time() - self.leeway
+        except (binascii.Error, ValueError, TypeError, KeyError):
+            raise TokenBackendError(_("Token is invalid or expired"))
+        if expired:
+            raise TokenBackendError(_("Token is invalid or expired"))
+        if self.jti_claim not in claims:
+            raise TokenBackendError(_("Token has no id"))
+        if token_type is not None and claims.get(self.token_type_claim) != token_type:
+            raise TokenBackendError(_("Token has wrong type"))
+        return claims
+
+
+def load_token_verifier_lazy():
+    """
+    Return the process verifier, rebuilt whenever the key ring is reloaded.
+    """
+    global token_verifier
+    key_ring = load_key_ring_lazy()
+    if token_verifier is None or token_verifier.key_ring is not key_ring:
+        token_verifier = TokenVerifier(
+            key_ring,
+            token_type_claim=api_settings.TOKEN_TYPE_CLAIM,
+            jti_claim=api_settings.JTI_CLAIM,
+            leeway=api_settings.LEEWAY.total_seconds()
+            if hasattr(api_settings.LEEWAY, "total_seconds") else api_settings.LEEWAY,
+        )
+    return token_verifier
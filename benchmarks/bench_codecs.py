@@ -0,0 +1,72 @@
+"""
+Size and (de)serialization cost of RedisStore values per codec.
+
+Compares the plain JSON used before the codec layer with the orjson and msgpack codecs on
+the OTP, personal-info and block entries. Run from the project root:
+
+    python -m benchmarks.bench_codecs [--iterations 100000]
+"""
+import argparse
+import json
+import os
+import time
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "JWTBasedAuthentication.settings")
+django.setup()
+
+from common import variables  # noqa: E402
+from redis_service.codecs import ValueCodec, decode_legacy  # noqa: E402
+
+VALUES = {
+    "otp": {
+        variables.VERIFICATION_CODE: "123456",
+        variables.EXPIRTION_TIME: 1718000000.0,
+        variables.PHONE_NUMBER: "00989121234567",
+    },
+    "personal info": {
+        variables.PERSONAL_INFO: {"firstName": "Ali", "lastName": "Rezaei", "fatherName": "Reza",
+                                  "alive": True, "birthDate": "1369/01/01"},
+        variables.PHONE_NUMBER: "00989121234567",
+        variables.COUNT: 1,
+        variables.IDENTITY_NUMBER: "0012345678",
+    },
+    "block": {"user_id": 123456, "blocked_at": "2024-06-10 12:00:00"},
+}
+
+
+class LegacyJson:
+    def encode(self, value):
+        return json.dumps(value).encode()
+
+    def decode(self, payload):
+        return decode_legacy(payload)
+
+
+def per_call_ns(func, value, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func(value)
+    return (time.perf_counter() - start) / iterations * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=100000)
+    args = parser.parse_args()
+
+    codecs = {"json (legacy)": LegacyJson(), "orjson": ValueCodec("orjson"),
+              "msgpack": ValueCodec("msgpack")}
+    print(f"{'value':<14} {'codec':<14} {'bytes':>6} {'encode':>10} {'decode':>10}")
+    for value_name, value in VALUES.items():
+        for codec_name, codec in codecs.items():
+            payload = codec.encode(value)
+            encode_ns = per_call_ns(codec.encode, value, args.iterations)
+            decode_ns = per_call_ns(codec.decode, payload, args.iterations)
+            print(f"{value_name:<14} {codec_name:<14} {len(payload):>6} "
+                  f"{encode_ns:>7.0f} ns {decode_ns:>7.0f} ns")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Throughput of batch token minting against one `RefreshToken.for_user` per user.
+
+Run from the project root:
+
+    python -m benchmarks.bench_minting [--users 20000]
+"""
+import argparse
+import os
+import time
+from types import SimpleNamespace
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "JWTBasedAuthentication.settings")
+django.setup()
+
+from authentication.tokens import RefreshToken  # noqa: E402
+from authentication.v1.utils.keyring import load_key_ring_lazy  # noqa: E402
+from authentication.v1.utils.minting import load_token_minter_lazy  # noqa: E402
+
+
+def simplejwt_pairs(user_ids):
+    pairs = []
+    for user_id in user_ids:
+        refresh = RefreshToken.for_user(SimpleNamespace(pk=user_id))
+        pairs.append({"user_id": user_id, "access": f"Bearer {refresh.access_token}",
+                      "refresh": str(refresh)})
+    return pairs
+
+
+def tokens_per_second(func, user_ids):
+    start = time.perf_counter()
+    pairs = func(user_ids)
+    elapsed = time.perf_counter() - start
+    return len(pairs) * 2 / elapsed, pairs
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=20000)
+    args = parser.parse_args()
+
+    user_ids = list(range(1, args.users + 1))
+    minter = load_token_minter_lazy()
+    minter.mint(user_ids[:100])  # warm up
+
+    baseline, _ = tokens_per_second(simplejwt_pairs, user_ids)
+    batch, pairs = tokens_per_second(minter.mint, user_ids)
+
+    # Minted tokens must verify like any login token.
+    key_ring = load_key_ring_lazy()
+    sample = pairs[-1]
+    assert key_ring.decode(sample["refresh"])["token_type"] == "refresh"
+    assert key_ring.decode(sample["access"].replace("Bearer ", ""))["pk"] == user_ids[-1]
+
+    print(f"algorithm:                {minter.key.algorithm} (kid {minter.key.kid})")
+    print(f"users:                    {len(user_ids):,}")
+    print(f"RefreshToken.for_user:    {baseline:10,.0f} tokens/s")
+    print(f"TokenMinter.mint:         {batch:10,.0f} tokens/s ({batch / baseline:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Offline load test of the OTP gateway with local fake providers: routing share, failover
+and send latency per provider, from several threads at once.
+
+Run from the project root:
+
+    python -m benchmarks.bench_otp_gateway [--sends 2000] [--threads 16]
+"""
+import argparse
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "JWTBasedAuthentication.settings")
+django.setup()
+
+from authentication.v1.utils.otp_gateway import SMS, FakeProvider, OTPGateway  # noqa: E402
+
+PROVIDERS = [
+    # name, latency in seconds, error rate
+    ("fast_flaky", 0.005, 0.3),
+    ("fast", 0.01, 0.01),
+    ("slow", 0.05, 0.0),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sends", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=16)
+    args = parser.parse_args()
+
+    gateway = OTPGateway(window_seconds=60, min_samples=20, max_error_rate=0.2)
+    providers = [FakeProvider(name, SMS, latency, error_rate, outbox_size=None) for name, latency, error_rate in PROVIDERS]
+    for provider in providers:
+        gateway.register(provider)
+
+    def send(index):
+        start = time.perf_counter()
+        try:
+            gateway.send(SMS, f"0912{index:07d}", "123456")
+            return time.perf_counter() - start, True
+        except Exception:
+            return time.perf_counter() - start, False
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.threads) as executor:
+        results = list(executor.map(send, range(args.sends)))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(seconds for seconds, _ in results)
+    failed = sum(not ok for _, ok in results)
+    print(f"{args.sends} sends in {elapsed:.2f} s ({args.sends / elapsed:.0f}/s), {failed} failed")
+    print(f"send latency p50 {statistics.median(latencies) * 1000:.1f} ms, "
+          f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:.1f} ms")
+    for provider in providers:
+        stats = gateway.stats()[provider.name]
+        print(f"{provider.name:12} sent {len(provider.outbox):5}  error rate {stats['error_rate']:.2f}  "
+              f"p99 {(stats['p99'] or 0) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Per-request cost of the token revocation check with 1M revoked tokens.
+
+Run from the project root:
+
+    python -m benchmarks.bench_revocation [--revoked 1000000] [--checks 200000]
+"""
+import argparse
+import os
+import time
+import tracemalloc
+import uuid
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "JWTBasedAuthentication.settings")
+django.setup()
+
+from authentication.v1.utils.revocation import (RevocationRegistry,  # noqa: E402
+                                                RevokedTokenSet)
+
+
+def per_call_ns(func, values):
+    start = time.perf_counter()
+    for value in values:
+        func(value)
+    return (time.perf_counter() - start) / len(values) * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--revoked", type=int, default=1000000)
+    parser.add_argument("--checks", type=int, default=200000)
+    args = parser.parse_args()
+
+    exp = int(time.time()) + 7 * 24 * 3600
+    revoked_ids = [uuid.uuid4().hex for _ in range(args.revoked)]
+    valid_ids = [uuid.uuid4().hex for _ in range(args.checks)]
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    registry = RevocationRegistry("revoked", "revoked_tokens", args.revoked, 0.001, 60)
+    registry._pid = registry._mirror_pid = os.getpid()  # no Redis listener in the benchmark
+    registry._loaded.set()
+    registry.revoked = RevokedTokenSet(args.revoked, 0.001)
+    for jti in revoked_ids:
+        registry.revoked.add(jti, exp)
+    fill_seconds = time.perf_counter() - start
+    memory_mb = tracemalloc.get_traced_memory()[0] / 1e6
+    tracemalloc.stop()
+
+    revoked_sample = revoked_ids[:args.checks]
+    bloom = registry.revoked.bloom
+    false_positives = sum(1 for jti in valid_ids if registry.revoked.is_revoked(jti) is False
+                          and int(jti, 16) in bloom)
+
+    print(f"revoked tokens:           {len(registry.revoked):,}")
+    print(f"fill time:                {fill_seconds:.2f} s")
+    print(f"mirror memory:            {memory_mb:.1f} MB (bloom {len(bloom.bits) / 1e6:.1f} MB, "
+          f"{bloom.hash_count} probes)")
+    print(f"bloom false positives:    {false_positives / len(valid_ids):.4%}")
+    print(f"empty loop:               {per_call_ns(lambda jti: None, valid_ids):8.0f} ns/check")
+    print(f"is_revoked, valid token:  {per_call_ns(registry.is_revoked, valid_ids):8.0f} ns/check")
+    print(f"is_revoked, revoked:      {per_call_ns(registry.is_revoked, revoked_sample):8.0f} ns/check")
+
+
+if __name__ == "__main__":
+    main()
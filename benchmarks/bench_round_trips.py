@@ -0,0 +1,121 @@
+"""
+Redis round trips and latency of the OTP issue, login and verify-user flows.
+
+The "before" flows replay the commands the endpoints sent before RedisStore grew batched
+and atomic operations; the "after" flows call the serializers the endpoints use now.
+Needs the Redis server of the settings. Run from the project root:
+
+    python -m benchmarks.bench_round_trips [--iterations 2000]
+"""
+import argparse
+import json
+import os
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "JWTBasedAuthentication.settings")
+django.setup()
+
+from authentication.v1.serializers import (GetVerificationCodeSerializer,  # noqa: E402
+                                           LoginSerializer,
+                                           UserVerificationSerializer)
+from common import variables  # noqa: E402
+from redis_service.client import get_redis_client  # noqa: E402
+from redis_service.keys import user_key  # noqa: E402
+from redis_service.metrics import InstrumentedPipeline, InstrumentedRedis  # noqa: E402
+
+USER = SimpleNamespace(pk="bench", phone_number="00989120000000")
+OTP_KEY = user_key(variables.VERIFICATION_CODE, USER.pk)
+INFO_KEY = user_key(variables.PERSONAL_INFO, USER.pk)
+OTP = {variables.VERIFICATION_CODE: "123456", variables.EXPIRTION_TIME: 0,
+       variables.PHONE_NUMBER: USER.phone_number}
+INFO = {variables.PERSONAL_INFO: {}, variables.PHONE_NUMBER: USER.phone_number,
+        variables.COUNT: 0, variables.IDENTITY_NUMBER: "0000000000"}
+
+
+def issue_before(client):
+    if not client.get(OTP_KEY):
+        client.set(OTP_KEY, json.dumps(OTP))
+        client.expire(OTP_KEY, 120)
+
+
+def login_before(client):
+    client.get(OTP_KEY)
+    client.delete(OTP_KEY)
+
+
+def verify_user_before(client):
+    client.get(INFO_KEY)
+    client.set(INFO_KEY, json.dumps(INFO))
+    client.expire(INFO_KEY, 60)
+
+
+def issue_after(client):
+    GetVerificationCodeSerializer().add_otp_to_redis(USER, "123456", 0)
+
+
+def login_after(client):
+    LoginSerializer().get_original_otp(USER, "123456")
+
+
+def verify_user_after(client):
+    serializer = UserVerificationSerializer()
+    serializer.get_personal_info(USER)
+    serializer.add_preview_to_redis({}, USER, 0, "0000000000")
+
+
+FLOWS = [
+    ("otp issue", issue_before, issue_after, OTP_KEY),
+    ("login", login_before, login_after, None),
+    ("verify user", verify_user_before, verify_user_after, INFO_KEY),
+]
+
+
+def measure(flow, client, cleanup_key, iterations):
+    round_trips = 0
+    execute_command = InstrumentedRedis.execute_command
+    execute = InstrumentedPipeline.execute
+
+    def count_command(self, *args, **options):
+        nonlocal round_trips
+        round_trips += 1
+        return execute_command(self, *args, **options)
+
+    def count_pipeline(self, *args, **kwargs):
+        nonlocal round_trips
+        round_trips += 1
+        return execute(self, *args, **kwargs)
+
+    elapsed = 0.0
+    for _ in range(iterations):
+        client.set(OTP_KEY, json.dumps(OTP), ex=120)
+        if cleanup_key:
+            client.delete(cleanup_key)
+        with mock.patch.object(InstrumentedRedis, "execute_command", count_command), \
+                mock.patch.object(InstrumentedPipeline, "execute", count_pipeline):
+            start = time.perf_counter()
+            flow(client)
+            elapsed += time.perf_counter() - start
+    return round_trips / iterations, elapsed / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    client = get_redis_client()
+    print(f"{'flow':<12} {'before':>22} {'after':>22}")
+    for name, before, after, cleanup_key in FLOWS:
+        trips_before, us_before = measure(before, client, cleanup_key, args.iterations)
+        trips_after, us_after = measure(after, client, cleanup_key, args.iterations)
+        print(f"{name:<12} {trips_before:5.1f} trips {us_before:7.0f} us "
+              f"{trips_after:5.1f} trips {us_after:7.0f} us")
+    client.delete(OTP_KEY, INFO_KEY)
+
+
+if __name__ == "__main__":
+    main()
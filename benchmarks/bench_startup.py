@@ -0,0 +1,58 @@
+"""
+Process startup cost: `django.setup()` plus the URLconf, which imports every view, serializer
+and utility module, measured in fresh interpreters.
+
+The same is measured for the imports that are now deferred to first use (pandas and the
+Owncloud client); before they were deferred every process paid for them at startup.
+
+Run from the project root:
+
+    python -m benchmarks.bench_startup [--runs 10]
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+SETUP = (
+    "import os, django; "
+    "os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'JWTBasedAuthentication.settings'); "
+    "django.setup(); import JWTBasedAuthentication.urls"
+)
+DEFERRED = {
+    "pandas": "import pandas",
+    "owncloud": "import common.owncloud.owncloud_handler",
+}
+CHECK_DEFERRED = (
+    SETUP + "; import sys; "
+    "print(','.join(name for name in ('pandas', 'owncloud', 'pika') if name in sys.modules))"
+)
+
+
+def median_ms(code, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True, capture_output=True)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    baseline = median_ms("pass", args.runs)
+    startup = median_ms(SETUP, args.runs) - baseline
+    print(f"django.setup() + URLconf: {startup:8.1f} ms")
+    for name, code in DEFERRED.items():
+        print(f"deferred {name + ' import:':18} {median_ms(code, args.runs) - baseline:8.1f} ms")
+    loaded = subprocess.run([sys.executable, "-c", CHECK_DEFERRED], check=True,
+                            capture_output=True, text=True).stdout.strip()
+    print(f"loaded at startup: {loaded or 'none of pandas, owncloud, pika'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Per-token cost of access token verification: simplejwt/PyJWT against `TokenVerifier`.
+
+Run from the project root:
+
+    python -m benchmarks.bench_verifier [--tokens 20000]
+"""
+import argparse
+import os
+import time
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "JWTBasedAuthentication.settings")
+django.setup()
+
+from authentication.tokens import AccessToken  # noqa: E402
+from authentication.v1.utils.keyring import load_key_ring_lazy  # noqa: E402
+from authentication.v1.utils.minting import mint_tokens  # noqa: E402
+from authentication.v1.utils.verifier import load_token_verifier_lazy  # noqa: E402
+
+
+def per_call_us(func, values):
+    start = time.perf_counter()
+    for value in values:
+        func(value)
+    return (time.perf_counter() - start) / len(values) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tokens", type=int, default=20000)
+    args = parser.parse_args()
+
+    tokens = [pair["access"][len("Bearer "):].encode()
+              for pair in mint_tokens(range(1, args.tokens + 1))]
+    key_ring = load_key_ring_lazy()
+    verifier = load_token_verifier_lazy()
+
+    print(f"algorithm:                  {key_ring.active.algorithm} (kid {key_ring.active.kid})")
+    print(f"tokens:                     {len(tokens):,}")
+    print(f"KeyRing.decode (PyJWT):     {per_call_us(key_ring.decode, tokens):7.2f} us/token")
+    print(f"AccessToken(raw_token):     {per_call_us(AccessToken, tokens):7.2f} us/token")
+    print(f"TokenVerifier.verify:       "
+          f"{per_call_us(lambda token: verifier.verify(token, 'access'), tokens):7.2f} us/token")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+import hmac
+
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+from django.views.decorators.http import require_GET
+
+from common.metrics import render_metrics
+
+
+def metrics_allowed(request):
+    config = settings.METRICS
+    if request.META.get("REMOTE_ADDR") in config["ALLOWED_IPS"]:
+        return True
+    # compare_digest only accepts ASCII str, so compare bytes; any header value encodes.
+    authorization = request.headers.get("Authorization", "").encode()
+    return bool(config["TOKEN"]) and hmac.compare_digest(authorization, f"Bearer {config['TOKEN']}".encode())
+
+
+@require_GET
+def metrics(request):
+    """
+    Expose the stage latency and Redis value size histograms in the Prometheus text format.
+
+    Only the addresses in `METRICS["ALLOWED_IPS"]` and clients presenting `METRICS["TOKEN"]`
+    as a bearer token are served.
+
+    Parameters
+    ----------
+    request : HttpRequest
+        The Django HttpRequest object.
+
+    Returns
+    -------
+    HttpResponse
+        The metrics of this worker process, 403 for other clients, or 404 when metrics are
+        disabled.
+    """
+    if not metrics_allowed(request):
+        return HttpResponseForbidden()
+    output = render_metrics()
+    if output is None:
+        raise Http404()
+    return HttpResponse(output, content_type="text/plain; version=0.0.4; charset=utf-8")
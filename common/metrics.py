@@ -0,0 +1,256 @@
+import bisect
+import contextvars
+import functools
+import threading
+import time
+from contextlib import nullcontext
+
+from django.conf import settings
+
+# Upper bounds in seconds, from a Redis GET on localhost to a slow SMS provider call.
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+UNRESOLVED_ENDPOINT = "unresolved"
+NULL_TIMER = nullcontext()
+
+current_endpoint = contextvars.ContextVar("current_endpoint", default=UNRESOLVED_ENDPOINT)
+metrics_registry = None
+size_registry = None
+event_counter = None
+sms_counter = None
+_metrics_loaded = False
+
+
+class Histogram:
+    """
+    Cumulative latency histogram in the Prometheus layout.
+
+    `counts[i]` holds the observations that fell into `(buckets[i - 1], buckets[i]]`; the
+    last slot is the `+Inf` overflow. They are summed up only when the metrics are rendered.
+    """
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+
+class StageTimer:
+    __slots__ = ("registry", "stage", "start")
+
+    def __init__(self, registry, stage) -> None:
+        self.registry = registry
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.registry.observe(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+class MetricsRegistry:
+    """
+    Per-endpoint latency histograms of the stages of request handling.
+
+    A registry holds one histogram family; `label` names its second label next to
+    `endpoint`, so the same class also keeps the Redis value sizes per key prefix.
+
+    Methods:
+    - timer(self, stage: str) -> StageTimer:
+        Context manager that records the time spent in `stage` for the current endpoint.
+    - observe(self, stage: str, seconds: float, endpoint: str = None) -> None:
+        Record one observation.
+    - render(self) -> str:
+        All histograms in the Prometheus text exposition format.
+    """
+
+    def __init__(self, name="auth_stage_duration_seconds", buckets=DEFAULT_BUCKETS, label="stage",
+                 description="Time spent in each stage of request handling.") -> None:
+        self.name = name
+        self.buckets = tuple(buckets)
+        self.label = label
+        self.description = description
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def timer(self, stage):
+        return StageTimer(self, stage)
+
+    def observe(self, stage, seconds, endpoint=None):
+        key = (endpoint or current_endpoint.get(), stage)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def clear(self):
+        with self._lock:
+            self.histograms.clear()
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.description}",
+                 f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, list(h.counts), h.total, h.count)
+                           for key, h in self.histograms.items())
+        for (endpoint, stage), counts, total, count in items:
+            labels = f'endpoint="{escape_label(endpoint)}",{self.label}="{escape_label(stage)}"'
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total}")
+            lines.append(f"{self.name}_count{{{labels}}} {count}")
+        return "\n".join(lines) + "\n"
+
+
+class EventCounter:
+    """
+    Monotonic counters in the Prometheus layout, one per value of a single label.
+
+    Methods:
+    - increment(self, value: str) -> None:
+        Add one to the counter of `value`.
+    - render(self) -> str:
+        All counters in the Prometheus text exposition format.
+    """
+
+    def __init__(self, name, label, description) -> None:
+        self.name = name
+        self.label = label
+        self.description = description
+        self.counts = {}
+        self._lock = threading.Lock()
+
+    def increment(self, value):
+        with self._lock:
+            self.counts[value] = self.counts.get(value, 0) + 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.description}",
+                 f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self.counts.items())
+        for value, count in items:
+            lines.append(f'{self.name}{{{self.label}="{escape_label(value)}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def load_metrics_registry_lazy():
+    """
+    Return the process registry, or None when `METRICS["ENABLED"]` is off.
+
+    The registry of Redis value sizes, the Redis circuit-breaker transition counter and
+    the SMS outcome counter are created alongside, see `observe_size`, `count_event` and
+    `count_sms`.
+    """
+    global metrics_registry, size_registry, event_counter, sms_counter, _metrics_loaded
+    if not _metrics_loaded:
+        config = settings.METRICS
+        if config["ENABLED"]:
+            metrics_registry = MetricsRegistry()
+            size_registry = MetricsRegistry(
+                "redis_value_size_bytes", config["SIZE_BUCKETS"], label="prefix",
+                description="Size of the values written to Redis per key prefix.")
+            event_counter = EventCounter(
+                "redis_circuit_breaker_transitions_total", "state",
+                description="Transitions of the Redis circuit breaker into each state.")
+            sms_counter = EventCounter(
+                "sms_messages_total", "outcome",
+                description="SMS messages by provider status, or transport_error.")
+        _metrics_loaded = True
+    return metrics_registry
+
+
+def render_metrics():
+    """
+    All metric families of this process in the Prometheus text format, or None when disabled.
+    """
+    registry = load_metrics_registry_lazy()
+    if registry is None:
+        return None
+    output = registry.render()
+    if size_registry is not None:
+        output += size_registry.render()
+    if event_counter is not None:
+        output += event_counter.render()
+    if sms_counter is not None:
+        output += sms_counter.render()
+    return output
+
+
+def stage_timer(stage):
+    """
+    Time a block of code as `stage` of the current endpoint.
+
+    With metrics disabled this returns a shared no-op context manager, so instrumented
+    code pays one function call and one global lookup.
+
+    Usage:
+    ----------
+        with stage_timer("redis"):
+            ...
+    """
+    registry = metrics_registry if _metrics_loaded else load_metrics_registry_lazy()
+    if registry is None:
+        return NULL_TIMER
+    return StageTimer(registry, stage)
+
+
+def observe_size(prefix, size):
+    """
+    Record the size in bytes of a value written under a key prefix.
+    """
+    if not _metrics_loaded:
+        load_metrics_registry_lazy()
+    if size_registry is not None:
+        size_registry.observe(prefix, size)
+
+
+def count_event(value):
+    """
+    Count a Redis circuit-breaker transition into the state `value`.
+    """
+    if not _metrics_loaded:
+        load_metrics_registry_lazy()
+    if event_counter is not None:
+        event_counter.increment(value)
+
+
+def count_sms(outcome):
+    """
+    Count one SMS by its outcome: the provider status, or `transport_error`.
+    """
+    if not _metrics_loaded:
+        load_metrics_registry_lazy()
+    if sms_counter is not None:
+        sms_counter.increment(outcome)
+
+
+def timed(stage):
+    """
+    Decorator form of `stage_timer`.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage_timer(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
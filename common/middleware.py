@@ -0,0 +1,34 @@
+import time
+
+from django.core.exceptions import MiddlewareNotUsed
+
+from common.metrics import (UNRESOLVED_ENDPOINT, current_endpoint,
+                            load_metrics_registry_lazy)
+
+
+class MetricsMiddleware:
+    """
+    Label the stage timings of a request with its URL route and time the whole request.
+
+    Django drops the middleware at startup when `METRICS["ENABLED"]` is off.
+    """
+
+    def __init__(self, get_response):
+        self.registry = load_metrics_registry_lazy()
+        if self.registry is None:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = current_endpoint.set(UNRESOLVED_ENDPOINT)
+        start = time.perf_counter()
+        try:
+            return self.get_response(request)
+        finally:
+            self.registry.observe("request", time.perf_counter() - start)
+            current_endpoint.reset(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.resolver_match is not None:
+            current_endpoint.set(request.resolver_match.route)
+        return None
@@ -35,7 +35,10 @@ def generate_upload_link_with_token(username, password, folder_path, expiretion_
     # Initialize Nextcloud client
     oc = Client('http://46.249.99.102:3000')
     oc.login(username, password)
+    return create_upload_link(oc, folder_path, expiretion_days)
 
+
+def create_upload_link(oc: Client, folder_path, expiretion_days):
     now = datetime.now()
     one_day_later = now + timedelta(days=expiretion_days)
     expiretion_time = one_day_later.strftime('%Y-%m-%d')
@@ -2,6 +2,8 @@ from django.conf import settings
 from modeltranslation.translator import translator
 from rest_framework import serializers
 
+from common.metrics import stage_timer
+
 # class ModelTranslationGetSerializer(serializers.ModelSerializer):
 #     # def to_representation(self, instance):
 #     #     representation = super().to_representation(instance)
@@ -13,6 +15,16 @@ from rest_framework import serializers
 #     ...
 
 
+class TimedValidationMixin:
+    """
+    Record the time spent in `is_valid` as the `serializer.<ClassName>` stage.
+    """
+
+    def is_valid(self, *, raise_exception=False):
+        with stage_timer(f"serializer.{type(self).__name__}"):
+            return super().is_valid(raise_exception=raise_exception)
+
+
 class ModelTranslationSerializer(serializers.ModelSerializer):
     def get_fields(self):
         fields = super().get_fields()
@@ -29,7 +41,7 @@ class ModelTranslationSerializer(serializers.ModelSerializer):
         return fields
 
 
-class ModelSerializerWithVerboseNames(serializers.ModelSerializer):
+class ModelSerializerWithVerboseNames(TimedValidationMixin, serializers.ModelSerializer):
     def to_representation(self, instance):
         """
         Override to_representation to change field names to verbose names.
@@ -47,7 +59,7 @@ class ModelSerializerWithVerboseNames(serializers.ModelSerializer):
         return new_ret
 
 
-class SerializerWithVerboseNames(serializers.Serializer):
+class SerializerWithVerboseNames(TimedValidationMixin, serializers.Serializer):
     TRANSLATED_FIELD_NAMES = {}
 
     def to_representation(self, instance):
@@ -0,0 +1,95 @@
+import logging
+import os
+import threading
+
+from decouple import config
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+RABBITMQ = "rabbitmq"
+OWNCLOUD = "owncloud"
+
+_factories = {}
+_services = {}
+_services_pid = None
+_lock = threading.Lock()
+
+
+def register(name, factory):
+    """
+    Register how to create the client of an external service.
+
+    Nothing is created here; `factory` is called without arguments by the first `get(name)`
+    of each process.
+
+    Parameters
+    ----------
+    name : str
+        The service name, e.g. `RABBITMQ`.
+    factory : callable
+        Returns a connected client.
+    """
+    _factories[name] = factory
+
+
+def get(name):
+    """
+    Return the client of `name`, creating it on first use in this process.
+
+    Importing settings, running management commands or booting a worker therefore opens no
+    connection a request does not need. A forked process creates its own clients.
+
+    Parameters
+    ----------
+    name : str
+        A registered service name.
+
+    Returns
+    -------
+    object
+        The client returned by the registered factory.
+    """
+    global _services_pid
+    pid = os.getpid()
+    service = _services.get(name)
+    if service is not None and _services_pid == pid:
+        return service
+    with _lock:
+        if _services_pid != pid:
+            _services.clear()
+            _services_pid = pid
+        service = _services.get(name)
+        if service is None:
+            service = _services[name] = _factories[name]()
+    return service
+
+
+def reset(name=None):
+    """
+    Drop the cached client of `name`, or of every service, so the next `get` reconnects.
+    """
+    with _lock:
+        if name is None:
+            _services.clear()
+        else:
+            _services.pop(name, None)
+
+
+def connect_rabbitmq():
+    import pika
+
+    logger.info("Connecting to RabbitMQ")
+    return pika.BlockingConnection(pika.URLParameters(settings.BROKER_URL))
+
+
+def connect_owncloud():
+    from common.owncloud.owncloud_client import CustomClient
+
+    client = CustomClient(config("OWNCLOUD_URL", default="http://46.249.99.102:3000"))
+    client.login(config("OWNCLOUD_ADMIN_USERNAME", cast=str), config("OWNCLOUD_ADMIN_PASSWORD", cast=str))
+    return client
+
+
+register(RABBITMQ, connect_rabbitmq)
+register(OWNCLOUD, connect_owncloud)
@@ -1,6 +1,6 @@
 import os
 
-from decouple import config
+from decouple import Csv, config
 from django.utils.translation import gettext_lazy as _
 
 SWAGGER_SETTINGS = {
@@ -19,15 +19,15 @@ DRF_YASG_AUTO_SCHEMA = {
 
 REST_FRAMEWORK = {
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.AnonRateThrottle",
+        "common.throttling.AnonRedisRateThrottle",
+        "common.throttling.ScopedRedisRateThrottle",
     ],
-    "DEFAULT_THROTTLE_RATES": {"anon": "5/sec", "user": "5/sec"},
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "authentication.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticated",
-        "common.permissions.IsNotBlocked",
+        "common.permissions.IsAuthorizedByClaims",
     ),
     'DEFAULT_RENDERER_CLASSES': [
         'rest_framework.renderers.JSONRenderer',
@@ -36,7 +36,10 @@ REST_FRAMEWORK = {
         'rest_framework.parsers.JSONParser',
         'rest_framework.parsers.FormParser',
         'rest_framework.parsers.MultiPartParser'
-    ]
+    ],
+    # nginx appends the client address to X-Forwarded-For; earlier entries come from the
+    # client and are not trusted when throttling by IP.
+    "NUM_PROXIES": config("NUM_PROXIES", default=1, cast=int),
 }
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -45,3 +48,31 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 LOCALE_PATHS = [
     os.path.join(BASE_DIR, '..', 'locale'),
 ]
+
+# Per-endpoint latency histograms of authentication, permissions, serializers, Redis and
+# outbound HTTP, served on /metrics (see common.metrics). Off by default; when off the
+# middleware is not loaded and every instrumented stage is a no-op context manager.
+METRICS = {
+    "ENABLED": config("METRICS_ENABLED", default=False, cast=bool),
+    # /metrics answers these client addresses, and any client sending `Bearer <TOKEN>`
+    "ALLOWED_IPS": config("METRICS_ALLOWED_IPS", default="127.0.0.1,::1", cast=Csv()),
+    "TOKEN": config("METRICS_TOKEN", default=""),
+    # Bytes of values written to Redis, from an OTP entry to a personal-info blob
+    "SIZE_BUCKETS": (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 65536),
+}
+
+# Rate limits shared by all workers, kept in Redis (see common.throttling). Each scope maps the
+# dimensions it limits (ip, user, phone_number, phone_prefix) to a rate; views opt into a
+# scope with `throttle_scope`, and unauthenticated requests to other views are limited by
+# `anon`.
+THROTTLING = {
+    "KEY_PREFIX": "throttle",
+    # Country code plus operator and the first digits of the number, e.g. 98912 + 12
+    "PHONE_PREFIX_DIGITS": 7,
+    "RATES": {
+        "anon": {"ip": "5/sec"},
+        "otp": {"ip": "20/min", "phone_number": "10/min", "phone_prefix": "300/min"},
+        "login": {"ip": "30/min", "phone_number": "10/min"},
+        "verification": {"user": "20/min"},
+    },
+}
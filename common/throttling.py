@@ -0,0 +1,153 @@
+import functools
+import logging
+
+import redis
+from django.conf import settings
+from rest_framework.throttling import BaseThrottle
+
+from common import variables
+from common.metrics import stage_timer
+from redis_service.client import get_redis_client
+from redis_service.scripts import THROTTLE
+
+logger = logging.getLogger(__name__)
+
+IP = "ip"
+USER = "user"
+PHONE_NUMBER = "phone_number"
+PHONE_PREFIX = "phone_prefix"
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+throttle_script = None
+
+
+def load_throttle_script_lazy():
+    global throttle_script
+    if throttle_script is None:
+        redis_client = get_redis_client()
+        throttle_script = redis_client.register_script(THROTTLE)
+        redis_client.script_load(THROTTLE)
+    return throttle_script
+
+
+@functools.lru_cache(maxsize=None)
+def parse_rate(rate):
+    """
+    Turn a DRF style rate such as `10/min` into the emission interval and the burst tolerance
+    of the generic cell rate algorithm, both in milliseconds: the full number of requests may
+    be spent at once, after which one more is allowed every interval.
+    """
+    num, period = rate.split("/")
+    num = int(num)
+    interval = round(PERIODS[period[0]] * 1000 / num)
+    return interval, interval * (num - 1)
+
+
+def normalized_phone_number(request):
+    """
+    The digits of the country code and phone number in the request body, so that `0912...`
+    and `912...` count against the same key; None when the body has no phone number.
+    """
+    data = request.data
+    if not hasattr(data, "get"):
+        return None
+    phone_number = data.get(variables.PHONE_NUMBER)
+    if not isinstance(phone_number, str):
+        return None
+    phone_number = "".join(filter(str.isdigit, phone_number)).lstrip("0")
+    if not phone_number:
+        return None
+    country_code = data.get(variables.COUNTRY_CODE)
+    if isinstance(country_code, str):
+        phone_number = "".join(filter(str.isdigit, country_code)) + phone_number
+    return phone_number
+
+
+class RedisRateThrottle(BaseThrottle):
+    """
+    Rate limit shared by every process, kept in Redis with the generic cell rate algorithm.
+
+    A scope limits any combination of the client IP, the user, the phone number in the
+    request body and its leading digits, each with its own rate, e.g.
+    `{"ip": "20/min", "phone_number": "10/min"}`. All limits of a request are checked and
+    counted by one script call; the request is rejected if any of them is exhausted.
+    Dimensions the request does not carry, such as the user of an anonymous request, are
+    skipped. When Redis is unavailable the request is let through rather than failing the
+    API.
+
+    Methods:
+    - get_scope(self, request, view) -> str | None:
+        The scope of the request; None disables throttling.
+    - keys(self, scope: str, request) -> tuple:
+        The Redis keys of the request and the flattened rate of each.
+    """
+    RATES = settings.THROTTLING["RATES"]
+
+    def __init__(self) -> None:
+        self.wait_ms = 0
+
+    def get_scope(self, request, view):
+        raise NotImplementedError(".get_scope() must be overridden")
+
+    def dimension_value(self, dimension, request):
+        if dimension == IP:
+            return self.get_ident(request)
+        if dimension == USER:
+            return request.user.pk if request.user and request.user.is_authenticated else None
+        if dimension not in (PHONE_NUMBER, PHONE_PREFIX):
+            raise ValueError(f"Unknown throttle dimension {dimension!r}")
+        phone_number = normalized_phone_number(request)
+        if phone_number is None or dimension == PHONE_NUMBER:
+            return phone_number
+        return phone_number[:settings.THROTTLING["PHONE_PREFIX_DIGITS"]]
+
+    def keys(self, scope, request):
+        keys, args = [], []
+        for dimension, rate in self.RATES.get(scope, {}).items():
+            value = self.dimension_value(dimension, request)
+            if value is None:
+                continue
+            keys.append(f"{settings.THROTTLING['KEY_PREFIX']}:{{{scope}}}:{dimension}:{value}")
+            args.extend(parse_rate(rate))
+        return keys, args
+
+    def allow_request(self, request, view):
+        scope = self.get_scope(request, view)
+        if scope is None:
+            return True
+        keys, args = self.keys(scope, request)
+        if not keys:
+            return True
+        try:
+            with stage_timer("throttle"):
+                self.wait_ms = load_throttle_script_lazy()(keys=keys, args=args)
+        except redis.RedisError as e:
+            logger.warning("Throttle %s is not enforced, Redis is unavailable: %s", scope, e)
+            return True
+        return not self.wait_ms
+
+    def wait(self):
+        return self.wait_ms / 1000 if self.wait_ms else None
+
+
+class AnonRedisRateThrottle(RedisRateThrottle):
+    """
+    Limits unauthenticated requests by the `anon` scope.
+
+    Views with a `throttle_scope` are left to `ScopedRedisRateThrottle`, whose scope sets its
+    own IP limit, so every request costs at most one throttle round trip.
+    """
+
+    def get_scope(self, request, view):
+        if getattr(view, "throttle_scope", None) is not None:
+            return None
+        return None if request.user and request.user.is_authenticated else "anon"
+
+
+class ScopedRedisRateThrottle(RedisRateThrottle):
+    """
+    Limits the requests of views that set `throttle_scope`.
+    """
+
+    def get_scope(self, request, view):
+        return getattr(view, "throttle_scope", None)
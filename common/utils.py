@@ -4,20 +4,22 @@ import subprocess
 import textwrap
 from datetime import datetime, timedelta
 from subprocess import call
+from typing import TYPE_CHECKING
 
 from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
 from rest_framework.response import Response
-from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
-from rest_framework_simplejwt.tokens import RefreshToken
-import pandas as pd
 from django.conf import settings
 
-from third_party_repository.countries.read_data import get_countries_df
 from authentication.models import User
+from authentication.tokens import RefreshToken
+from common.throttling import RedisRateThrottle
 from common.variables import INVALID_INPUT_DATA
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 root_dir_path = settings.BASE_DIR
 
 BLUE = "\033[94m"
@@ -33,8 +35,10 @@ def authenticate_user(user='009121234567'):
 
 
 def refresh_throttle():
-    setattr(AnonRateThrottle, "THROTTLE_RATES", {"anon": "100/sec"})
-    setattr(UserRateThrottle, "THROTTLE_RATES", {"user": "100/sec"})
+    setattr(RedisRateThrottle, "RATES", {
+        scope: {dimension: "100/sec" for dimension in rates}
+        for scope, rates in settings.THROTTLING["RATES"].items()
+    })
 
 
 def get_caller_name():
@@ -371,6 +375,9 @@ countries_hints_dict = {
 def load_cities_lazy():
     global cities_df
     if cities_df is None:
+        # pandas, and the Owncloud client behind the countries, are imported on first use
+        # so they stay out of the startup of every process.
+        import pandas as pd
         cities_df = pd.read_csv(f'{settings.BASE_DIR}/assets/cities.csv')
     return cities_df
 
@@ -378,6 +385,7 @@ def load_cities_lazy():
 def load_countries_lazy():
     global countries_df
     if countries_df is None:
+        from third_party_repository.countries.read_data import get_countries_df
         countries_df = get_countries_df()
     return countries_df
 
@@ -43,6 +43,10 @@ INVALID_PHONE_NUMBER = _("Invalid phone number")
 
 ANON_TOKEN_CREATED = _("Anonymous token created successfully.")
 
+TOKENS_MINTED = _("Tokens created successfully.")
+
+PRIVILEGED_TOKENS_FORBIDDEN = _("Only superusers can create tokens for staff users and superusers.")
+
 USER_IS_NOT_VERIFIED = _("User didn't complete identity verification")
 
 USER_INFO_NOT_MATCHED = _("The given data not matches for this user")
@@ -2,7 +2,8 @@ import os
 
 import pika
 # from celery import shared_task
-from django.conf import settings
+
+from common import services
 
 
 class Producer:
@@ -10,7 +11,7 @@ class Producer:
         self.rabbitmq_url = rabbitmq_url
 
     def produce_message(rabbitmq_url, serialized_message, exchange_name, exchange_type, routing_key, delivery_mode=2):
-        channel = settings.RABBIT_MQ_CONNECTION.channel()
+        channel = services.get(services.RABBITMQ).channel()
         channel.exchange_declare(
             exchange=exchange_name, exchange_type=exchange_type)
         channel.basic_publish(
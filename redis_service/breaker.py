@@ -0,0 +1,163 @@
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+from contextlib import nullcontext
+
+from django.conf import settings
+
+import redis
+from common.metrics import count_event
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+# Errors that mean Redis is unreachable; command errors such as WRONGTYPE do not count.
+OUTAGE_ERRORS = (redis.ConnectionError, redis.TimeoutError)
+# Stand-in for clients built without a breaker; supports `with` and `async with`.
+NO_BREAKER = nullcontext()
+
+_probing = contextvars.ContextVar("redis_breaker_probing", default=False)
+circuit_breaker = None
+_breaker_loaded = False
+
+
+class CircuitOpenError(redis.ConnectionError):
+    """
+    Raised instead of contacting Redis while the circuit is open.
+
+    It is a `redis.ConnectionError`, so the views answer with `REDIS_IS_DOWN` as they do
+    for a real outage, only without waiting for the connect timeout.
+    """
+
+
+class CircuitBreaker:
+    """
+    Process-wide circuit breaker shared by the sync and asyncio Redis clients.
+
+    After `failure_threshold` consecutive connection errors or timeouts the circuit opens
+    and every command fails at once with `CircuitOpenError`. After `reset_seconds` one
+    caller runs `probe` (a half-open probe) while the others keep failing fast; a healthy
+    probe closes the circuit, a failed one opens it for another `reset_seconds`. Every
+    transition is counted in `redis_circuit_breaker_transitions_total` and logged.
+
+    Clients use the breaker as a context manager around each round trip.
+
+    Methods:
+    - before_call(self) -> None:
+        Raise `CircuitOpenError` unless a command may be sent now.
+    - abefore_call(self) -> None:
+        Async variant of `before_call`; the probe runs in a worker thread.
+    - record_success(self) -> None:
+        Reset the consecutive failure count.
+    - record_failure(self) -> None:
+        Count a failure and open the circuit at the threshold.
+    """
+
+    def __init__(self, failure_threshold, reset_seconds, probe) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.probe = probe
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        self.before_call()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.record_success()
+        elif issubclass(exc_type, OUTAGE_ERRORS) and not issubclass(exc_type, CircuitOpenError):
+            self.record_failure()
+        return False
+
+    async def __aenter__(self):
+        await self.abefore_call()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        return self.__exit__(exc_type, exc_value, traceback)
+
+    def before_call(self):
+        if self.state == CLOSED or _probing.get():
+            return
+        if not self._claim_probe():
+            raise CircuitOpenError("Redis circuit breaker is open")
+        self._run_probe()
+
+    async def abefore_call(self):
+        if self.state == CLOSED or _probing.get():
+            return
+        if not self._claim_probe():
+            raise CircuitOpenError("Redis circuit breaker is open")
+        await asyncio.to_thread(self._run_probe)
+
+    def record_success(self):
+        if self.failures and not _probing.get():
+            with self._lock:
+                self.failures = 0
+
+    def record_failure(self):
+        if _probing.get():
+            return
+        with self._lock:
+            self.failures += 1
+            if self.state == CLOSED and self.failures >= self.failure_threshold:
+                self._transition(OPEN)
+
+    def _claim_probe(self):
+        with self._lock:
+            if self.state != OPEN or time.monotonic() - self.opened_at < self.reset_seconds:
+                return False
+            self._transition(HALF_OPEN)
+            return True
+
+    def _run_probe(self):
+        token = _probing.set(True)
+        try:
+            healthy = self.probe()
+        except Exception:
+            healthy = False
+        finally:
+            _probing.reset(token)
+        with self._lock:
+            self._transition(CLOSED if healthy else OPEN)
+        if not healthy:
+            raise CircuitOpenError("Redis circuit breaker is open")
+
+    def _transition(self, state):
+        # Called with the lock held.
+        if state == OPEN:
+            self.opened_at = time.monotonic()
+        elif state == CLOSED:
+            self.failures = 0
+        if state != self.state:
+            logger.warning("Redis circuit breaker %s -> %s", self.state, state)
+            self.state = state
+            count_event(state)
+
+
+def load_circuit_breaker_lazy():
+    """
+    Return the circuit breaker of this process, or `NO_BREAKER` when
+    `REDIS["BREAKER_FAILURE_THRESHOLD"]` is 0.
+    """
+    global circuit_breaker, _breaker_loaded
+    if not _breaker_loaded:
+        # redis_service.utils imports redis_service.client, which imports this module.
+        from redis_service.utils import check_redis_health
+
+        config = settings.REDIS
+        if config["BREAKER_FAILURE_THRESHOLD"]:
+            circuit_breaker = CircuitBreaker(
+                config["BREAKER_FAILURE_THRESHOLD"], config["BREAKER_RESET_SECONDS"], check_redis_health)
+        else:
+            circuit_breaker = NO_BREAKER
+        _breaker_loaded = True
+    return circuit_breaker
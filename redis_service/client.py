@@ -0,0 +1,215 @@
+import asyncio
+import os
+import threading
+import weakref
+
+import redis
+import redis.asyncio
+import redis.asyncio.cluster
+import redis.asyncio.retry
+import redis.asyncio.sentinel
+import redis.sentinel
+from django.conf import settings
+from redis.backoff import EqualJitterBackoff
+from redis.retry import Retry
+
+from redis_service.breaker import load_circuit_breaker_lazy
+from redis_service.metrics import (InstrumentedAsyncRedis,
+                                   InstrumentedAsyncRedisCluster,
+                                   InstrumentedRedis, InstrumentedRedisCluster)
+
+STANDALONE = "standalone"
+SENTINEL = "sentinel"
+CLUSTER = "cluster"
+
+_clients = {}
+_clients_pid = None
+_lock = threading.Lock()
+_async_clients = weakref.WeakKeyDictionary()
+_async_clients_pid = None
+
+
+def build_redis_client(config, decode_responses=True):
+    """
+    Build a Redis client with its own bounded connection pool from a `REDIS` settings dict.
+
+    `REDIS["MODE"]` selects a single server (`standalone`), the master of a Sentinel group
+    (`sentinel`), which follows failovers, or a Redis Cluster (`cluster`), which routes each
+    key to the node owning its slot. Only the standalone pool blocks for `POOL_TIMEOUT` when
+    it is exhausted; the Sentinel and Cluster pools fail fast.
+
+    Parameters
+    ----------
+    config : dict
+        Mode, nodes, pool size, timeouts and retry policy, see `redis_service.settings`.
+    decode_responses : bool
+        Return `str` instead of `bytes`.
+
+    Returns
+    -------
+    InstrumentedRedis or InstrumentedRedisCluster
+        A client that records its commands for `/metrics` and the slow-command log and
+        fails fast while the circuit breaker is open.
+    """
+    retry = Retry(backoff(config), retries=config["RETRY_ATTEMPTS"])
+    kwargs = connection_kwargs(config, decode_responses)
+    mode = config["MODE"]
+    if mode == CLUSTER:
+        client = InstrumentedRedisCluster(
+            host=config["HOST"], port=config["PORT"], max_connections=config["MAX_CONNECTIONS"],
+            retry=retry, **kwargs)
+    elif mode == SENTINEL:
+        sentinel = redis.sentinel.Sentinel(
+            sentinel_nodes(config), sentinel_kwargs=sentinel_kwargs(config), db=config["DB"], **kwargs)
+        client = sentinel.master_for(
+            config["SENTINEL_SERVICE_NAME"], redis_class=InstrumentedRedis,
+            max_connections=config["MAX_CONNECTIONS"], retry=retry)
+    elif mode == STANDALONE:
+        pool = redis.BlockingConnectionPool(
+            host=config["HOST"], port=config["PORT"], db=config["DB"],
+            max_connections=config["MAX_CONNECTIONS"], timeout=config["POOL_TIMEOUT"],
+            retry=retry, **kwargs)
+        client = InstrumentedRedis(connection_pool=pool)
+    else:
+        raise ValueError(f"Unknown REDIS_MODE {mode!r}, expected {STANDALONE}, {SENTINEL} or {CLUSTER}")
+    client.slow_command_seconds = config["SLOW_COMMAND_SECONDS"]
+    client.breaker = load_circuit_breaker_lazy()
+    return client
+
+
+def build_async_redis_client(config, decode_responses=True):
+    """
+    Build a `redis.asyncio` client with its own bounded pool from a `REDIS` settings dict.
+
+    Supports the same modes as `build_redis_client`. The pool and its connections belong
+    to the event loop that first uses them.
+
+    Parameters
+    ----------
+    config : dict
+        Mode, nodes, pool size, timeouts and retry policy, see `redis_service.settings`.
+    decode_responses : bool
+        Return `str` instead of `bytes`.
+
+    Returns
+    -------
+    InstrumentedAsyncRedis or InstrumentedAsyncRedisCluster
+        An asyncio client that records its commands for `/metrics` and the slow-command log
+        and fails fast while the circuit breaker is open.
+    """
+    retry = redis.asyncio.retry.Retry(backoff(config), retries=config["RETRY_ATTEMPTS"])
+    kwargs = connection_kwargs(config, decode_responses)
+    mode = config["MODE"]
+    if mode == CLUSTER:
+        client = InstrumentedAsyncRedisCluster(
+            host=config["HOST"], port=config["PORT"], max_connections=config["MAX_CONNECTIONS"],
+            retry=retry, **kwargs)
+    elif mode == SENTINEL:
+        sentinel = redis.asyncio.sentinel.Sentinel(
+            sentinel_nodes(config), sentinel_kwargs=sentinel_kwargs(config), db=config["DB"], **kwargs)
+        client = sentinel.master_for(
+            config["SENTINEL_SERVICE_NAME"], redis_class=InstrumentedAsyncRedis,
+            max_connections=config["MAX_CONNECTIONS"], retry=retry)
+    elif mode == STANDALONE:
+        pool = redis.asyncio.BlockingConnectionPool(
+            host=config["HOST"], port=config["PORT"], db=config["DB"],
+            max_connections=config["MAX_CONNECTIONS"], timeout=config["POOL_TIMEOUT"],
+            retry=retry, **kwargs)
+        client = InstrumentedAsyncRedis(connection_pool=pool)
+    else:
+        raise ValueError(f"Unknown REDIS_MODE {mode!r}, expected {STANDALONE}, {SENTINEL} or {CLUSTER}")
+    client.slow_command_seconds = config["SLOW_COMMAND_SECONDS"]
+    client.breaker = load_circuit_breaker_lazy()
+    return client
+
+
+def backoff(config):
+    return EqualJitterBackoff(cap=config["RETRY_BACKOFF_CAP"], base=config["RETRY_BACKOFF_BASE"])
+
+
+def connection_kwargs(config, decode_responses):
+    # Redis Cluster has no databases, so host, port and db are passed per mode.
+    return {
+        "password": config["PASSWORD"],
+        "socket_connect_timeout": config["SOCKET_CONNECT_TIMEOUT"],
+        "socket_timeout": config["SOCKET_TIMEOUT"],
+        "socket_keepalive": True,
+        "health_check_interval": config["HEALTH_CHECK_INTERVAL"],
+        "retry_on_error": [redis.ConnectionError, redis.TimeoutError],
+        "decode_responses": decode_responses,
+    }
+
+
+def sentinel_nodes(config):
+    nodes = []
+    for node in config["SENTINELS"]:
+        host, _, port = node.rpartition(":")
+        nodes.append((host, int(port)))
+    return nodes
+
+
+def sentinel_kwargs(config):
+    return {
+        "socket_connect_timeout": config["SOCKET_CONNECT_TIMEOUT"],
+        "socket_timeout": config["SOCKET_TIMEOUT"],
+    }
+
+
+def is_cluster(client):
+    return isinstance(client, (InstrumentedRedisCluster, InstrumentedAsyncRedisCluster))
+
+
+def get_redis_client(decode_responses=True):
+    """
+    Return the Redis client of this process.
+
+    Clients are created lazily and rebuilt after a fork, so a forked worker never shares
+    sockets with its parent.
+
+    Parameters
+    ----------
+    decode_responses : bool
+        Return `str` (the default) or raw `bytes`, as `RedisStore` needs for its codec.
+    """
+    global _clients_pid
+    pid = os.getpid()
+    client = _clients.get(decode_responses) if _clients_pid == pid else None
+    if client is not None:
+        return client
+    with _lock:
+        if _clients_pid != pid:
+            _clients.clear()
+            _clients_pid = pid
+        client = _clients.get(decode_responses)
+        if client is None:
+            client = _clients[decode_responses] = build_redis_client(
+                settings.REDIS, decode_responses)
+        return client
+
+
+def get_async_redis_client(decode_responses=True):
+    """
+    Return the asyncio Redis client of the running event loop.
+
+    asyncio connections cannot be shared between event loops, so every loop gets its own
+    pool; it is dropped together with the loop. Must be called from a coroutine.
+
+    Parameters
+    ----------
+    decode_responses : bool
+        Return `str` (the default) or raw `bytes`, as `AsyncRedisStore` needs for its codec.
+    """
+    global _async_clients_pid
+    loop = asyncio.get_running_loop()
+    pid = os.getpid()
+    if _async_clients_pid != pid:
+        _async_clients.clear()
+        _async_clients_pid = pid
+    clients = _async_clients.get(loop)
+    if clients is None:
+        clients = _async_clients[loop] = {}
+    client = clients.get(decode_responses)
+    if client is None:
+        client = clients[decode_responses] = build_async_redis_client(
+            settings.REDIS, decode_responses)
+    return client
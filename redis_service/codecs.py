@@ -0,0 +1,92 @@
+import json
+
+import orjson
+
+# The first byte of every value written by RedisStore names its format. Values written
+# before the codec layer are UTF-8 text and never start with a control byte, so they are
+# read as legacy JSON or plain strings.
+ORJSON_FORMAT = b"\x01"
+MSGPACK_FORMAT = b"\x02"
+
+
+class OrjsonCodec:
+    header = ORJSON_FORMAT
+
+    def dumps(self, value):
+        return orjson.dumps(value)
+
+    def loads(self, payload):
+        return orjson.loads(payload)
+
+
+class MsgpackCodec:
+    header = MSGPACK_FORMAT
+
+    def __init__(self) -> None:
+        # Imported on first use, so deployments on orjson do not need msgpack installed
+        import msgpack
+        self._packb = msgpack.packb
+        self._unpackb = msgpack.unpackb
+
+    def dumps(self, value):
+        return self._packb(value, use_bin_type=True)
+
+    def loads(self, payload):
+        return self._unpackb(payload, raw=False)
+
+
+CODECS = {
+    "orjson": OrjsonCodec,
+    "msgpack": MsgpackCodec,
+}
+
+
+class ValueCodec:
+    """
+    Serialize RedisStore values behind a one-byte format header.
+
+    Values are written with the configured codec and read with whichever codec their header
+    names, so the configuration can change while older values are still alive.
+
+    Methods:
+    - encode(self, value: Any) -> bytes:
+        Serialize `value` with the configured codec.
+    - decode(self, payload: bytes | None) -> Any:
+        Deserialize a stored value, including legacy JSON and plain strings.
+    """
+
+    def __init__(self, name="orjson") -> None:
+        if name not in CODECS:
+            raise ValueError(f"Unknown Redis value codec {name!r}, expected one of {sorted(CODECS)}")
+        self.codec = CODECS[name]()
+        self.header = self.codec.header
+        self.readers = {self.header[0]: self.codec}
+
+    def encode(self, value):
+        return self.header + self.codec.dumps(value)
+
+    def decode(self, payload):
+        if payload is None:
+            return None
+        reader = self.readers.get(payload[0]) if payload else None
+        if reader is None:
+            reader = self._reader_for(payload)
+            if reader is None:
+                return decode_legacy(payload)
+        return reader.loads(payload[1:])
+
+    def _reader_for(self, payload):
+        if not payload:
+            return None
+        for codec_class in CODECS.values():
+            if codec_class.header[0] == payload[0]:
+                reader = self.readers[payload[0]] = codec_class()
+                return reader
+        return None
+
+
+def decode_legacy(payload):
+    text = payload.decode() if isinstance(payload, bytes) else payload
+    if text.startswith("{") and text.endswith("}"):
+        return json.loads(text)
+    return text
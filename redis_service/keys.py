@@ -0,0 +1,21 @@
+def user_key(prefix, user_id):
+    """
+    Build the Redis key of a per-user value.
+
+    The user part is a Redis Cluster hash tag, so every key of one user hashes to the same
+    slot and multi-key commands and scripts on them (such as the OTP issuance script) work
+    in cluster mode. Standalone and Sentinel deployments ignore the braces.
+
+    Parameters
+    ----------
+    prefix : str
+        The kind of value, e.g. `verification_code` or `blocked`.
+    user_id : int or str
+        The primary key of the user.
+
+    Returns
+    -------
+    str
+        The key, e.g. `blocked:{u:42}`.
+    """
+    return f"{prefix}:{{u:{user_id}}}"
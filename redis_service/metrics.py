@@ -0,0 +1,235 @@
+import logging
+import time
+
+import redis
+import redis.asyncio
+import redis.asyncio.cluster
+import redis.cluster
+from redis.asyncio.client import Pipeline as AsyncPipeline
+from redis.client import Pipeline
+
+from common import metrics
+from redis_service.breaker import NO_BREAKER
+
+logger = logging.getLogger(__name__)
+
+PIPELINE = "PIPELINE"
+# Lists of the commands issued while `redis_service.testing.capture_redis_commands` is active.
+command_recorders = []
+_stages = {}
+
+
+def command_stage(name):
+    stage = _stages.get(name)
+    if stage is None:
+        stage = _stages[name] = f"redis.{str(name).lower()}"
+    return stage
+
+
+def key_prefix(key):
+    if isinstance(key, bytes):
+        key = key.decode(errors="replace")
+    return str(key).split(":", 1)[0]
+
+
+def observe_command(name, args, seconds, slow_command_seconds):
+    """
+    Record one round trip to Redis.
+
+    The latency goes to the `redis.<command>` stage of the current endpoint, so the histogram
+    counts double as per-command counts. Round trips slower than `slow_command_seconds` are
+    logged with the key prefix of their first key.
+
+    Parameters
+    ----------
+    name : str
+        The command name, or `PIPELINE` for a pipeline.
+    args : tuple
+        The command arguments, or the command names of a pipeline.
+    seconds : float
+        The duration of the round trip.
+    slow_command_seconds : float or None
+        The slow-command threshold; None or 0 disables the log.
+    """
+    registry = metrics.metrics_registry if metrics._metrics_loaded else metrics.load_metrics_registry_lazy()
+    if registry is not None:
+        registry.observe(command_stage(name), seconds)
+    if slow_command_seconds and seconds >= slow_command_seconds:
+        target = " ".join(args) if name == PIPELINE else (key_prefix(args[0]) if args else "")
+        logger.warning("Slow Redis command %s %s: %.1f ms on %s", name, target,
+                       seconds * 1000, metrics.current_endpoint.get())
+    if command_recorders:
+        entry = f"{PIPELINE}({','.join(args)})" if name == PIPELINE else name
+        for recorder in command_recorders:
+            recorder.append(entry)
+
+
+def pipeline_commands(command_stack):
+    # Standalone pipelines queue (args, options) tuples, cluster pipelines PipelineCommand objects
+    return tuple(str(command.args[0] if hasattr(command, "args") else command[0][0])
+                 for command in command_stack)
+
+
+class InstrumentedPipeline(Pipeline):
+    """
+    Pipeline whose round trip is recorded as one `redis.pipeline` command.
+    """
+    slow_command_seconds = None
+    breaker = NO_BREAKER
+
+    def execute(self, raise_on_error=True):
+        commands = pipeline_commands(self.command_stack)
+        with self.breaker:
+            start = time.perf_counter()
+            try:
+                return super().execute(raise_on_error=raise_on_error)
+            finally:
+                observe_command(PIPELINE, commands, time.perf_counter() - start, self.slow_command_seconds)
+
+
+class InstrumentedRedis(redis.StrictRedis):
+    """
+    Redis client that records the latency of every command per endpoint, see `observe_command`.
+
+    `slow_command_seconds` is set by `redis_service.client` from `REDIS["SLOW_COMMAND_SECONDS"]`,
+    `breaker` to the process circuit breaker, see `redis_service.breaker`.
+    """
+    slow_command_seconds = None
+    breaker = NO_BREAKER
+
+    def execute_command(self, *args, **options):
+        with self.breaker:
+            start = time.perf_counter()
+            try:
+                return super().execute_command(*args, **options)
+            finally:
+                observe_command(args[0], args[1:2], time.perf_counter() - start, self.slow_command_seconds)
+
+    def pipeline(self, transaction=True, shard_hint=None):
+        pipeline = InstrumentedPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint)
+        pipeline.slow_command_seconds = self.slow_command_seconds
+        pipeline.breaker = self.breaker
+        return pipeline
+
+
+class InstrumentedAsyncPipeline(AsyncPipeline):
+    """
+    asyncio pipeline whose round trip is recorded as one `redis.pipeline` command.
+    """
+    slow_command_seconds = None
+    breaker = NO_BREAKER
+
+    async def execute(self, raise_on_error=True):
+        commands = pipeline_commands(self.command_stack)
+        async with self.breaker:
+            start = time.perf_counter()
+            try:
+                return await super().execute(raise_on_error=raise_on_error)
+            finally:
+                observe_command(PIPELINE, commands, time.perf_counter() - start, self.slow_command_seconds)
+
+
+class InstrumentedAsyncRedis(redis.asyncio.Redis):
+    """
+    asyncio Redis client that records the latency of every command per endpoint.
+    """
+    slow_command_seconds = None
+    breaker = NO_BREAKER
+
+    async def execute_command(self, *args, **options):
+        async with self.breaker:
+            start = time.perf_counter()
+            try:
+                return await super().execute_command(*args, **options)
+            finally:
+                observe_command(args[0], args[1:2], time.perf_counter() - start, self.slow_command_seconds)
+
+    def pipeline(self, transaction=True, shard_hint=None):
+        pipeline = InstrumentedAsyncPipeline(
+            self.connection_pool, self.response_callbacks, transaction, shard_hint)
+        pipeline.slow_command_seconds = self.slow_command_seconds
+        pipeline.breaker = self.breaker
+        return pipeline
+
+
+class InstrumentedClusterPipeline(redis.cluster.ClusterPipeline):
+    """
+    Cluster pipeline whose round trips are recorded as one `redis.pipeline` command.
+    """
+    slow_command_seconds = None
+    breaker = NO_BREAKER
+
+    def execute(self, raise_on_error=True):
+        commands = pipeline_commands(self.command_stack)
+        with self.breaker:
+            start = time.perf_counter()
+            try:
+                return super().execute(raise_on_error=raise_on_error)
+            finally:
+                observe_command(PIPELINE, commands, time.perf_counter() - start, self.slow_command_seconds)
+
+
+class InstrumentedRedisCluster(redis.cluster.RedisCluster):
+    """
+    Redis Cluster client that records the latency of every command per endpoint.
+    """
+    slow_command_seconds = None
+    breaker = NO_BREAKER
+
+    def execute_command(self, *args, **kwargs):
+        with self.breaker:
+            start = time.perf_counter()
+            try:
+                return super().execute_command(*args, **kwargs)
+            finally:
+                observe_command(args[0], args[1:2], time.perf_counter() - start, self.slow_command_seconds)
+
+    def pipeline(self, transaction=None, shard_hint=None):
+        pipeline = super().pipeline(transaction, shard_hint)
+        # ClusterPipeline copies a dozen attributes of the client in its constructor; swapping
+        # the class keeps that construction in redis-py.
+        pipeline.__class__ = InstrumentedClusterPipeline
+        pipeline.slow_command_seconds = self.slow_command_seconds
+        pipeline.breaker = self.breaker
+        return pipeline
+
+
+class InstrumentedAsyncClusterPipeline(redis.asyncio.cluster.ClusterPipeline):
+    """
+    asyncio cluster pipeline whose round trips are recorded as one `redis.pipeline` command.
+    """
+    slow_command_seconds = None
+    breaker = NO_BREAKER
+
+    async def execute(self, raise_on_error=True, allow_redirections=True):
+        commands = pipeline_commands(self._command_stack)
+        async with self.breaker:
+            start = time.perf_counter()
+            try:
+                return await super().execute(raise_on_error=raise_on_error,
+                                             allow_redirections=allow_redirections)
+            finally:
+                observe_command(PIPELINE, commands, time.perf_counter() - start, self.slow_command_seconds)
+
+
+class InstrumentedAsyncRedisCluster(redis.asyncio.cluster.RedisCluster):
+    """
+    asyncio Redis Cluster client that records the latency of every command per endpoint.
+    """
+    slow_command_seconds = None
+    breaker = NO_BREAKER
+
+    async def execute_command(self, *args, **kwargs):
+        async with self.breaker:
+            start = time.perf_counter()
+            try:
+                return await super().execute_command(*args, **kwargs)
+            finally:
+                observe_command(args[0], args[1:2], time.perf_counter() - start, self.slow_command_seconds)
+
+    def pipeline(self, transaction=None, shard_hint=None):
+        pipeline = InstrumentedAsyncClusterPipeline(self)
+        pipeline.slow_command_seconds = self.slow_command_seconds
+        pipeline.breaker = self.breaker
+        return pipeline
@@ -0,0 +1,85 @@
+"""
+Lua scripts run atomically on the Redis server.
+
+Each script is registered with `redis_client.register_script`, which sends EVALSHA
+and falls back to EVAL once per connection if the script is not cached yet.
+"""
+
+# KEYS[1]: refresh_family:<family id>
+# ARGV[1]: jti of the presented refresh token, ARGV[2]: jti of its replacement, ARGV[3]: TTL
+# Returns 1 when the token is the latest of its family (or the family is new) and was
+# replaced, 0 when it was already used, in which case the whole family is revoked.
+ROTATE_REFRESH_TOKEN = """
+local current = redis.call('GET', KEYS[1])
+if current == false or current == ARGV[1] then
+    redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+    return 1
+end
+if current ~= 'revoked' then
+    redis.call('SET', KEYS[1], 'revoked', 'EX', ARGV[3])
+end
+return 0
+"""
+
+# KEYS[1]: verification_code:{u:<user id>}, KEYS[2]: otp_issued:{u:<user id>}; both carry the
+# same hash tag, so the script runs on one slot in Redis Cluster.
+# ARGV[1]: encoded OTP entry, ARGV[2]: cooldown in seconds (the TTL of the entry),
+# ARGV[3]: OTPs allowed per window, ARGV[4]: window in seconds
+# Returns 1 when the OTP was stored and counted, 0 while the previous OTP is still pending and
+# -1 when the user has used up the window.
+ISSUE_OTP = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return 0
+end
+local issued = tonumber(redis.call('GET', KEYS[2]) or '0')
+if issued >= tonumber(ARGV[3]) then
+    return -1
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+if redis.call('INCR', KEYS[2]) == 1 then
+    redis.call('EXPIRE', KEYS[2], ARGV[4])
+end
+return 1
+"""
+
+# KEYS[1]: verification_code:{u:<user id>}
+# ARGV[1]: HMAC of the submitted code, see `hash_verification_code`
+# Returns the stored OTP entry and deletes it only if it holds that HMAC, otherwise nil. The
+# 64 hex digits are stored verbatim in every value format, so the entry is not decoded here.
+# A wrong code leaves the OTP usable; guesses are bounded by the login throttle.
+CONSUME_OTP = """
+local entry = redis.call('GET', KEYS[1])
+if entry and string.find(entry, ARGV[1], 1, true) then
+    redis.call('DEL', KEYS[1])
+    return entry
+end
+return nil
+"""
+
+# KEYS: throttle:{<scope>}:<dimension>:<value>, one per limited dimension of a request; all
+# carry the scope as hash tag, so the script runs on one slot in Redis Cluster.
+# ARGV: one (emission interval, burst tolerance) pair per key, in milliseconds.
+# Generic cell rate algorithm: each key holds the theoretical arrival time (TAT) of the next
+# request. The request is allowed only if every key allows it, and only then are the TATs
+# advanced. Returns 0 when allowed, otherwise the milliseconds until it would be.
+THROTTLE = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local wait = 0
+local tats = {}
+for i, key in ipairs(KEYS) do
+    local tat = math.max(tonumber(redis.call('GET', key) or '0'), now)
+    local excess = tat - tonumber(ARGV[2 * i]) - now
+    if excess > wait then
+        wait = excess
+    end
+    tats[i] = tat + tonumber(ARGV[2 * i - 1])
+end
+if wait > 0 then
+    return wait
+end
+for i, key in ipairs(KEYS) do
+    redis.call('SET', key, string.format('%d', tats[i]), 'PX', string.format('%d', tats[i] - now))
+end
+return 0
+"""
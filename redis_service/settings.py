@@ -0,0 +1,37 @@
+from decouple import Csv, config
+
+# Redis client pool (see redis_service.client). Every process gets one blocking pool of at
+# most MAX_CONNECTIONS; callers wait up to POOL_TIMEOUT seconds for a free connection
+# instead of opening new ones, and commands failing on connection errors or timeouts are
+# retried RETRY_ATTEMPTS times with jittered exponential backoff.
+REDIS = {
+    # "standalone", "sentinel" (HOST/PORT/DB are ignored; the master of SENTINEL_SERVICE_NAME
+    # is discovered through SENTINELS, a comma-separated list of host:port) or "cluster"
+    # (HOST/PORT is any startup node; DB must stay 0).
+    "MODE": config("REDIS_MODE", default="standalone"),
+    "SENTINELS": config("REDIS_SENTINELS", default="", cast=Csv()),
+    "SENTINEL_SERVICE_NAME": config("REDIS_SENTINEL_SERVICE_NAME", default="mymaster"),
+    "HOST": config("REDIS_HOST", cast=str),
+    "PORT": config("REDIS_PORT", cast=int),
+    "DB": config("REDIS_DB", default=0, cast=int),
+    "PASSWORD": config("REDIS_PASSWORD", default=None),
+    "MAX_CONNECTIONS": config("REDIS_MAX_CONNECTIONS", default=50, cast=int),
+    "POOL_TIMEOUT": config("REDIS_POOL_TIMEOUT", default=2.0, cast=float),
+    "SOCKET_CONNECT_TIMEOUT": config("REDIS_SOCKET_CONNECT_TIMEOUT", default=0.5, cast=float),
+    "SOCKET_TIMEOUT": config("REDIS_SOCKET_TIMEOUT", default=1.0, cast=float),
+    "HEALTH_CHECK_INTERVAL": config("REDIS_HEALTH_CHECK_INTERVAL", default=30, cast=int),
+    "RETRY_ATTEMPTS": config("REDIS_RETRY_ATTEMPTS", default=2, cast=int),
+    "RETRY_BACKOFF_BASE": config("REDIS_RETRY_BACKOFF_BASE", default=0.01, cast=float),
+    "RETRY_BACKOFF_CAP": config("REDIS_RETRY_BACKOFF_CAP", default=0.2, cast=float),
+    # Round trips slower than this are logged by redis_service.metrics; 0 disables the log.
+    "SLOW_COMMAND_SECONDS": config("REDIS_SLOW_COMMAND_SECONDS", default=0.05, cast=float),
+    # Serializer of RedisStore values: "orjson" or "msgpack". Values written with the other
+    # codec, or as plain JSON before the codec layer, stay readable.
+    "CODEC": config("REDIS_CODEC", default="orjson"),
+    # Circuit breaker shared by every client of the process (see redis_service.breaker):
+    # after BREAKER_FAILURE_THRESHOLD consecutive connection errors or timeouts commands fail
+    # at once for BREAKER_RESET_SECONDS, then a health check decides whether to close it.
+    # 0 disables the breaker.
+    "BREAKER_FAILURE_THRESHOLD": config("REDIS_BREAKER_FAILURE_THRESHOLD", default=5, cast=int),
+    "BREAKER_RESET_SECONDS": config("REDIS_BREAKER_RESET_SECONDS", default=5.0, cast=float),
+}
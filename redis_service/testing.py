@@ -0,0 +1,39 @@
+from contextlib import contextmanager
+
+from redis_service.metrics import command_recorders
+
+
+@contextmanager
+def capture_redis_commands():
+    """
+    Collect the Redis round trips issued inside the block.
+
+    Every command is one entry named after it, e.g. `GETDEL`; a pipeline is one entry such
+    as `PIPELINE(SET,SET)`. Only clients from `redis_service.client` are recorded.
+
+    Usage:
+    ----------
+        with capture_redis_commands() as commands:
+            RedisStore().get(key)
+        assert commands == ["GET"]
+    """
+    commands = []
+    command_recorders.append(commands)
+    try:
+        yield commands
+    finally:
+        command_recorders.remove(commands)
+
+
+class RedisAssertionsMixin:
+    """
+    TestCase mixin with a Redis counterpart of `assertNumQueries`.
+    """
+
+    @contextmanager
+    def assertMaxRedisCommands(self, count):
+        with capture_redis_commands() as commands:
+            yield commands
+        self.assertLessEqual(
+            len(commands), count,
+            f"{len(commands)} Redis round trips issued, at most {count} expected: {commands}")
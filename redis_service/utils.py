@@ -1,13 +1,17 @@
-import json
+from django.conf import settings
 
 import redis
+from common.metrics import observe_size
 from common.variables import TRY_AGAIN_LATER
-from JWTBasedAuthentication.settings import REDIS_CLIENT
+from redis_service.client import get_async_redis_client, get_redis_client, is_cluster
+from redis_service.codecs import ValueCodec
+
+value_codec = None
 
 
 def check_redis_health():
     try:
-        response = REDIS_CLIENT.ping()
+        response = get_redis_client().ping()
         if response:
             return True
         else:
@@ -22,19 +26,32 @@ class RedisStore:
     """
     Utility class for interacting with Redis cache.
 
+    Every method makes exactly one round trip to Redis; group further commands with
+    `pipeline()` to keep a request to a single round trip. Values are serialized by the
+    `ValueCodec` configured in `REDIS["CODEC"]`.
+
     Methods:
-    - set(self, key: str, value: Any, expires_in_minutes: int) -> None:
+    - set(self, key: str, value: Any, expires_in_minutes: int, only_if_absent: bool = False) -> bool:
         Set a key-value pair in the Redis cache with an expiration time.
     - get(self, key: str) -> Any:
         Retrieve the value associated with the given key from the Redis cache.
+    - get_many(self, keys: list) -> list:
+        Retrieve the values of several keys at once.
+    - set_many(self, mapping: dict, expires_in_minutes: int) -> None:
+        Set several key-value pairs with the same expiration time.
+    - get_and_delete(self, key: str) -> Any:
+        Retrieve the value of a key and remove it atomically.
     - remove(self, key: str) -> None:
         Remove the key-value pair associated with the given key from the Redis cache.
+    - pipeline(self) -> RedisStorePipeline:
+        Context manager that sends the commands queued in it in one round trip.
     """
 
     def __init__(self) -> None:
-        self.redis_client = REDIS_CLIENT
+        self.redis_client = get_redis_client(decode_responses=False)
+        self.codec = load_value_codec_lazy()
 
-    def set(self, key, value, expires_in_minutes):
+    def set(self, key, value, expires_in_minutes, only_if_absent=False):
         """
         Set a key-value pair in the Redis cache with an expiration time.
 
@@ -42,12 +59,13 @@ class RedisStore:
         - key (str): The key to store the value under in the Redis cache.
         - value (Any): The value to be stored in the Redis cache.
         - expires_in_minutes (int): The expiration time for the key-value pair in minutes.
+        - only_if_absent (bool): Leave an existing key untouched (`SET NX`).
+
+        Returns:
+        - bool: False if `only_if_absent` is set and the key already exists, True otherwise.
         """
-        if isinstance(value, dict):
-            value = json.dumps(value)
-        
-        self.redis_client.set(key, value)
-        self.redis_client.expire(key, expires_in_minutes * 60)
+        return bool(self.redis_client.set(
+            key, encode_sized(self.codec, key, value), ex=expires_in_minutes * 60, nx=only_if_absent))
 
     def get(self, key):
         """
@@ -59,11 +77,47 @@ class RedisStore:
         Returns:
         - Any: The value associated with the given key, or None if the key does not exist.
         """
-        val: str = self.redis_client.get(key)
-        if val:
-            if val.startswith("{") and val.endswith("}"):
-                val = json.loads(val)
-        return val
+        return self.codec.decode(self.redis_client.get(key))
+
+    def get_many(self, keys):
+        """
+        Retrieve the values of several keys with one `MGET`.
+
+        Parameters:
+        - keys (list): The keys to retrieve.
+
+        Returns:
+        - list: The values in the order of `keys`, None for missing keys.
+        """
+        if not keys:
+            return []
+        # MGET cannot span hash slots; in cluster mode redis-py splits it per slot instead.
+        mget = self.redis_client.mget_nonatomic if is_cluster(self.redis_client) else self.redis_client.mget
+        return [self.codec.decode(val) for val in mget(keys)]
+
+    def set_many(self, mapping, expires_in_minutes):
+        """
+        Set several key-value pairs with the same expiration time in one round trip.
+
+        Parameters:
+        - mapping (dict): The keys and the values to store under them.
+        - expires_in_minutes (int): The expiration time of every pair in minutes.
+        """
+        with self.pipeline() as pipe:
+            for key, value in mapping.items():
+                pipe.set(key, value, expires_in_minutes)
+
+    def get_and_delete(self, key):
+        """
+        Retrieve the value of a key and remove it atomically (`GETDEL`).
+
+        Parameters:
+        - key (str): The key to consume.
+
+        Returns:
+        - Any: The value the key held, or None if it did not exist.
+        """
+        return self.codec.decode(self.redis_client.getdel(key))
 
     def remove(self, key):
         """
@@ -74,5 +128,139 @@ class RedisStore:
         """
         self.redis_client.delete(key)
 
+    def pipeline(self):
+        """
+        Queue commands and send them in one round trip when the block exits.
+
+        Usage:
+        ----------
+            with RedisStore().pipeline() as pipe:
+                pipe.get(key)
+                pipe.set(other_key, value, 5)
+            otp, _ = pipe.results
+        """
+        return RedisStorePipeline(self.redis_client, self.codec)
+
     def flush(self):
-        self.redis_client.flushdb()
\ No newline at end of file
+        self.redis_client.flushdb()
+
+
+class RedisStorePipeline:
+    """
+    Non-transactional pipeline with the value encoding of `RedisStore`.
+
+    Nothing is sent if the block raises. After the block, `results` holds the decoded reply
+    of every queued command in order.
+    """
+
+    def __init__(self, redis_client, codec) -> None:
+        self._pipeline = redis_client.pipeline(transaction=False)
+        self._codec = codec
+        self._decoders = []
+        self.results = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            replies = self._pipeline.execute()
+            self.results = [decode(reply) for decode, reply in zip(self._decoders, replies)]
+        self._pipeline.reset()
+        return False
+
+    def set(self, key, value, expires_in_minutes, only_if_absent=False):
+        self._pipeline.set(key, encode_sized(self._codec, key, value),
+                           ex=expires_in_minutes * 60, nx=only_if_absent)
+        self._decoders.append(bool)
+
+    def get(self, key):
+        self._pipeline.get(key)
+        self._decoders.append(self._codec.decode)
+
+    def get_and_delete(self, key):
+        self._pipeline.getdel(key)
+        self._decoders.append(self._codec.decode)
+
+    def remove(self, key):
+        self._pipeline.delete(key)
+        self._decoders.append(bool)
+
+
+class AsyncRedisStore:
+    """
+    asyncio counterpart of `RedisStore` for async views.
+
+    It has the same methods as coroutines, stores values with the same codec and uses the
+    Redis pool of the running event loop, so both stores read each other's values.
+
+    Methods:
+    - set(self, key: str, value: Any, expires_in_minutes: int, only_if_absent: bool = False) -> bool
+    - get(self, key: str) -> Any
+    - get_many(self, keys: list) -> list
+    - set_many(self, mapping: dict, expires_in_minutes: int) -> None
+    - get_and_delete(self, key: str) -> Any
+    - remove(self, key: str) -> None
+    - pipeline(self) -> AsyncRedisStorePipeline:
+        Used with `async with`.
+    """
+
+    def __init__(self) -> None:
+        self.redis_client = get_async_redis_client(decode_responses=False)
+        self.codec = load_value_codec_lazy()
+
+    async def set(self, key, value, expires_in_minutes, only_if_absent=False):
+        return bool(await self.redis_client.set(
+            key, encode_sized(self.codec, key, value), ex=expires_in_minutes * 60, nx=only_if_absent))
+
+    async def get(self, key):
+        return self.codec.decode(await self.redis_client.get(key))
+
+    async def get_many(self, keys):
+        if not keys:
+            return []
+        mget = self.redis_client.mget_nonatomic if is_cluster(self.redis_client) else self.redis_client.mget
+        return [self.codec.decode(val) for val in await mget(keys)]
+
+    async def set_many(self, mapping, expires_in_minutes):
+        async with self.pipeline() as pipe:
+            for key, value in mapping.items():
+                pipe.set(key, value, expires_in_minutes)
+
+    async def get_and_delete(self, key):
+        return self.codec.decode(await self.redis_client.getdel(key))
+
+    async def remove(self, key):
+        await self.redis_client.delete(key)
+
+    def pipeline(self):
+        return AsyncRedisStorePipeline(self.redis_client, self.codec)
+
+
+class AsyncRedisStorePipeline(RedisStorePipeline):
+    """
+    `RedisStorePipeline` that is sent when an `async with` block exits.
+    """
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            replies = await self._pipeline.execute()
+            self.results = [decode(reply) for decode, reply in zip(self._decoders, replies)]
+        await self._pipeline.reset()
+        return False
+
+
+def load_value_codec_lazy():
+    global value_codec
+    if value_codec is None:
+        value_codec = ValueCodec(settings.REDIS["CODEC"])
+    return value_codec
+
+
+def encode_sized(codec, key, value):
+    payload = codec.encode(value)
+    observe_size(key.split(":", 1)[0], len(payload))
+    return payload
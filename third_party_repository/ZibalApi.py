@@ -4,6 +4,7 @@ import urllib3
 from decouple import config
 from rest_framework import status
 
+from common.metrics import stage_timer
 from common.variables import *
 from third_party_repository.models.ZibalModels import CompanyInfo
 
@@ -85,7 +86,8 @@ class ZibalService:
             CONTENT_TYPE: APPLICATION_JSON
         }
 
-        response = self.http.request(POST, url, headers=headers, body=payload)
+        with stage_timer("http.zibal"):
+            response = self.http.request(POST, url, headers=headers, body=payload)
 
         if response.status == status.HTTP_200_OK:
             data = json.loads(response.data.decode('utf-8'))
@@ -111,7 +113,8 @@ class ZibalService:
             CONTENT_TYPE: APPLICATION_JSON
         }
 
-        response = self.http.request(POST, url, headers=headers, body=payload)
+        with stage_timer("http.zibal"):
+            response = self.http.request(POST, url, headers=headers, body=payload)
         if response.status == status.HTTP_200_OK:
             data = json.loads(response.data.decode('utf-8'))
             personal_info = parse_response(data)
@@ -130,7 +133,8 @@ class ZibalService:
             AUTHORIZATION: self.token,
             CONTENT_TYPE: APPLICATION_JSON
         }
-        response = self.http.request(POST, url, headers=headers, body=payload)
+        with stage_timer("http.zibal"):
+            response = self.http.request(POST, url, headers=headers, body=payload)
 
         if response.status == status.HTTP_200_OK:
             res = json.loads(response.data.decode('utf-8'))
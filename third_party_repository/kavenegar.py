@@ -1,22 +1,150 @@
+import json
+
 import urllib3
 
+from common.metrics import count_sms, stage_timer
+
+KAVENEGAR_HOST = "api.kavenegar.com"
+SENT = 200
+# Kavenegar statuses worth another attempt: rate limiting and server errors. Others, such
+# as 411 (invalid receptor) or 418 (insufficient credit), fail the same way every time.
+RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+TRANSPORT_ERROR = "transport_error"
+
+
+class KavenegarError(Exception):
+    """
+    A message rejected by Kavenegar, or a request that failed in transit (`status` None).
+
+    A request that timed out while reading the response is not `retryable`: Kavenegar may
+    already have sent the message.
+    """
+
+    def __init__(self, status, message="", retryable=None) -> None:
+        super().__init__(f"Kavenegar responded {status}: {message}" if status
+                         else f"Kavenegar request failed: {message}")
+        self.status = status
+        self.retryable = (status is None or status in RETRYABLE_STATUSES) if retryable is None else retryable
+
+
+class SMSResult:
+    """
+    Outcome of one message: the Kavenegar status (200 when accepted, None when the request
+    failed in transit), the message id assigned by Kavenegar and whether a failed message
+    may be sent again (`retryable`, as on `KavenegarError`).
+    """
+    __slots__ = ("receptor", "status", "message_id", "retryable")
+
+    def __init__(self, receptor, status, message_id=None, retryable=True) -> None:
+        self.receptor = receptor
+        self.status = status
+        self.message_id = message_id
+        self.retryable = retryable
+
+    @property
+    def ok(self):
+        return self.status == SENT
+
+    def __repr__(self):
+        return (f"SMSResult(receptor={self.receptor!r}, status={self.status!r}, "
+                f"message_id={self.message_id!r}, retryable={self.retryable!r})")
+
+
+def outcome(status):
+    return TRANSPORT_ERROR if status is None else str(status)
+
 
 class KavenegarSMSService:
-    def __init__(self, api_key) -> None:
+    """
+    Kavenegar REST client over one keep-alive connection pool.
+
+    Every request is bounded by `connect_timeout` and `read_timeout`. Connection failures,
+    rate limiting and server errors are retried `retries` times with exponential backoff
+    plus random jitter; a read timeout is not retried, as the message may already be sent.
+    Each message is counted in `sms_messages_total` by its outcome.
+
+    Methods:
+    - send_sms(self, otp: str, receptor: str) -> SMSResult:
+        Send one OTP with the lookup template; raises `KavenegarError` when it is rejected.
+    - send_bulk(self, messages: list) -> list:
+        Send (receptor, otp) pairs with one `sendarray` call per `bulk_size` messages and
+        return one `SMSResult` per pair.
+    """
+
+    def __init__(self, api_key, template="verify", sender=None, bulk_message="{otp}", bulk_size=200,
+                 connect_timeout=2.0, read_timeout=5.0, retries=2, backoff_factor=0.2,
+                 backoff_jitter=0.2, max_connections=10) -> None:
         self.api_key = api_key
-        self.http = urllib3.PoolManager()
+        self.template = template
+        self.sender = sender
+        self.bulk_message = bulk_message
+        self.bulk_size = bulk_size
+        self.http = urllib3.HTTPSConnectionPool(
+            KAVENEGAR_HOST,
+            maxsize=max_connections,
+            timeout=urllib3.Timeout(connect=connect_timeout, read=read_timeout),
+            retries=urllib3.Retry(
+                total=retries, read=0, status_forcelist=RETRYABLE_STATUSES,
+                allowed_methods=frozenset({"POST"}), backoff_factor=backoff_factor,
+                backoff_jitter=backoff_jitter, raise_on_status=False),
+        )
 
     def send_sms(self, otp, receptor):
-        url = f"https://api.kavenegar.com/v1/{self.api_key}/verify/lookup.json?receptor={receptor}&token={otp}&template=verify"
         try:
-            response = self.http.request(
-                "GET",
-                url,
-                headers={
-                    "Cookie": "cookiesession1=678A8C3102ACFHJKLMNOPQRSTUVW853C"},
-            )
-        except Exception as e:
-            print(f"Error: {e}")
+            entries = self._call("verify/lookup.json",
+                                 {"receptor": receptor, "token": otp, "template": self.template})
+        except KavenegarError as e:
+            count_sms(outcome(e.status))
+            raise
+        count_sms(outcome(SENT))
+        return SMSResult(receptor, SENT, entries[0].get("messageid") if entries else None)
+
+    def send_bulk(self, messages):
+        if self.sender is None:
+            raise ValueError("Bulk sending needs a Kavenegar sender line")
+        results = []
+        for start in range(0, len(messages), self.bulk_size):
+            chunk = messages[start:start + self.bulk_size]
+            receptors = [receptor for receptor, _ in chunk]
+            fields = {
+                "receptor": json.dumps(receptors),
+                "sender": json.dumps([self.sender] * len(chunk)),
+                "message": json.dumps([self.bulk_message.format(otp=otp) for _, otp in chunk]),
+            }
+            try:
+                entries = self._call("sms/sendarray.json", fields)
+            except KavenegarError as e:
+                status, entries, retryable = e.status, [], e.retryable
+            else:
+                status, retryable = SENT, True
+            message_ids = [entry.get("messageid") for entry in entries]
+            for index, receptor in enumerate(receptors):
+                results.append(SMSResult(receptor, status,
+                                         message_ids[index] if index < len(message_ids) else None,
+                                         retryable))
+                count_sms(outcome(status))
+        return results
+
+    def _call(self, path, fields):
+        try:
+            with stage_timer("http.kavenegar"):
+                response = self.http.request_encode_body(
+                    "POST", f"/v1/{self.api_key}/{path}", fields=fields, encode_multipart=False)
+        except urllib3.exceptions.HTTPError as e:
+            # Retries exhausted by urllib3 surface as MaxRetryError with the last error as reason.
+            error = e.reason if isinstance(e, urllib3.exceptions.MaxRetryError) and e.reason else e
+            read_timeout = isinstance(error, urllib3.exceptions.ReadTimeoutError)
+            # urllib3 errors quote the URL, which contains the API key.
+            raise KavenegarError(None, type(error).__name__, retryable=not read_timeout) from None
+        try:
+            body = response.json()
+        except ValueError:
+            body = {}
+        result = body.get("return") or {}
+        status = result.get("status", response.status)
+        if status != SENT:
+            raise KavenegarError(status, result.get("message", ""))
+        return body.get("entries") or []
 
 
 # if __name__ == "__main__":